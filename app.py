@@ -10,7 +10,7 @@ from starlette.middleware.sessions import SessionMiddleware
 
 from backend.config import SECRET_KEY
 from backend.database import lifespan
-from backend.routes import health, chat, auth, oauth
+from backend.routes import health, chat, auth, oauth, ingest
 
 # ======================
 # CREATE APP
@@ -55,6 +55,9 @@ app.include_router(auth.router, tags=["Authentication"])
 # OAuth social login
 app.include_router(oauth.router, tags=["OAuth"])
 
+# Document upload and ingestion jobs
+app.include_router(ingest.router, tags=["Ingest"])
+
 
 if __name__ == "__main__":
     import uvicorn
@@ -4,11 +4,28 @@ Authentication Utilities
 Password hashing, verification, and JWT token management.
 """
 
+import asyncio
 import bcrypt
+from concurrent.futures import ThreadPoolExecutor
+from fastapi import HTTPException
 from jose import jwt
 from datetime import datetime, timedelta
 from typing import Optional
-from backend.config import SECRET_KEY, ALGORITHM, ACCESS_TOKEN_EXPIRE_MINUTES
+from backend.config import (
+    SECRET_KEY,
+    ALGORITHM,
+    ACCESS_TOKEN_EXPIRE_MINUTES,
+    BCRYPT_ROUNDS,
+    PASSWORD_HASH_WORKERS,
+    PASSWORD_HASH_QUEUE,
+)
+
+# Dedicated pool for bcrypt so password work never runs on the event loop
+password_executor = ThreadPoolExecutor(
+    max_workers=PASSWORD_HASH_WORKERS, thread_name_prefix="bcrypt"
+)
+password_ops_in_flight = 0
+password_ops_rejected = 0
 
 
 def hash_password(password: str) -> str:
@@ -18,7 +35,7 @@ def hash_password(password: str) -> str:
     """
     # Ensure password is bytes and truncate to 72 bytes if needed
     password_bytes = password.encode('utf-8')[:72]
-    hashed = bcrypt.hashpw(password_bytes, bcrypt.gensalt())
+    hashed = bcrypt.hashpw(password_bytes, bcrypt.gensalt(rounds=BCRYPT_ROUNDS))
     return hashed.decode('utf-8')
 
 
@@ -29,6 +46,49 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
     return bcrypt.checkpw(password_bytes, hashed_bytes)
 
 
+async def run_password_op(fn, *args):
+    """
+    Run a bcrypt operation on the dedicated executor.
+    Fails fast with 503 when workers and queue are all taken.
+    """
+    global password_ops_in_flight, password_ops_rejected
+
+    if password_ops_in_flight >= PASSWORD_HASH_WORKERS + PASSWORD_HASH_QUEUE:
+        password_ops_rejected += 1
+        raise HTTPException(
+            status_code=503,
+            detail="Authentication service busy, please retry",
+            headers={"Retry-After": "1"},
+        )
+
+    password_ops_in_flight += 1
+    try:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(password_executor, fn, *args)
+    finally:
+        password_ops_in_flight -= 1
+
+
+async def hash_password_async(password: str) -> str:
+    """Hash password off the event loop."""
+    return await run_password_op(hash_password, password)
+
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    """Verify password off the event loop."""
+    return await run_password_op(verify_password, plain_password, hashed_password)
+
+
+def password_pool_stats() -> dict:
+    """Executor load for monitoring"""
+    return {
+        "workers": PASSWORD_HASH_WORKERS,
+        "queue_limit": PASSWORD_HASH_QUEUE,
+        "in_flight": password_ops_in_flight,
+        "rejected": password_ops_rejected,
+    }
+
+
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
     """Create JWT access token."""
     to_encode = data.copy()
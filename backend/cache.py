@@ -0,0 +1,90 @@
+"""
+In-Process Cache
+
+Size-bounded LRU cache with optional per-entry TTL and hit/miss counters.
+Used for hot, rarely-changing lookups on the request path.
+"""
+
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Optional
+
+# Sentinel for "not found" so cached falsy values still count as hits
+_MISSING = object()
+
+
+class TTLCache:
+    """
+    LRU cache bounded by `maxsize`, with entries expiring after `ttl` seconds.
+
+    A `ttl` of None disables expiry (plain LRU). Not thread-safe; intended
+    for use from the event loop, where no await happens inside its methods.
+    """
+
+    def __init__(self, maxsize: int = 1024, ttl: Optional[float] = None):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """Return cached value (refreshing its LRU position) or `default`"""
+        entry = self._data.get(key, _MISSING)
+        if entry is _MISSING:
+            self.misses += 1
+            return default
+
+        value, expires_at = entry
+        if expires_at is not None and expires_at <= time.monotonic():
+            del self._data[key]
+            self.misses += 1
+            return default
+
+        self._data.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None):
+        """Store a value, evicting the least recently used entry if full"""
+        ttl = self.ttl if ttl is None else ttl
+        expires_at = time.monotonic() + ttl if ttl is not None else None
+
+        if key in self._data:
+            self._data.move_to_end(key)
+        self._data[key] = (value, expires_at)
+
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+            self.evictions += 1
+
+    def invalidate(self, key: Hashable) -> bool:
+        """Drop a single entry. Returns True if it was cached."""
+        return self._data.pop(key, _MISSING) is not _MISSING
+
+    def invalidate_where(self, predicate: Callable[[Hashable, Any], bool]) -> int:
+        """Drop every entry for which predicate(key, value) is true"""
+        stale = [k for k, (v, _) in self._data.items() if predicate(k, v)]
+        for k in stale:
+            del self._data[k]
+        return len(stale)
+
+    def clear(self):
+        """Drop all entries (counters are kept)"""
+        self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def stats(self) -> Dict[str, Any]:
+        """Counters for monitoring"""
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._data),
+            "maxsize": self.maxsize,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+        }
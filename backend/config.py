@@ -13,8 +13,36 @@ load_dotenv()
 # API CONFIGURATION
 # ======================
 
-OLLAMA_URL = os.getenv("OLLAMA_BASE_URL", "http://localhost:11434") + "/api/generate"
+OLLAMA_BASE_URL = os.getenv("OLLAMA_BASE_URL", "http://localhost:11434")
+# Comma-separated Ollama servers per pool (default: OLLAMA_BASE_URL only)
+OLLAMA_GENERATE_URLS = [
+    url.strip() for url in os.getenv("OLLAMA_GENERATE_URLS", OLLAMA_BASE_URL).split(",") if url.strip()
+]
+OLLAMA_EMBED_URLS = [
+    url.strip() for url in os.getenv("OLLAMA_EMBED_URLS", OLLAMA_BASE_URL).split(",") if url.strip()
+]
 MODEL = "llama3.2:3b"
+EMBED_MODEL = "nomic-embed-text"
+
+# "chat": /api/chat messages with a stable system prefix (KV cache reuse)
+# "generate": flat /api/generate prompt (optionally with session context carry-over)
+OLLAMA_API_MODE = os.getenv("OLLAMA_API_MODE", "chat")
+OLLAMA_KEEP_ALIVE = os.getenv("OLLAMA_KEEP_ALIVE", "30m")  # How long Ollama keeps the model loaded
+
+# ======================
+# OLLAMA HTTP CLIENT
+# ======================
+
+OLLAMA_GENERATE_TIMEOUT = float(os.getenv("OLLAMA_GENERATE_TIMEOUT", 120))
+OLLAMA_EMBED_TIMEOUT = float(os.getenv("OLLAMA_EMBED_TIMEOUT", 30))
+OLLAMA_CONNECT_TIMEOUT = float(os.getenv("OLLAMA_CONNECT_TIMEOUT", 5))
+OLLAMA_MAX_CONNECTIONS = int(os.getenv("OLLAMA_MAX_CONNECTIONS", 20))
+OLLAMA_MAX_KEEPALIVE = int(os.getenv("OLLAMA_MAX_KEEPALIVE", 10))
+
+# Passive health checks: consecutive failures before a backend's circuit
+# opens, and seconds before it gets a probe request again
+OLLAMA_FAILURE_THRESHOLD = int(os.getenv("OLLAMA_FAILURE_THRESHOLD", 3))
+OLLAMA_CIRCUIT_COOLDOWN = float(os.getenv("OLLAMA_CIRCUIT_COOLDOWN", 30))
 
 # ======================
 # DATABASE CONFIGURATION
@@ -28,6 +56,114 @@ DB_CONFIG = {
     "password": os.getenv("DATABASE_PASSWORD", ""),
 }
 
+# ======================
+# RETRIEVAL
+# ======================
+
+RETRIEVAL_TOP_K = int(os.getenv("RETRIEVAL_TOP_K", 8))  # Chunks per question; lower it only after bench/retrieval_hit_rate.py
+HYBRID_SEARCH_ENABLED = os.getenv("HYBRID_SEARCH_ENABLED", "false").lower() == "true"  # Vector + Postgres full-text (see bench/hybrid_retrieval.py)
+HYBRID_CANDIDATES = int(os.getenv("HYBRID_CANDIDATES", 10))  # Candidates per ranking before fusion
+HYBRID_RRF_K = int(os.getenv("HYBRID_RRF_K", 60))  # Reciprocal rank fusion constant
+RERANK_ENABLED = os.getenv("RERANK_ENABLED", "false").lower() == "true"  # MMR selection of candidates (see bench/retrieval_hit_rate.py --rerank)
+RERANK_CANDIDATES = int(os.getenv("RERANK_CANDIDATES", 20))  # Over-fetched before reranking
+MMR_LAMBDA = float(os.getenv("MMR_LAMBDA", 0.7))  # 1.0 = relevance only, 0.0 = diversity only
+CONTEXT_TOKEN_BUDGET = int(os.getenv("CONTEXT_TOKEN_BUDGET", 600))  # Max estimated tokens of retrieved context
+
+# Max estimated prompt tokens per plan (history and context are trimmed to fit).
+# Keep below the model's num_ctx minus room for the reply.
+PROMPT_TOKEN_BUDGET = {
+    "free": int(os.getenv("PROMPT_TOKEN_BUDGET_FREE", 1024)),
+    "basic": int(os.getenv("PROMPT_TOKEN_BUDGET_BASIC", 1280)),
+    "pro": int(os.getenv("PROMPT_TOKEN_BUDGET_PRO", 1536)),
+}
+
+# ======================
+# SESSION CONTEXT CARRY-OVER
+# ======================
+
+# generate mode only: reuse the KV `context` Ollama returned for the session's
+# previous turn, sending just the new context + question
+SESSION_CONTEXT_CARRYOVER = os.getenv("SESSION_CONTEXT_CARRYOVER", "false").lower() == "true"
+SESSION_CONTEXT_CACHE_SIZE = int(os.getenv("SESSION_CONTEXT_CACHE_SIZE", 1000))
+SESSION_CONTEXT_TTL = float(os.getenv("SESSION_CONTEXT_TTL", 1800))  # seconds
+
+# ======================
+# EMBEDDING CACHE
+# ======================
+
+EMBED_CACHE_SIZE = int(os.getenv("EMBED_CACHE_SIZE", 5000))
+EMBED_CACHE_PATH = os.getenv("EMBED_CACHE_PATH", "")  # SQLite file, empty = memory only
+# Disk tier row cap (~3 KB per 768-dim vector); least recently used rows are pruned
+EMBED_CACHE_MAX_ROWS = int(os.getenv("EMBED_CACHE_MAX_ROWS", 50000))
+
+# ======================
+# SEMANTIC ANSWER CACHE
+# ======================
+
+ANSWER_CACHE_ENABLED = os.getenv("ANSWER_CACHE_ENABLED", "true").lower() == "true"
+ANSWER_CACHE_THRESHOLD = float(os.getenv("ANSWER_CACHE_THRESHOLD", 0.95))  # cosine similarity
+ANSWER_CACHE_TTL = float(os.getenv("ANSWER_CACHE_TTL", 3600))  # seconds
+ANSWER_CACHE_MAX_PER_CLIENT = int(os.getenv("ANSWER_CACHE_MAX_PER_CLIENT", 256))
+ANSWER_CACHE_MAX_CLIENTS = int(os.getenv("ANSWER_CACHE_MAX_CLIENTS", 1000))
+
+# ======================
+# API KEY CACHE
+# ======================
+
+API_KEY_CACHE_SIZE = int(os.getenv("API_KEY_CACHE_SIZE", 10000))
+API_KEY_CACHE_TTL = float(os.getenv("API_KEY_CACHE_TTL", 60))  # seconds
+
+# ======================
+# RATE LIMITING
+# ======================
+
+RATE_LIMIT_BACKEND = os.getenv("RATE_LIMIT_BACKEND", "memory")  # or "postgres" (shared)
+RATE_LIMIT_MODE = os.getenv("RATE_LIMIT_MODE", "sliding_window")  # or "token_bucket" (memory only)
+RATE_LIMIT_MAX_KEYS = int(os.getenv("RATE_LIMIT_MAX_KEYS", 100000))
+
+# Extra requests allowed on top of rate_limit_per_minute, per plan
+RATE_LIMIT_BURST = {
+    "free": 0,
+    "basic": 5,
+    "pro": 20,
+}
+
+# ======================
+# LLM SCHEDULER
+# ======================
+
+# Concurrent generations across all generate backends
+# (OLLAMA_NUM_PARALLEL / model slots per server times the number of servers)
+LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", 2 * len(OLLAMA_GENERATE_URLS)))
+LLM_QUEUE_TIMEOUT = float(os.getenv("LLM_QUEUE_TIMEOUT", 20))  # seconds in queue before 503
+LLM_MAX_QUEUE = int(os.getenv("LLM_MAX_QUEUE", 64))  # queued requests before 503
+LLM_MAX_QUEUED_PER_CLIENT = int(os.getenv("LLM_MAX_QUEUED_PER_CLIENT", 8))  # before 429
+
+# Fair-queuing weight per plan (share of LLM slots under contention)
+LLM_PLAN_WEIGHTS = {
+    "free": 1,
+    "basic": 2,
+    "pro": 4,
+}
+
+# ======================
+# USAGE LOGGING (write-behind)
+# ======================
+
+USAGE_QUEUE_SIZE = int(os.getenv("USAGE_QUEUE_SIZE", 10000))
+USAGE_BATCH_SIZE = int(os.getenv("USAGE_BATCH_SIZE", 500))
+USAGE_FLUSH_INTERVAL_MS = int(os.getenv("USAGE_FLUSH_INTERVAL_MS", 1000))
+USAGE_ENQUEUE_TIMEOUT = float(os.getenv("USAGE_ENQUEUE_TIMEOUT", 0.5))  # seconds
+USAGE_FLUSH_RETRIES = int(os.getenv("USAGE_FLUSH_RETRIES", 3))  # COPY retries before row-by-row inserts
+USAGE_RETRY_BACKOFF_MS = int(os.getenv("USAGE_RETRY_BACKOFF_MS", 200))  # doubled on each retry
+
+# ======================
+# METRICS
+# ======================
+
+# Bearer token required by GET /metrics; empty = no token (keep it internal)
+METRICS_TOKEN = os.getenv("METRICS_TOKEN", "")
+
 # ======================
 # JWT CONFIGURATION
 # ======================
@@ -36,12 +172,33 @@ SECRET_KEY = os.getenv("JWT_SECRET", "your-secret-key-change-this")
 ALGORITHM = os.getenv("JWT_ALGORITHM", "HS256")
 ACCESS_TOKEN_EXPIRE_MINUTES = 60 * 24  # 24 hours
 
+# ======================
+# PASSWORD HASHING
+# ======================
+
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", 12))
+PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", 2))
+PASSWORD_HASH_QUEUE = int(os.getenv("PASSWORD_HASH_QUEUE", 16))  # waiting ops before 503
+
 # ======================
 # VECTOR DB CONFIGURATION
 # ======================
 
 VECTOR_DB_DIR = "./scripts/vectordb"
 
+# ======================
+# INGESTION WORKER
+# ======================
+
+SCRIPTS_DIR = "./scripts"  # ingest.py runs from here (its vectordb path is relative)
+INGEST_WORKERS = int(os.getenv("INGEST_WORKERS", 1))  # Concurrent ingest subprocesses
+INGEST_JOB_TIMEOUT = float(os.getenv("INGEST_JOB_TIMEOUT", 3600))  # seconds
+# A running job with no progress for this long is assumed dead (its process
+# crashed) and is re-queued on startup; keep it above the slowest batch
+INGEST_STALE_AFTER = float(os.getenv("INGEST_STALE_AFTER", 900))  # seconds
+INGEST_MAX_DOCUMENTS = int(os.getenv("INGEST_MAX_DOCUMENTS", 1000))  # per upload request
+INGEST_MAX_QUEUE = int(os.getenv("INGEST_MAX_QUEUE", 100))  # Jobs waiting for a worker (503 beyond)
+
 # ======================
 # OAUTH URLS
 # ======================
@@ -7,6 +7,7 @@ Handles database connection pooling and lifecycle management.
 import asyncpg
 from contextlib import asynccontextmanager
 from backend.config import DB_CONFIG
+from backend.services.ollama import init_http_client, close_http_client
 
 # Global database pool
 db_pool = None
@@ -15,7 +16,8 @@ db_pool = None
 @asynccontextmanager
 async def lifespan(app):
     """
-    Lifecycle manager for database connection pool.
+    Lifecycle manager for the database pool, shared HTTP client and
+    background workers.
     Called on app startup and shutdown.
     """
     global db_pool
@@ -24,10 +26,33 @@ async def lifespan(app):
     print("🔌 Connecting to database...")
     db_pool = await asyncpg.create_pool(**DB_CONFIG, min_size=2, max_size=10)
     print("✅ Database pool created")
+    await init_http_client()
+    print("✅ Ollama HTTP client ready")
+    
+    # Imported here: these services themselves depend on this module
+    from backend.services.usage import usage_logger
+    await usage_logger.start()
+    print("✅ Usage logger started")
+    
+    from backend.services.vector_store import collection_registry
+    loaded = await collection_registry.warm_up()
+    print(f"✅ Loaded {loaded} vector collection(s)")
+    
+    from backend.services.ingest_worker import ingest_worker
+    await ingest_worker.start()
+    print("✅ Ingest worker started")
     
     yield
     
     # Shutdown
+    print("🔌 Stopping ingest worker...")
+    await ingest_worker.stop()
+    print("🔌 Draining usage logger...")
+    await usage_logger.stop()
+    from backend.services.embedding_cache import embedding_cache
+    embedding_cache.close()
+    print("🔌 Closing Ollama HTTP client...")
+    await close_http_client()
     print("🔌 Closing database pool...")
     await db_pool.close()
     print("✅ Database pool closed")
@@ -4,37 +4,47 @@ FastAPI Dependencies
 Reusable dependency functions for authentication and authorization.
 """
 
+import hmac
 import uuid as uuid_lib
 from fastapi import Depends, HTTPException, Header
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from jose import JWTError, jwt
-from typing import Dict
-from backend.config import SECRET_KEY, ALGORITHM
+from typing import Dict, Optional
+from backend.config import (
+    SECRET_KEY,
+    METRICS_TOKEN,
+    ALGORITHM,
+    API_KEY_CACHE_SIZE,
+    API_KEY_CACHE_TTL,
+    RATE_LIMIT_BACKEND,
+    RATE_LIMIT_MODE,
+    RATE_LIMIT_MAX_KEYS,
+    RATE_LIMIT_BURST,
+)
 from backend.database import get_db_pool
-from collections import defaultdict, deque
-import time
+from backend.cache import TTLCache
+from backend.rate_limit import create_backend
+from backend.services.answer_cache import answer_cache
 
 # Security
 security = HTTPBearer()
+metrics_security = HTTPBearer(auto_error=False)
 
-# Rate limiting store (in-memory)
-rate_limit_store = defaultdict(deque)
+# Rate limiter (in-process or shared through Postgres)
+rate_limit_backend = create_backend(
+    RATE_LIMIT_BACKEND, RATE_LIMIT_MODE, max_keys=RATE_LIMIT_MAX_KEYS
+)
 
+# API key -> client info cache (in-memory, per process)
+api_key_cache = TTLCache(maxsize=API_KEY_CACHE_SIZE, ttl=API_KEY_CACHE_TTL)
 
-async def check_rate_limit(api_key: str, limit: int):
-    """Check rate limiting for API key"""
-    now = time.time()
-    window = rate_limit_store[api_key]
 
-    # Remove old entries outside 60 second window
-    while window and window[0] <= now - 60:
-        window.popleft()
-
-    if len(window) >= limit:
+async def check_rate_limit(api_key: str, limit: int, plan: str = "free"):
+    """Check rate limiting for API key (per minute, plus plan burst allowance)"""
+    burst = RATE_LIMIT_BURST.get(plan, 0)
+    if not await rate_limit_backend.allow(api_key, limit, burst):
         raise HTTPException(status_code=429, detail="Rate limit exceeded")
 
-    window.append(now)
-
 
 async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(security)) -> Dict:
     """Get current user from JWT token"""
@@ -62,19 +72,42 @@ async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(s
         return dict(user)
 
 
+async def verify_client_member(user: Dict, client_id):
+    """403 unless the signed-in user belongs to the client (user_clients)"""
+    db_pool = get_db_pool()
+    async with db_pool.acquire() as conn:
+        member = await conn.fetchval(
+            "SELECT 1 FROM user_clients WHERE user_id = $1 AND client_id = $2",
+            uuid_lib.UUID(str(user["id"])),
+            client_id,
+        )
+    if not member:
+        raise HTTPException(status_code=403, detail="Not a member of this client")
+
+
 async def verify_api_key(x_api_key: str = Header(...)) -> Dict:
-    """Verify API key and return client info"""
+    """
+    Verify API key and return client info (cached per process).
+    The client's system prompt is fetched in the same query.
+    """
+    cached = api_key_cache.get(x_api_key)
+    if cached is not None:
+        return cached
+
     db_pool = get_db_pool()
     
     async with db_pool.acquire() as conn:
         row = await conn.fetchrow(
             """
             SELECT 
+                ak.id as api_key_id,
                 ak.client_id,
                 ak.rate_limit_per_minute,
                 c.name as client_name,
                 c.plan,
-                c.status
+                c.status,
+                c.system_prompt,
+                c.collection_version
             FROM api_keys ak
             JOIN clients c ON ak.client_id = c.id
             WHERE ak.key_hash = $1
@@ -87,9 +120,40 @@ async def verify_api_key(x_api_key: str = Header(...)) -> Dict:
         if not row:
             raise HTTPException(status_code=401, detail="Invalid or expired API key")
 
-        return {
+        client_info = {
+            "api_key_id": row["api_key_id"],
             "client_id": row["client_id"],
             "client_name": row["client_name"],
             "rate_limit": row["rate_limit_per_minute"],
             "plan": row["plan"],
+            "system_prompt": row["system_prompt"],
+            "collection_version": row["collection_version"],
         }
+        api_key_cache.set(x_api_key, client_info)
+        return client_info
+
+
+async def verify_metrics_token(
+    credentials: Optional[HTTPAuthorizationCredentials] = Depends(metrics_security),
+):
+    """Require `Authorization: Bearer <METRICS_TOKEN>` when METRICS_TOKEN is set"""
+    if not METRICS_TOKEN:
+        return
+    token = credentials.credentials if credentials else ""
+    if not hmac.compare_digest(token.encode(), METRICS_TOKEN.encode()):
+        raise HTTPException(status_code=401, detail="Invalid metrics token")
+
+
+def invalidate_api_key(api_key: str):
+    """Drop a cached API key, e.g. after it is deactivated or rotated"""
+    api_key_cache.invalidate(api_key)
+
+
+def invalidate_client(client_id):
+    """
+    Drop every cached API key and answer of a client, e.g. after suspension,
+    a plan change or a system prompt update
+    """
+    client_id = str(client_id)
+    api_key_cache.invalidate_where(lambda _, info: str(info["client_id"]) == client_id)
+    answer_cache.invalidate_client(client_id)
@@ -0,0 +1,25 @@
+"""
+Metrics Helpers
+
+Percentiles and opaque tenant labels for the in-process metrics exported
+by GET /metrics (also used by the bench/ scripts).
+"""
+
+import hashlib
+import hmac
+from backend.config import SECRET_KEY
+
+
+def percentile(values: list, q: float) -> float:
+    """Nearest-rank percentile (q in 0..1) of a non-empty list"""
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+def client_label(client_id) -> str:
+    """
+    Stable opaque label for a client: a keyed hash, so metrics can be
+    compared over time without revealing which tenant is which.
+    """
+    digest = hmac.new(SECRET_KEY.encode(), str(client_id).encode(), hashlib.sha256)
+    return digest.hexdigest()[:12]
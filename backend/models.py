@@ -5,7 +5,7 @@ Data validation models for API requests and responses.
 """
 
 from pydantic import BaseModel, EmailStr
-from typing import Optional
+from typing import List, Optional
 
 
 class ChatReq(BaseModel):
@@ -35,3 +35,15 @@ class Token(BaseModel):
     user: dict
     client: dict
     api_key: str
+
+
+class IngestDocument(BaseModel):
+    """One document to ingest"""
+    title: str
+    content: str
+
+
+class IngestRequest(BaseModel):
+    """Document upload request; documents are keyed by (source, title)"""
+    source: str
+    documents: List[IngestDocument]
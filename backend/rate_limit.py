@@ -0,0 +1,262 @@
+"""
+Rate Limiting
+
+Per-key request limiters with O(1) memory per key and idle-key eviction.
+
+Two modes are available:
+- token_bucket: refills `limit` tokens per minute, bucket holds limit + burst
+- sliding_window: weighted two-window counter approximating a 60s sliding window
+
+Storage is pluggable: "memory" keeps state per process, "postgres" shares a
+sliding window counter across workers and nodes.
+"""
+
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Dict, Optional
+from backend.database import get_db_pool
+
+WINDOW_SECONDS = 60.0
+
+
+class KeyedLimiter(ABC):
+    """
+    Base class holding fixed-size state per key in LRU order.
+
+    Keys untouched for `idle_ttl` seconds are evicted, and at most
+    `max_keys` are kept, so memory is bounded regardless of traffic.
+    """
+
+    def __init__(self, idle_ttl: float = 2 * WINDOW_SECONDS, max_keys: int = 100_000):
+        self.idle_ttl = idle_ttl
+        self.max_keys = max_keys
+        # key -> list of floats, last element is always the last-seen timestamp
+        self._state: "OrderedDict[str, list]" = OrderedDict()
+        self.evictions = 0
+
+    def _evict(self, now: float):
+        """Drop idle keys from the LRU end, then enforce the key cap"""
+        state = self._state
+        while state:
+            key, entry = next(iter(state.items()))
+            if now - entry[-1] < self.idle_ttl and len(state) <= self.max_keys:
+                break
+            state.popitem(last=False)
+            self.evictions += 1
+
+    def _entry(self, key: str) -> Optional[list]:
+        entry = self._state.get(key)
+        if entry is not None:
+            self._state.move_to_end(key)
+        return entry
+
+    @abstractmethod
+    def allow(self, key: str, limit: int, burst: int = 0, now: float = None) -> bool:
+        """Count one request for `key`; False if it is over limit + burst"""
+
+    def reset(self, key: str = None):
+        """Forget one key, or all keys"""
+        if key is None:
+            self._state.clear()
+        else:
+            self._state.pop(key, None)
+
+    def __len__(self) -> int:
+        return len(self._state)
+
+    def stats(self) -> Dict:
+        return {
+            "mode": self.mode,
+            "keys": len(self._state),
+            "max_keys": self.max_keys,
+            "evictions": self.evictions,
+        }
+
+
+class TokenBucketLimiter(KeyedLimiter):
+    """Token bucket: state is [tokens, last_seen]"""
+
+    mode = "token_bucket"
+
+    def allow(self, key: str, limit: int, burst: int = 0, now: float = None) -> bool:
+        now = time.monotonic() if now is None else now
+        capacity = limit + burst
+        rate = limit / WINDOW_SECONDS
+
+        entry = self._entry(key)
+        if entry is None:
+            entry = self._state[key] = [float(capacity), now]
+            self._evict(now)
+        else:
+            entry[0] = min(capacity, entry[0] + (now - entry[1]) * rate)
+            entry[1] = now
+
+        if entry[0] < 1:
+            return False
+        entry[0] -= 1
+        return True
+
+
+class SlidingWindowLimiter(KeyedLimiter):
+    """
+    Sliding window counter: state is [window_start, previous, current, last_seen].
+    The previous window's count is weighted by how much of it still overlaps.
+    """
+
+    mode = "sliding_window"
+
+    def allow(self, key: str, limit: int, burst: int = 0, now: float = None) -> bool:
+        now = time.monotonic() if now is None else now
+
+        entry = self._entry(key)
+        if entry is None:
+            entry = self._state[key] = [now, 0, 0, now]
+            self._evict(now)
+        else:
+            elapsed_windows = int((now - entry[0]) // WINDOW_SECONDS)
+            if elapsed_windows == 1:
+                entry[0] += WINDOW_SECONDS
+                entry[1], entry[2] = entry[2], 0
+            elif elapsed_windows > 1:
+                entry[0] = now
+                entry[1], entry[2] = 0, 0
+            entry[3] = now
+
+        overlap = 1 - (now - entry[0]) / WINDOW_SECONDS
+        estimated = entry[1] * overlap + entry[2]
+        if estimated >= limit + burst:
+            return False
+        entry[2] += 1
+        return True
+
+
+LIMITERS = {
+    TokenBucketLimiter.mode: TokenBucketLimiter,
+    SlidingWindowLimiter.mode: SlidingWindowLimiter,
+}
+
+
+def create_limiter(mode: str, **kwargs) -> KeyedLimiter:
+    """Build a limiter by mode name"""
+    if mode not in LIMITERS:
+        raise ValueError(f"Unknown rate limit mode: {mode}. Must be one of: {list(LIMITERS)}")
+    return LIMITERS[mode](**kwargs)
+
+
+# ======================
+# BACKENDS
+# ======================
+
+
+class RateLimitBackend(ABC):
+    """Interface for rate-limit storage shared by check_rate_limit"""
+
+    name = "base"
+
+    @abstractmethod
+    async def allow(self, key: str, limit: int, burst: int = 0) -> bool:
+        """Count one request for `key`; False if it is over limit + burst"""
+
+    def stats(self) -> Dict:
+        return {"backend": self.name}
+
+
+class InMemoryRateLimitBackend(RateLimitBackend):
+    """Per-process limiter. Limits are multiplied by the number of workers."""
+
+    name = "memory"
+
+    def __init__(self, mode: str, **kwargs):
+        self.limiter = create_limiter(mode, **kwargs)
+
+    async def allow(self, key: str, limit: int, burst: int = 0) -> bool:
+        return self.limiter.allow(key, limit, burst)
+
+    def stats(self) -> Dict:
+        return {"backend": self.name, **self.limiter.stats()}
+
+
+class PostgresRateLimitBackend(RateLimitBackend):
+    """
+    Sliding window counter shared by all workers and nodes through Postgres.
+
+    Each check is one atomic conditional upsert on rate_limit_counters
+    (see migrations/add_rate_limit_counters.sql): the current window's
+    counter is only incremented while the weighted estimate is under the
+    limit, so rejected requests do not consume quota. If the database is
+    unreachable the check fails open rather than blocking chat traffic.
+    """
+
+    name = "postgres"
+
+    CLEANUP_INTERVAL = WINDOW_SECONDS
+
+    def __init__(self):
+        self.allowed = 0
+        self.rejected = 0
+        self.errors = 0
+        self._last_cleanup = 0.0
+
+    async def allow(self, key: str, limit: int, burst: int = 0) -> bool:
+        now = time.time()
+        window_start = int(now // WINDOW_SECONDS * WINDOW_SECONDS)
+        overlap = 1 - (now - window_start) / WINDOW_SECONDS
+
+        try:
+            db_pool = get_db_pool()
+            async with db_pool.acquire() as conn:
+                count = await conn.fetchval(
+                    """
+                    WITH prev AS (
+                        SELECT COALESCE(MAX(count), 0) * $3::float8 AS weighted
+                        FROM rate_limit_counters
+                        WHERE key = $1 AND window_start = $2::bigint - $5::bigint
+                    )
+                    INSERT INTO rate_limit_counters AS r (key, window_start, count)
+                    SELECT $1, $2, 1 FROM prev WHERE prev.weighted < $4::int
+                    ON CONFLICT (key, window_start) DO UPDATE
+                    SET count = r.count + 1
+                    WHERE r.count + (SELECT weighted FROM prev) < $4
+                    RETURNING r.count
+                """,
+                    key,
+                    window_start,
+                    overlap,
+                    limit + burst,
+                    int(WINDOW_SECONDS),
+                )
+
+                if now - self._last_cleanup > self.CLEANUP_INTERVAL:
+                    self._last_cleanup = now
+                    await conn.execute(
+                        "DELETE FROM rate_limit_counters WHERE window_start < $1",
+                        window_start - 2 * int(WINDOW_SECONDS),
+                    )
+        except Exception as e:
+            self.errors += 1
+            print(f"⚠️  Rate limit backend error (failing open): {e}")
+            return True
+
+        if count is None:
+            self.rejected += 1
+            return False
+        self.allowed += 1
+        return True
+
+    def stats(self) -> Dict:
+        return {
+            "backend": self.name,
+            "allowed": self.allowed,
+            "rejected": self.rejected,
+            "errors": self.errors,
+        }
+
+
+def create_backend(name: str, mode: str, **kwargs) -> RateLimitBackend:
+    """Build a rate-limit backend by name ("memory" or "postgres")"""
+    if name == InMemoryRateLimitBackend.name:
+        return InMemoryRateLimitBackend(mode, **kwargs)
+    if name == PostgresRateLimitBackend.name:
+        return PostgresRateLimitBackend()
+    raise ValueError(f"Unknown rate limit backend: {name}. Must be one of: ['memory', 'postgres']")
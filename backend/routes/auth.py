@@ -7,7 +7,7 @@ User registration, login, and profile endpoints.
 import uuid as uuid_lib
 from fastapi import APIRouter, HTTPException, Depends
 from backend.models import RegisterRequest, LoginRequest, Token
-from backend.auth.utils import hash_password, verify_password, create_access_token
+from backend.auth.utils import hash_password_async, verify_password_async, create_access_token
 from backend.dependencies import get_current_user
 from backend.database import get_db_pool
 
@@ -19,6 +19,15 @@ async def register(req: RegisterRequest):
     """
     Register new user and automatically create client + API key
     """
+    # Validate plan
+    valid_plans = ['free', 'basic', 'pro']
+    if req.plan not in valid_plans:
+        raise HTTPException(status_code=400, detail=f"Invalid plan. Must be one of: {valid_plans}")
+    
+    # Hash password before taking a DB connection: bcrypt may queue behind
+    # other password operations, and a held connection would starve /chat
+    hashed_pwd = await hash_password_async(req.password)
+    
     db_pool = get_db_pool()
     
     async with db_pool.acquire() as conn:
@@ -30,14 +39,6 @@ async def register(req: RegisterRequest):
         if existing_user:
             raise HTTPException(status_code=400, detail="Email already registered")
         
-        # Validate plan
-        valid_plans = ['free', 'basic', 'pro']
-        if req.plan not in valid_plans:
-            raise HTTPException(status_code=400, detail=f"Invalid plan. Must be one of: {valid_plans}")
-        
-        # Hash password
-        hashed_pwd = hash_password(req.password)
-        
         # Create user
         user_id = uuid_lib.uuid4()
         user = await conn.fetchrow(
@@ -112,64 +113,57 @@ async def login(req: LoginRequest):
     """
     db_pool = get_db_pool()
     
+    # Load user, client and API key in one query, then release the
+    # connection before bcrypt runs (it may queue behind other logins)
     async with db_pool.acquire() as conn:
-        # Get user
         user = await conn.fetchrow(
-            "SELECT id, email, password_hash, role FROM users WHERE email = $1",
-            req.email
-        )
-        
-        if not user:
-            raise HTTPException(status_code=401, detail="Invalid email or password")
-        
-        # Verify password
-        if not verify_password(req.password, user["password_hash"]):
-            raise HTTPException(status_code=401, detail="Invalid email or password")
-        
-        # Get client info
-        client = await conn.fetchrow(
             """
-            SELECT c.id, c.name, c.plan, c.status
-            FROM clients c
-            JOIN user_clients uc ON c.id = uc.client_id
-            WHERE uc.user_id = $1
-        """,
-            user["id"]
-        )
-        
-        if not client:
-            raise HTTPException(status_code=404, detail="No client found for user")
-        
-        # Get API key
-        api_key_row = await conn.fetchrow(
-            """
-            SELECT key_hash FROM api_keys
-            WHERE client_id = $1 AND is_active = true
+            SELECT
+                u.id, u.email, u.password_hash, u.role,
+                c.id AS client_id, c.name AS client_name, c.plan, c.status,
+                k.key_hash
+            FROM users u
+            LEFT JOIN user_clients uc ON uc.user_id = u.id
+            LEFT JOIN clients c ON c.id = uc.client_id
+            LEFT JOIN LATERAL (
+                SELECT key_hash FROM api_keys
+                WHERE client_id = c.id AND is_active = true
+                LIMIT 1
+            ) k ON true
+            WHERE u.email = $1
             LIMIT 1
         """,
-            client["id"]
-        )
-        
-        api_key = api_key_row["key_hash"] if api_key_row else ""
-        
-        # Create JWT token
-        access_token = create_access_token(data={"sub": str(user["id"])})
-        
-        return Token(
-            access_token=access_token,
-            user={
-                "id": str(user["id"]),
-                "email": user["email"],
-                "role": user["role"],
-            },
-            client={
-                "id": str(client["id"]),
-                "name": client["name"],
-                "plan": client["plan"],
-                "status": client["status"],
-            },
-            api_key=api_key,
+            req.email
         )
+    
+    if not user:
+        raise HTTPException(status_code=401, detail="Invalid email or password")
+    
+    # Verify password (no connection held)
+    if not await verify_password_async(req.password, user["password_hash"]):
+        raise HTTPException(status_code=401, detail="Invalid email or password")
+    
+    if not user["client_id"]:
+        raise HTTPException(status_code=404, detail="No client found for user")
+    
+    # Create JWT token
+    access_token = create_access_token(data={"sub": str(user["id"])})
+    
+    return Token(
+        access_token=access_token,
+        user={
+            "id": str(user["id"]),
+            "email": user["email"],
+            "role": user["role"],
+        },
+        client={
+            "id": str(user["client_id"]),
+            "name": user["client_name"],
+            "plan": user["plan"],
+            "status": user["status"],
+        },
+        api_key=user["key_hash"] or "",
+    )
 
 
 @router.get("/me")
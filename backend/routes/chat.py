@@ -4,88 +4,242 @@ Chat Routes
 Handles chat endpoint and template message retrieval.
 """
 
-from fastapi import APIRouter, Header
+import asyncio
+import json
+from fastapi import APIRouter, Header, HTTPException, Request
+from fastapi.responses import StreamingResponse
 import uuid as uuid_lib
 from backend.models import ChatReq
 from backend.dependencies import verify_api_key, check_rate_limit
-from backend.services.chat import retrieve_context, call_ollama
+from backend.services.chat import retrieve, call_ollama, stream_ollama, session_contexts
+from backend.services.ollama import ensure_generate_available
+from backend.services.answer_cache import answer_cache, context_fingerprint, prompt_version
 from backend.services.session import (
-    get_or_create_session,
-    get_chat_history,
-    save_message,
-    get_client_prompt,
+    load_chat_turn,
+    save_chat_turn,
     get_template_message
 )
 from backend.services.usage import log_usage
+from backend.services.llm_scheduler import llm_scheduler
+from backend.services.prompt import build_prompt, estimate_tokens
+from backend.config import DEFAULT_SYSTEM_PROMPT, OLLAMA_API_MODE, SESSION_CONTEXT_CARRYOVER
 
 router = APIRouter()
 
+# How often to poll for a dropped client connection while generating
+DISCONNECT_POLL_INTERVAL = 0.5
 
-@router.post("/chat")
-async def chat(req: ChatReq, x_api_key: str = Header(...)):
+
+async def run_until_disconnected(request: Request, coro):
     """
-    Main chat endpoint with RAG and database integration
+    Run a coroutine, cancelling it if the HTTP client disconnects first.
+    Cancellation propagates into httpx, which closes the upstream connection.
+    """
+    task = asyncio.ensure_future(coro)
+    try:
+        while True:
+            done, _ = await asyncio.wait({task}, timeout=DISCONNECT_POLL_INTERVAL)
+            if done:
+                return task.result()
+            if await request.is_disconnected():
+                task.cancel()
+                raise HTTPException(status_code=499, detail="Client closed request")
+    finally:
+        if not task.done():
+            task.cancel()
+
+
+async def prepare_chat(req: ChatReq, x_api_key: str) -> dict:
+    """
+    Shared request preparation for /chat and /chat/stream:
+    auth, rate limit, session, history, retrieval and prompt assembly.
     """
     # 1. Verify API key and get client info
     client_info = await verify_api_key(x_api_key)
     client_id = client_info["client_id"]
 
     # 2. Check rate limit
-    await check_rate_limit(x_api_key, client_info["rate_limit"])
+    await check_rate_limit(x_api_key, client_info["rate_limit"], client_info["plan"])
 
-    # 3. Get or create session
-    session_id = await get_or_create_session(req.session_id, client_id)
+    # 3-5. Get or create session with its history (single round trip) while
+    # retrieving context from the vector DB (client-specific) concurrently
+    (session_id, history), retrieval = await asyncio.gather(
+        load_chat_turn(req.session_id, client_id, history_limit=5),
+        retrieve(
+            req.message,
+            client_id=str(client_id),
+            collection_version=client_info["collection_version"],
+        ),
+    )
 
-    # 4. Get chat history from database
-    history = await get_chat_history(session_id, limit=5)
+    # 6. Client-specific system prompt (loaded together with the API key)
+    client_prompt = client_info.get("system_prompt") or DEFAULT_SYSTEM_PROMPT
 
-    # 5. Retrieve context from vector DB (client-specific)
-    context = retrieve_context(req.message, client_id=str(client_id))
+    # 7-8. Build prompt within the plan's token budget (history and context
+    # are trimmed by priority, see backend/services/prompt.py)
+    built = build_prompt(
+        client_prompt,
+        history,
+        retrieval["documents"],
+        req.message,
+        client_info["plan"],
+    )
 
-    # 6. Format memory block from database history
-    memory_block = ""
-    for h in history:
-        if h["role"] == "user":
-            memory_block += f"User: {h['content']}\n"
-        elif h["role"] == "assistant":
-            memory_block += f"Assistant: {h['content']}\n\n"
+    # 9. LLM input: chat messages, or a flat prompt that continues the
+    # session's KV context when the previous turn's context is still valid
+    version = prompt_version(client_prompt)
+    if OLLAMA_API_MODE == "chat":
+        llm_input = {"messages": built["messages"]}
+    else:
+        llm_input = {"prompt": built["prompt"]}
+        carried = session_contexts.get(session_id) if SESSION_CONTEXT_CARRYOVER and history else None
+        if (
+            carried
+            and carried["prompt_version"] == version
+            and history[-1]["content"] == carried["reply"]
+            and len(carried["context"]) + estimate_tokens(built["turn_prompt"]) <= built["budget"]
+        ):
+            llm_input = {"prompt": built["turn_prompt"], "context": carried["context"]}
 
-    # 7. Load client-specific system prompt
-    client_prompt = await get_client_prompt(client_id)
+    # 10. Semantic answer cache (only for grounded turns without history)
+    cache_key = None
+    cached_reply = None
+    if not history and retrieval["ids"]:
+        cache_key = (
+            client_id,
+            retrieval["embedding"],
+            context_fingerprint(retrieval["ids"], client_info["collection_version"]),
+            version,
+        )
+        cached_reply = answer_cache.lookup(*cache_key)
 
-    # 8. Build prompt with client-specific system prompt
-    full_prompt = f"""
-{client_prompt}
+    return {
+        "client_id": client_id,
+        "plan": client_info["plan"],
+        "api_key_id": client_info["api_key_id"],
+        "session_id": session_id,
+        "llm_input": llm_input,
+        "prompt_tokens": built["tokens"],
+        "prompt_version": version,
+        "cache_key": cache_key,
+        "cached_reply": cached_reply,
+    }
 
-Conversation so far:
-{memory_block}
 
-Context:
-{context}
+async def finish_chat(turn: dict, message: str, reply: str, endpoint: str, usage: dict = None):
+    """
+    Persist both messages and the usage row once the reply is complete.
+    `usage` holds Ollama's exact token counts; estimates are used without it
+    (e.g. cached answers).
+    """
+    # Remember freshly generated answers for paraphrased questions
+    if turn["cache_key"] and not turn["cached_reply"]:
+        answer_cache.store(*turn["cache_key"], reply)
 
-User question:
-{req.message}
+    # Keep the KV context (generate mode) so the next turn can continue it
+    if SESSION_CONTEXT_CARRYOVER and usage and usage.get("context"):
+        session_contexts.set(
+            turn["session_id"],
+            {"prompt_version": turn["prompt_version"], "reply": reply, "context": usage["context"]},
+        )
 
-Answer:
-"""
+    usage = usage or {}
+    tokens_in = usage.get("prompt_eval_count") or turn["prompt_tokens"]
+    tokens_out = usage.get("eval_count") or estimate_tokens(reply)
+
+    # Save both messages in one transaction
+    await save_chat_turn(
+        turn["session_id"],
+        [("user", message, tokens_in), ("assistant", reply, tokens_out)],
+    )
 
-    # 9. Generate response
-    reply = call_ollama(full_prompt).strip()
+    # Log usage (queued, flushed in batches off the request path)
+    await log_usage(turn["client_id"], turn["api_key_id"], endpoint, tokens_in, tokens_out)
 
-    # 10. Estimate token counts (rough estimate)
-    tokens_in = len(full_prompt.split())
-    tokens_out = len(reply.split())
 
-    # 11. Save messages to database
-    await save_message(session_id, "user", req.message, tokens_in)
-    await save_message(session_id, "assistant", reply, tokens_out)
+def sse_event(data: dict, event: str = None) -> str:
+    """Format a Server-Sent Event frame"""
+    frame = f"event: {event}\n" if event else ""
+    return frame + f"data: {json.dumps(data)}\n\n"
 
-    # 12. Log usage
-    await log_usage(client_id, x_api_key, "/chat", tokens_in, tokens_out)
+
+@router.post("/chat")
+async def chat(req: ChatReq, request: Request, x_api_key: str = Header(...)):
+    """
+    Main chat endpoint with RAG and database integration
+    """
+    turn = await prepare_chat(req, x_api_key)
+
+    # Generate response (unless a cached answer fits)
+    reply = turn["cached_reply"]
+    usage = {}
+    if reply is None:
+        async def generate():
+            # Waits for a fair-queued LLM slot (429/503 when overloaded)
+            async with llm_scheduler.slot(turn["client_id"], turn["plan"]):
+                return await call_ollama(turn["llm_input"], usage)
+
+        reply = (await run_until_disconnected(request, generate())).strip()
+
+    await finish_chat(turn, req.message, reply, "/chat", usage)
 
     return {"reply": reply}
 
 
+@router.post("/chat/stream")
+async def chat_stream(req: ChatReq, x_api_key: str = Header(...)):
+    """
+    Streaming chat endpoint. Relays LLM tokens as Server-Sent Events:
+
+        data: {"token": "..."}            one per generated fragment
+        event: done / data: {"reply": ...}  after the answer is stored
+        event: error / data: {"detail": ...} if generation fails (with
+                                             "status" if the LLM queue timed out
+                                             or no model server is available, and
+                                             "retry_after" in seconds)
+    """
+    turn = await prepare_chat(req, x_api_key)
+    if turn["cached_reply"] is None:
+        # Refuse before the stream starts when the LLM queue is already full
+        # or every model server is down
+        llm_scheduler.admit(turn["client_id"], turn["plan"])
+        ensure_generate_available()
+
+    async def event_stream():
+        usage = {}
+        if turn["cached_reply"] is not None:
+            reply = turn["cached_reply"]
+            yield sse_event({"token": reply})
+        else:
+            parts = []
+            try:
+                async with llm_scheduler.slot(turn["client_id"], turn["plan"]):
+                    async for token in stream_ollama(turn["llm_input"], usage):
+                        parts.append(token)
+                        yield sse_event({"token": token})
+            except HTTPException as e:
+                error = {"detail": e.detail, "status": e.status_code}
+                if e.headers and "Retry-After" in e.headers:
+                    error["retry_after"] = int(e.headers["Retry-After"])
+                yield sse_event(error, event="error")
+                return
+            except Exception as e:
+                print(f"Streaming error: {e}")
+                yield sse_event({"detail": "Generation failed"}, event="error")
+                return
+            reply = "".join(parts).strip()
+
+        # Stream finished: persist like /chat does
+        await finish_chat(turn, req.message, reply, "/chat/stream", usage)
+        yield sse_event({"reply": reply}, event="done")
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
 @router.get("/template_message")
 async def get_template(x_api_key: str = Header(...)):
     """
@@ -4,8 +4,18 @@ Health Check Routes
 Status and health monitoring endpoints.
 """
 
-from fastapi import APIRouter
+from fastapi import APIRouter, Depends
 from backend.database import get_db_pool
+from backend.dependencies import api_key_cache, rate_limit_backend, verify_metrics_token
+from backend.services.usage import usage_logger
+from backend.auth.utils import password_pool_stats
+from backend.services.vector_store import collection_registry
+from backend.services.embedding_cache import embedding_cache
+from backend.services.answer_cache import answer_cache
+from backend.services.chat import session_contexts
+from backend.services.ingest_worker import ingest_worker
+from backend.services.llm_scheduler import llm_scheduler
+from backend.services.ollama import generate_pool, embed_pool
 
 router = APIRouter()
 
@@ -21,3 +31,25 @@ async def health():
 async def root():
     """API root endpoint"""
     return {"message": "ACM AI Chatbot API", "version": "2.0"}
+
+
+@router.get("/metrics", dependencies=[Depends(verify_metrics_token)])
+async def metrics():
+    """
+    In-process cache and queue metrics. Clients and backends appear under
+    opaque labels (hashed client ids, backend positions), never their ids
+    or URLs.
+    """
+    return {
+        "api_key_cache": api_key_cache.stats(),
+        "usage_logger": usage_logger.stats(),
+        "rate_limiter": rate_limit_backend.stats(),
+        "password_pool": password_pool_stats(),
+        "collection_registry": collection_registry.stats(),
+        "embedding_cache": embedding_cache.stats(),
+        "answer_cache": answer_cache.stats(),
+        "session_contexts": session_contexts.stats(),
+        "ingest_worker": ingest_worker.stats(),
+        "llm_scheduler": llm_scheduler.stats(),
+        "ollama_backends": {"generate": generate_pool.stats(), "embed": embed_pool.stats()},
+    }
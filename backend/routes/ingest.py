@@ -0,0 +1,200 @@
+"""
+Ingest Routes
+
+Document upload and background ingestion jobs.
+
+The x-api-key header selects the client, but that key is public (it ships
+in the chat widget), so every endpoint also requires a JWT
+(Authorization: Bearer) of a user who belongs to that client.
+"""
+
+import uuid as uuid_lib
+from fastapi import APIRouter, Depends, Header, HTTPException
+from backend.models import IngestRequest
+from backend.dependencies import get_current_user, verify_api_key, verify_client_member, check_rate_limit
+from backend.database import get_db_pool
+from backend.services.ingest_worker import ingest_worker
+from backend.config import INGEST_MAX_DOCUMENTS
+
+router = APIRouter(prefix="/ingest")
+
+# Retry-After (seconds) while the client's previous job is still pending or running
+ACTIVE_JOB_RETRY_AFTER = 60
+
+
+async def authorize(x_api_key: str, current_user: dict) -> dict:
+    """Client info of the API key, if the signed-in user is a member of that client"""
+    client_info = await verify_api_key(x_api_key)
+    await verify_client_member(current_user, client_info["client_id"])
+    return client_info
+
+
+def ensure_queue_space():
+    """503 before anything is written when the worker queue is full"""
+    if ingest_worker.full():
+        raise HTTPException(
+            status_code=503,
+            detail="Ingest queue is full, please retry later",
+            headers={"Retry-After": str(ACTIVE_JOB_RETRY_AFTER)},
+        )
+
+
+async def create_job(conn, client_id, source_filter: str = None) -> dict:
+    """
+    Insert a pending ingest job (must run inside a transaction). The caller
+    hands it to the worker pool (ingest_worker.submit) once the row is
+    committed. The job covers documents whose source is exactly
+    `source_filter`. A client has at most one pending or running job;
+    another one is refused with 429.
+    """
+    # Serialize job creation per client until the transaction ends
+    await conn.execute("SELECT pg_advisory_xact_lock(hashtext($1))", f"ingest_jobs:{client_id}")
+    active = await conn.fetchrow(
+        """
+        SELECT id, status FROM ingest_jobs
+        WHERE client_id = $1 AND status IN ('pending', 'running')
+        LIMIT 1
+    """,
+        client_id,
+    )
+    if active:
+        raise HTTPException(
+            status_code=429,
+            detail=f"Ingest job {active['id']} is already {active['status']} for this client",
+            headers={"Retry-After": str(ACTIVE_JOB_RETRY_AFTER)},
+        )
+
+    job = await conn.fetchrow(
+        """
+        INSERT INTO ingest_jobs (client_id, source_filter, source_exact, status)
+        VALUES ($1, $2, true, 'pending')
+        RETURNING id, status, created_at
+    """,
+        client_id,
+        source_filter,
+    )
+    return {"job_id": str(job["id"]), "status": job["status"], "created_at": job["created_at"]}
+
+
+@router.post("/documents", status_code=202)
+async def upload_documents(
+    req: IngestRequest, x_api_key: str = Header(...), current_user: dict = Depends(get_current_user)
+):
+    """
+    Upsert documents (keyed by source + title) and queue an ingest job for them.
+    Returns immediately; poll GET /ingest/jobs/{job_id} for progress.
+    """
+    client_info = await authorize(x_api_key, current_user)
+    await check_rate_limit(x_api_key, client_info["rate_limit"], client_info["plan"])
+
+    source = req.source.strip()
+    if not source:
+        raise HTTPException(status_code=400, detail="source is required")
+    if len(req.documents) > INGEST_MAX_DOCUMENTS:
+        raise HTTPException(
+            status_code=413,
+            detail=f"Too many documents. Maximum per request: {INGEST_MAX_DOCUMENTS}",
+        )
+
+    # Last occurrence wins for duplicate titles (same rule as upload_documents.py)
+    documents = {}
+    for doc in req.documents:
+        title, content = doc.title.strip(), doc.content.strip()
+        if title and content:
+            documents[title] = content
+    if not documents:
+        raise HTTPException(status_code=400, detail="No documents with both title and content")
+    ensure_queue_space()
+
+    db_pool = get_db_pool()
+    async with db_pool.acquire() as conn:
+        async with conn.transaction():
+            # Job first: a refused job (429) leaves the documents untouched
+            job = await create_job(conn, client_info["client_id"], source)
+            merged = await conn.fetch(
+                """
+                INSERT INTO documents (id, client_id, title, source, content)
+                SELECT gen_random_uuid(), $1, t.title, $2, t.content
+                FROM unnest($3::text[], $4::text[]) AS t(title, content)
+                ON CONFLICT (client_id, source, title) DO UPDATE
+                SET content = EXCLUDED.content
+                WHERE documents.content IS DISTINCT FROM EXCLUDED.content
+                RETURNING (xmax = 0) AS inserted
+            """,
+                client_info["client_id"],
+                source,
+                list(documents),
+                list(documents.values()),
+            )
+    ingest_worker.submit(job["job_id"], client_info["client_id"])
+
+    inserted = sum(1 for r in merged if r["inserted"])
+    return {
+        **job,
+        "documents": {
+            "received": len(documents),
+            "inserted": inserted,
+            "updated": len(merged) - inserted,
+            "unchanged": len(documents) - len(merged),
+        },
+    }
+
+
+@router.post("/jobs", status_code=202)
+async def start_ingest(x_api_key: str = Header(...), current_user: dict = Depends(get_current_user)):
+    """Queue an ingest job over all of the client's documents (unchanged ones are skipped)"""
+    client_info = await authorize(x_api_key, current_user)
+    await check_rate_limit(x_api_key, client_info["rate_limit"], client_info["plan"])
+    ensure_queue_space()
+
+    db_pool = get_db_pool()
+    async with db_pool.acquire() as conn:
+        async with conn.transaction():
+            job = await create_job(conn, client_info["client_id"])
+    ingest_worker.submit(job["job_id"], client_info["client_id"])
+    return job
+
+
+@router.get("/jobs/{job_id}")
+async def get_job(job_id: str, x_api_key: str = Header(...), current_user: dict = Depends(get_current_user)):
+    """Job status and progress"""
+    client_info = await authorize(x_api_key, current_user)
+
+    try:
+        job_uuid = uuid_lib.UUID(job_id)
+    except ValueError:
+        raise HTTPException(status_code=404, detail="Job not found")
+
+    db_pool = get_db_pool()
+    async with db_pool.acquire() as conn:
+        job = await conn.fetchrow(
+            """
+            SELECT id, status, source_filter, total_documents, processed_documents,
+                   chunks_embedded, error, created_at, started_at, updated_at, finished_at
+            FROM ingest_jobs
+            WHERE id = $1 AND client_id = $2
+        """,
+            job_uuid,
+            client_info["client_id"],
+        )
+
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+
+    total = job["total_documents"]
+    return {
+        "job_id": str(job["id"]),
+        "status": job["status"],
+        "source": job["source_filter"],
+        "progress": {
+            "total_documents": total,
+            "processed_documents": job["processed_documents"],
+            "chunks_embedded": job["chunks_embedded"],
+            "percent": round(100 * job["processed_documents"] / total, 1) if total else 0.0,
+        },
+        "error": job["error"],
+        "created_at": job["created_at"],
+        "started_at": job["started_at"],
+        "updated_at": job["updated_at"],
+        "finished_at": job["finished_at"],
+    }
@@ -0,0 +1,180 @@
+"""
+Semantic Answer Cache Service
+
+Per-client cache of generated answers, matched by query-embedding cosine
+similarity so paraphrased FAQ questions skip LLM generation.
+
+An answer is only reused when:
+- the new question's embedding is at least `threshold` similar,
+- the retrieved context fingerprint is the same (same chunks, same
+  collection_version, so re-ingestion invalidates automatically),
+- the prompt version is the same (system prompt unchanged),
+- the entry is younger than `ttl`.
+Turns with conversation history are never cached.
+
+A client's entries live in one float32 matrix of unit vectors, so a lookup
+is a single matrix-vector product instead of a Python loop on the event loop.
+"""
+
+import hashlib
+import time
+from typing import Iterable, Optional
+
+import numpy as np
+
+from backend.cache import TTLCache
+from backend.config import (
+    ANSWER_CACHE_ENABLED,
+    ANSWER_CACHE_THRESHOLD,
+    ANSWER_CACHE_TTL,
+    ANSWER_CACHE_MAX_PER_CLIENT,
+    ANSWER_CACHE_MAX_CLIENTS,
+)
+
+
+def fingerprint(*parts: Iterable) -> str:
+    """Stable short hash of the given values"""
+    h = hashlib.sha1()
+    for part in parts:
+        h.update(str(part).encode("utf-8"))
+        h.update(b"\0")
+    return h.hexdigest()
+
+
+def context_fingerprint(chunk_ids: list, collection_version: int) -> str:
+    """Fingerprint of the retrieved chunk set (order-insensitive)"""
+    return fingerprint(collection_version, *sorted(chunk_ids))
+
+
+def prompt_version(system_prompt: str) -> str:
+    """Fingerprint of the client's system prompt"""
+    return fingerprint(system_prompt)
+
+
+def _unit(vector: list) -> np.ndarray:
+    unit = np.asarray(vector, dtype=np.float32)
+    norm = float(np.linalg.norm(unit))
+    return unit / norm if norm else unit
+
+
+class _ClientAnswers:
+    """
+    One client's answers: unit embeddings as rows of a matrix plus parallel
+    answer / key / expiry slots. Grows by doubling up to `size`, then the
+    oldest slot is overwritten.
+    """
+
+    def __init__(self, size: int, dim: int):
+        self.size = size
+        capacity = min(size, 8)
+        self.vectors = np.zeros((capacity, dim), dtype=np.float32)
+        self.expires = np.zeros(capacity)
+        self.answers: list = []
+        self.keys: list = []  # (context_fp, prompt_ver) per slot
+        self.oldest = 0
+
+    def add(self, vector: np.ndarray, answer: str, key: tuple, expires_at: float):
+        count = len(self.answers)
+        if count < self.size:
+            if count == len(self.vectors):
+                capacity = min(self.size, count * 2)
+                self.vectors = np.resize(self.vectors, (capacity, self.vectors.shape[1]))
+                self.expires = np.resize(self.expires, capacity)
+            slot = count
+            self.answers.append(answer)
+            self.keys.append(key)
+        else:
+            slot = self.oldest
+            self.oldest = (slot + 1) % self.size
+            self.answers[slot] = answer
+            self.keys[slot] = key
+        self.vectors[slot] = vector
+        self.expires[slot] = expires_at
+
+    def best(self, query: np.ndarray, key: tuple, now: float):
+        """(score, answer) of the most similar live entry with `key`, or None"""
+        count = len(self.answers)
+        live = self.expires[:count] > now
+        live &= np.fromiter((k == key for k in self.keys), dtype=bool, count=count)
+        if not live.any():
+            return None
+        scores = self.vectors[:count] @ query
+        scores[~live] = -np.inf
+        slot = int(np.argmax(scores))
+        return float(scores[slot]), self.answers[slot]
+
+
+class SemanticAnswerCache:
+    """Bounded per-client semantic cache"""
+
+    def __init__(
+        self,
+        threshold: float = ANSWER_CACHE_THRESHOLD,
+        ttl: float = ANSWER_CACHE_TTL,
+        max_per_client: int = ANSWER_CACHE_MAX_PER_CLIENT,
+        max_clients: int = ANSWER_CACHE_MAX_CLIENTS,
+        enabled: bool = ANSWER_CACHE_ENABLED,
+    ):
+        self.enabled = enabled
+        self.threshold = threshold
+        self.ttl = ttl
+        self.max_per_client = max_per_client
+        # client_id -> _ClientAnswers
+        self._clients = TTLCache(maxsize=max_clients)
+        self.hits = 0
+        self.misses = 0
+
+    def lookup(
+        self, client_id, embedding: list, context_fp: str, prompt_ver: str
+    ) -> Optional[str]:
+        """Return a cached answer for a semantically equivalent question, if any"""
+        if not self.enabled or embedding is None:
+            return None
+
+        entries = self._clients.get(str(client_id))
+        query = _unit(embedding)
+        best = None
+        if entries is not None and entries.vectors.shape[1] == len(query):
+            best = entries.best(query, (context_fp, prompt_ver), time.monotonic())
+
+        if best is not None and best[0] >= self.threshold:
+            self.hits += 1
+            return best[1]
+
+        self.misses += 1
+        return None
+
+    def store(
+        self, client_id, embedding: list, context_fp: str, prompt_ver: str, answer: str
+    ):
+        """Remember an answer; once full, the oldest entry is overwritten"""
+        if not self.enabled or embedding is None or not answer:
+            return
+
+        key = str(client_id)
+        vector = _unit(embedding)
+        entries = self._clients.get(key)
+        if entries is None or entries.vectors.shape[1] != len(vector):
+            # New client, or the embedding model (and its dimension) changed
+            entries = _ClientAnswers(self.max_per_client, len(vector))
+            self._clients.set(key, entries)
+        entries.add(vector, answer, (context_fp, prompt_ver), time.monotonic() + self.ttl)
+
+    def invalidate_client(self, client_id):
+        """Drop all answers of a client, e.g. after re-ingestion or a prompt change"""
+        self._clients.invalidate(str(client_id))
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "enabled": self.enabled,
+            "clients": len(self._clients),
+            "threshold": self.threshold,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+        }
+
+
+# Global semantic answer cache
+answer_cache = SemanticAnswerCache()
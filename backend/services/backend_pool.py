@@ -0,0 +1,162 @@
+"""
+Backend Pool Service
+
+Load balancing and passive health checks over several Ollama servers.
+
+Each request goes to the healthy backend with the fewest outstanding
+requests (ties rotate, so idle backends share the load evenly). Health is
+judged from real traffic only: connection errors, timeouts and 5xx
+responses count as failures. After `failure_threshold` consecutive
+failures a backend's circuit opens and it gets no traffic for `cooldown`
+seconds. Then a single probe request is let through (half-open): success
+closes the circuit, failure opens it again. When no backend can take a
+request, NoHealthyBackend says how long until one might (Retry-After).
+"""
+
+import itertools
+import math
+import time
+from contextlib import asynccontextmanager
+from typing import List
+import httpx
+
+
+class NoHealthyBackend(RuntimeError):
+    """Every backend in the pool has an open circuit (or was already tried)"""
+
+    def __init__(self, message: str, retry_after: int = 1):
+        super().__init__(message)
+        self.retry_after = retry_after  # Seconds until a circuit half-opens
+
+
+def is_backend_failure(error: Exception) -> bool:
+    """Errors that say the backend is unhealthy (not that the request was bad)"""
+    if isinstance(error, httpx.HTTPStatusError):
+        return error.response.status_code >= 500
+    return isinstance(error, httpx.TransportError)
+
+
+class Backend:
+    """One Ollama server and its circuit state"""
+
+    def __init__(self, url: str):
+        self.url = url.rstrip("/")
+        self.outstanding = 0
+        self.consecutive_failures = 0
+        self.open_until = 0.0  # monotonic time; 0 = circuit closed
+        self.probing = False
+
+        # Metrics
+        self.requests = 0
+        self.failures = 0
+
+    @property
+    def state(self) -> str:
+        if not self.open_until:
+            return "closed"
+        return "open" if time.monotonic() < self.open_until else "half_open"
+
+    def stats(self) -> dict:
+        return {
+            "state": self.state,
+            "outstanding": self.outstanding,
+            "requests": self.requests,
+            "failures": self.failures,
+            "consecutive_failures": self.consecutive_failures,
+        }
+
+
+class BackendPool:
+    """Least-outstanding-requests pool with a circuit breaker per backend"""
+
+    def __init__(self, name: str, urls: List[str], failure_threshold: int = 3, cooldown: float = 30):
+        if not urls:
+            raise ValueError(f"{name} backend pool needs at least one URL")
+        self.name = name
+        self.backends = [Backend(url) for url in urls]
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self._rotation = itertools.count()
+
+    def __len__(self) -> int:
+        return len(self.backends)
+
+    def pick(self, exclude=()) -> Backend:
+        """Choose the backend for the next request (raises NoHealthyBackend)"""
+        offset = next(self._rotation) % len(self.backends)
+        rotated = self.backends[offset:] + self.backends[:offset]
+        candidates = []
+        for backend in rotated:
+            if backend in exclude:
+                continue
+            state = backend.state
+            if state == "open" or (state == "half_open" and backend.probing):
+                continue
+            candidates.append(backend)
+        if not candidates:
+            raise NoHealthyBackend(f"No healthy {self.name} backend available", self.retry_after())
+
+        backend = min(candidates, key=lambda b: b.outstanding)
+        if backend.state == "half_open":
+            backend.probing = True  # Only this request probes the backend
+        return backend
+
+    def retry_after(self) -> int:
+        """Whole seconds until the first open circuit half-opens (at least 1)"""
+        now = time.monotonic()
+        waits = [b.open_until - now for b in self.backends if b.open_until > now]
+        return max(1, math.ceil(min(waits))) if waits else 1
+
+    def available(self) -> bool:
+        """True if some backend would accept a request now (no side effects)"""
+        return any(
+            b.state == "closed" or (b.state == "half_open" and not b.probing) for b in self.backends
+        )
+
+    def record_success(self, backend: Backend):
+        if backend.open_until:
+            print(f"🔌 {self.name} backend {backend.url} recovered")
+        backend.consecutive_failures = 0
+        backend.open_until = 0.0
+        backend.probing = False
+
+    def record_failure(self, backend: Backend, error: Exception):
+        backend.failures += 1
+        backend.consecutive_failures += 1
+        if backend.probing or backend.consecutive_failures >= self.failure_threshold:
+            backend.open_until = time.monotonic() + self.cooldown
+            print(
+                f"⚠️  {self.name} backend {backend.url} circuit open for {self.cooldown:.0f}s: "
+                f"{type(error).__name__}: {error}"
+            )
+        backend.probing = False
+
+    @asynccontextmanager
+    async def request(self, exclude=()):
+        """
+        Pick a backend and track the request made inside the block.
+        The outcome updates the backend's health; a cancelled request
+        (e.g. client disconnect) counts as neither success nor failure.
+        """
+        backend = self.pick(exclude)
+        backend.outstanding += 1
+        backend.requests += 1
+        try:
+            yield backend
+        except Exception as e:
+            if is_backend_failure(e):
+                self.record_failure(backend, e)
+            else:
+                self.record_success(backend)
+            raise
+        except BaseException:
+            backend.probing = False
+            raise
+        else:
+            self.record_success(backend)
+        finally:
+            backend.outstanding -= 1
+
+    def stats(self) -> dict:
+        """Per-backend state, keyed by position in the URL list (URLs stay internal)"""
+        return {str(i): backend.stats() for i, backend in enumerate(self.backends)}
@@ -4,12 +4,28 @@ Chat Service
 Handles RAG (Retrieval Augmented Generation), embeddings, and LLM calls.
 """
 
-import requests
-import chromadb
-from backend.config import OLLAMA_URL, MODEL, VECTOR_DB_DIR
-
-# Initialize ChromaDB client
-chroma_client = chromadb.PersistentClient(path=VECTOR_DB_DIR)
+import asyncio
+from backend.config import (
+    RETRIEVAL_TOP_K,
+    HYBRID_SEARCH_ENABLED,
+    HYBRID_CANDIDATES,
+    HYBRID_RRF_K,
+    RERANK_ENABLED,
+    RERANK_CANDIDATES,
+    MMR_LAMBDA,
+    CONTEXT_TOKEN_BUDGET,
+    SESSION_CONTEXT_CACHE_SIZE,
+    SESSION_CONTEXT_TTL,
+)
+from backend.cache import TTLCache
+from backend.services import ollama, lexical_search, rerank
+from backend.services.prompt import estimate_tokens
+from backend.services.embedding_cache import embedding_cache
+from backend.services.vector_store import (
+    chroma_client,
+    collection_registry,
+    collection_name_for,
+)
 
 # Try to get or create default collection
 try:
@@ -18,82 +34,204 @@ except Exception as e:
     print(f"Warning: Could not create default collection: {e}")
     collection = None
 
+# Ollama KV context returned for each session's last generated turn
+# (session_id -> (prompt_version, context)), used in generate mode with
+# SESSION_CONTEXT_CARRYOVER so the next turn only sends the new part
+session_contexts = TTLCache(maxsize=SESSION_CONTEXT_CACHE_SIZE, ttl=SESSION_CONTEXT_TTL)
+
+
+async def embed(text: str) -> list:
+    """Get embedding from Ollama using nomic-embed-text model (cached)"""
+    return await embedding_cache.get_or_embed(text, ollama.embed)
+
+
+async def query_client_collection(
+    client_id: str, collection_version: int, q_emb: list, k: int, include: list = None
+):
+    """
+    Query a client's collection through the handle registry.
+    A stale handle (collection recreated by ingest) is dropped and looked up once more.
+    """
+    for attempt in range(2):
+        client_collection = await collection_registry.get(client_id, collection_version)
+        try:
+            # ChromaDB is synchronous, keep it off the event loop
+            return await asyncio.to_thread(
+                client_collection.query,
+                query_embeddings=[q_emb],
+                n_results=k,
+                include=include or ["documents", "distances"],
+            )
+        except Exception:
+            collection_registry.invalidate(client_id)
+            if attempt:
+                raise
+
 
-def embed(text: str) -> list:
-    """Get embedding from Ollama using nomic-embed-text model"""
-    r = requests.post(
-        "http://localhost:11434/api/embeddings",
-        json={"model": "nomic-embed-text", "prompt": text},
-        timeout=30,
+async def fetch_embeddings(client_id: str, collection_version: int, ids: list) -> dict:
+    """Stored embeddings of the given chunk ids (id -> vector); empty on error"""
+    try:
+        client_collection = await collection_registry.get(client_id, collection_version)
+        result = await asyncio.to_thread(
+            client_collection.get, ids=ids, include=["embeddings"]
+        )
+    except Exception as e:
+        print(f"⚠️  Could not load candidate embeddings: {e}")
+        return {}
+    embeddings = result.get("embeddings")
+    if embeddings is None:
+        return {}
+    return dict(zip(result["ids"], embeddings))
+
+
+async def vector_search(
+    q_emb: list,
+    client_id: str = None,
+    k: int = RETRIEVAL_TOP_K,
+    collection_version: int = 0,
+    include: list = None,
+) -> dict:
+    """Dense retrieval from the client's collection (or the default one)"""
+    if client_id:
+        return await query_client_collection(client_id, collection_version, q_emb, k, include)
+    return await asyncio.to_thread(
+        collection.query,
+        query_embeddings=[q_emb],
+        n_results=k,
+        include=include or ["documents", "distances"],
     )
-    r.raise_for_status()
-    return r.json()["embedding"]
 
 
-def retrieve_context(query: str, client_id: str = None, k: int = 8) -> str:
+def _first(result: dict, field: str) -> list:
+    """First query's values of a Chroma query result field"""
+    values = result.get(field)
+    if values is None or len(values) == 0 or values[0] is None:
+        return []
+    return list(values[0])
+
+
+async def retrieve(
+    query: str, client_id: str = None, k: int = RETRIEVAL_TOP_K, collection_version: int = 0
+) -> dict:
     """
     Retrieve relevant context from vector DB using client-specific collection.
+    With HYBRID_SEARCH_ENABLED, client retrieval also runs a Postgres
+    full-text search concurrently and fuses both rankings with RRF.
+    With RERANK_ENABLED, more candidates are fetched and the final chunks are
+    chosen by MMR within CONTEXT_TOKEN_BUDGET (see rerank.py).
     
     Args:
         query: User's question
         client_id: Client UUID for client-specific collection
         k: Number of results to retrieve
+        collection_version: Client's collection version stamp (invalidates cached handles)
         
     Returns:
-        Context string joined from retrieved documents
+        Dict with "context" (joined documents), "documents", "ids" and the
+        query "embedding" (None if embedding failed)
     """
+    retrieval = {"context": "", "documents": [], "ids": [], "embedding": None}
+    hybrid = bool(client_id) and HYBRID_SEARCH_ENABLED
+    candidates = k
+    if hybrid:
+        candidates = max(candidates, HYBRID_CANDIDATES)
+    if RERANK_ENABLED:
+        candidates = max(candidates, RERANK_CANDIDATES)
+    include = ["documents", "distances"] + (["embeddings"] if RERANK_ENABLED else [])
+    
+    async def dense():
+        q_emb = await embed(query)
+        retrieval["embedding"] = q_emb
+        try:
+            return await vector_search(q_emb, client_id, candidates, collection_version, include)
+        except Exception as e:
+            # Collection doesn't exist yet, return empty
+            print(f"\n❌ Collection error for {collection_name_for(client_id)}: {e}")
+            return {}
+    
+    async def lexical():
+        if not hybrid:
+            return []
+        return await lexical_search.search(client_id, query, candidates)
+    
     try:
-        q_emb = embed(query)
-        
-        # Use client-specific collection if client_id provided
-        if client_id:
-            collection_name = f"client_{client_id.replace('-', '_')}"
-            try:
-                client_collection = chroma_client.get_collection(name=collection_name)
-                result = client_collection.query(
-                    query_embeddings=[q_emb],
-                    n_results=k,
-                )
-                # Debug: print retrieved context
-                if result and result.get("documents"):
-                    print(f"\n🔍 Context retrieved for query: '{query}'")
-                    print(f"   Found {len(result['documents'][0])} documents")
-                    for i, doc in enumerate(result['documents'][0][:3]):
-                        print(f"   {i+1}. {doc[:100]}...")
-                else:
-                    print(f"\n⚠️  No context found for query: '{query}'")
-            except Exception as e:
-                # Collection doesn't exist yet, return empty
-                print(f"\n❌ Collection error for {collection_name}: {e}")
-                return ""
-        else:
-            # Fallback to default collection
-            result = collection.query(
-                query_embeddings=[q_emb],
-                n_results=k,
-            )
-        
-        docs_list = result.get("documents")
-        if not docs_list:
-            docs_list = [[]]
-        first_docs = (
-            docs_list[0] if isinstance(docs_list, list) and len(docs_list) > 0 else []
-        )
-        context = "\n\n".join(first_docs) if first_docs else ""
-        print(f"   Context length: {len(context)} chars\n")
-        return context
+        result, lexical_hits = await asyncio.gather(dense(), lexical())
     except Exception as e:
         print(f"Context retrieval error: {e}")
-        return ""
-
-
-def call_ollama(prompt: str) -> str:
-    """Call Ollama LLM with the given prompt"""
-    payload = {
-        "model": MODEL,
-        "prompt": prompt,
-        "stream": False,
-    }
-    r = requests.post(OLLAMA_URL, json=payload, timeout=120)
-    r.raise_for_status()
-    return r.json()["response"]
+        return retrieval
+    
+    dense_ids = _first(result, "ids")
+    content_by_id = dict(zip(dense_ids, _first(result, "documents")))
+    embedding_by_id = dict(zip(dense_ids, _first(result, "embeddings")))
+    
+    if hybrid:
+        for hit in lexical_hits:
+            content_by_id.setdefault(hit["id"], hit["content"])
+        fused = lexical_search.reciprocal_rank_fusion(
+            [dense_ids, [hit["id"] for hit in lexical_hits]], HYBRID_RRF_K
+        )
+        ids = [item_id for item_id, _ in fused]
+        relevance = [score for _, score in fused]
+    else:
+        ids = dense_ids
+        # Cosine distance -> similarity
+        relevance = [1.0 - d for d in _first(result, "distances")]
+    documents = [content_by_id[i] for i in ids]
+    
+    if RERANK_ENABLED and ids:
+        missing = [i for i in ids if i not in embedding_by_id]
+        if missing and client_id:
+            embedding_by_id.update(await fetch_embeddings(client_id, collection_version, missing))
+        order = rerank.mmr_select(
+            relevance,
+            [embedding_by_id.get(i) for i in ids],
+            [estimate_tokens(doc) for doc in documents],
+            k,
+            CONTEXT_TOKEN_BUDGET,
+            MMR_LAMBDA,
+        )
+        ids = [ids[i] for i in order]
+        documents = [documents[i] for i in order]
+    else:
+        ids, documents = ids[:k], documents[:k]
+    
+    # Debug: print retrieved context
+    if documents:
+        print(f"\n🔍 Context retrieved for query: '{query}'")
+        print(f"   Found {len(documents)} documents ({len(dense_ids)} vector, {len(lexical_hits)} keyword candidates)")
+        for i, doc in enumerate(documents[:3]):
+            print(f"   {i+1}. {doc[:100]}...")
+    else:
+        print(f"\n⚠️  No context found for query: '{query}'")
+    
+    retrieval["ids"] = ids
+    retrieval["documents"] = documents
+    retrieval["context"] = "\n\n".join(documents)
+    print(f"   Context length: {len(retrieval['context'])} chars\n")
+    return retrieval
+
+
+async def retrieve_context(
+    query: str, client_id: str = None, k: int = RETRIEVAL_TOP_K, collection_version: int = 0
+) -> str:
+    """Retrieve relevant context as a single string (see retrieve())"""
+    retrieval = await retrieve(query, client_id, k, collection_version)
+    return retrieval["context"]
+
+
+async def call_ollama(llm_input: dict, usage: dict = None) -> str:
+    """
+    Call Ollama LLM (token counts are written to `usage`).
+    `llm_input` holds "messages" (/api/chat) or "prompt" plus an optional
+    KV "context" (/api/generate), as built by prepare_chat.
+    """
+    if "messages" in llm_input:
+        return await ollama.chat(llm_input["messages"], usage)
+    return await ollama.generate(llm_input["prompt"], usage, llm_input.get("context"))
+
+
+def stream_ollama(llm_input: dict, usage: dict = None):
+    """Stream Ollama LLM tokens (see call_ollama())"""
+    if "messages" in llm_input:
+        return ollama.stream_chat(llm_input["messages"], usage)
+    return ollama.stream_generate(llm_input["prompt"], usage, llm_input.get("context"))
@@ -0,0 +1,190 @@
+"""
+Embedding Cache Service
+
+Normalized-text -> query embedding cache, so repeated questions skip Ollama.
+
+Two tiers:
+- memory: LRU of compact float32 arrays
+- disk (optional): SQLite file that survives restarts, capped at
+  `max_rows` (least recently used rows are pruned)
+
+Keys include the embedding model name, so changing the model never returns
+vectors from the old one.
+"""
+
+import asyncio
+import hashlib
+import re
+import sqlite3
+import threading
+import time
+import unicodedata
+from array import array
+from typing import Awaitable, Callable, Optional
+from backend.cache import TTLCache
+from backend.config import EMBED_MODEL, EMBED_CACHE_SIZE, EMBED_CACHE_PATH, EMBED_CACHE_MAX_ROWS
+
+_WHITESPACE = re.compile(r"\s+")
+
+# Prune down to this fraction of max_rows, so pruning runs once per batch
+# of inserts instead of on every insert past the cap
+PRUNE_TO = 0.9
+
+
+def normalize_text(text: str) -> str:
+    """Case/whitespace/unicode-insensitive form used as the cache key"""
+    text = unicodedata.normalize("NFKC", text).lower()
+    return _WHITESPACE.sub(" ", text).strip()
+
+
+class EmbeddingCache:
+    """Two-tier (memory LRU + optional SQLite) embedding cache"""
+
+    def __init__(self, model: str, maxsize: int, path: Optional[str] = None, max_rows: int = 50000):
+        self.model = model
+        self.memory = TTLCache(maxsize=maxsize)
+        self.path = path
+        self.max_rows = max_rows
+        self._db = None
+        self._db_lock = threading.Lock()
+        self._disk_rows = 0
+
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.disk_evictions = 0
+
+    def _key(self, text: str) -> str:
+        normalized = normalize_text(text)
+        return hashlib.sha256(f"{self.model}\0{normalized}".encode("utf-8")).hexdigest()
+
+    # ---------- disk tier (runs in worker threads) ----------
+
+    def _connect(self):
+        if self._db is None:
+            self._db = sqlite3.connect(self.path, check_same_thread=False)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute(
+                """
+                CREATE TABLE IF NOT EXISTS embeddings (
+                    key TEXT PRIMARY KEY,
+                    model TEXT NOT NULL,
+                    vector BLOB NOT NULL,
+                    used_at REAL NOT NULL DEFAULT 0
+                )
+                """
+            )
+            # Files created before the row cap have no used_at column
+            columns = {row[1] for row in self._db.execute("PRAGMA table_info(embeddings)")}
+            if "used_at" not in columns:
+                self._db.execute("ALTER TABLE embeddings ADD COLUMN used_at REAL NOT NULL DEFAULT 0")
+            self._db.execute("CREATE INDEX IF NOT EXISTS embeddings_used_at ON embeddings (used_at)")
+            self._db.commit()
+            self._disk_rows = self._db.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+        return self._db
+
+    def _disk_get(self, key: str) -> Optional[array]:
+        with self._db_lock:
+            db = self._connect()
+            row = db.execute(
+                "SELECT vector FROM embeddings WHERE key = ?", (key,)
+            ).fetchone()
+            if row is not None:
+                db.execute("UPDATE embeddings SET used_at = ? WHERE key = ?", (time.time(), key))
+                db.commit()
+        if row is None:
+            return None
+        vector = array("f")
+        vector.frombytes(row[0])
+        return vector
+
+    def _disk_set(self, key: str, vector: array):
+        with self._db_lock:
+            db = self._connect()
+            inserted = db.execute(
+                "INSERT OR IGNORE INTO embeddings (key, model, vector, used_at) VALUES (?, ?, ?, ?)",
+                (key, self.model, vector.tobytes(), time.time()),
+            ).rowcount
+            self._disk_rows += inserted
+            if self._disk_rows > self.max_rows:
+                self._prune(db)
+            db.commit()
+
+    def _prune(self, db):
+        """Delete least recently used rows down to PRUNE_TO * max_rows"""
+        excess = self._disk_rows - int(self.max_rows * PRUNE_TO)
+        deleted = db.execute(
+            """
+            DELETE FROM embeddings WHERE key IN (
+                SELECT key FROM embeddings ORDER BY used_at LIMIT ?
+            )
+            """,
+            (excess,),
+        ).rowcount
+        self._disk_rows -= deleted
+        self.disk_evictions += deleted
+
+    # ---------- public API ----------
+
+    async def get_or_embed(self, text: str, embed_fn: Callable[[str], Awaitable[list]]) -> list:
+        """Return the cached embedding for `text`, computing it with embed_fn on a miss"""
+        key = self._key(text)
+
+        vector = self.memory.get(key)
+        if vector is not None:
+            self.memory_hits += 1
+            return vector.tolist()
+
+        if self.path:
+            try:
+                vector = await asyncio.to_thread(self._disk_get, key)
+            except sqlite3.Error as e:
+                print(f"⚠️  Embedding cache read error: {e}")
+                vector = None
+            if vector is not None:
+                self.disk_hits += 1
+                self.memory.set(key, vector)
+                return vector.tolist()
+
+        self.misses += 1
+        embedding = await embed_fn(text)
+        vector = array("f", embedding)
+        self.memory.set(key, vector)
+
+        if self.path:
+            try:
+                await asyncio.to_thread(self._disk_set, key, vector)
+            except sqlite3.Error as e:
+                print(f"⚠️  Embedding cache write error: {e}")
+
+        return embedding
+
+    def close(self):
+        """Close the disk tier. Called on app shutdown."""
+        with self._db_lock:
+            if self._db is not None:
+                self._db.close()
+                self._db = None
+
+    def stats(self) -> dict:
+        lookups = self.memory_hits + self.disk_hits + self.misses
+        hits = self.memory_hits + self.disk_hits
+        return {
+            "model": self.model,
+            "memory_size": len(self.memory),
+            "memory_maxsize": self.memory.maxsize,
+            "disk_enabled": bool(self.path),
+            "disk_rows": self._disk_rows,
+            "disk_max_rows": self.max_rows,
+            "disk_evictions": self.disk_evictions,
+            "memory_hits": self.memory_hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "hit_ratio": round(hits / lookups, 4) if lookups else 0.0,
+        }
+
+
+# Global query embedding cache
+embedding_cache = EmbeddingCache(
+    EMBED_MODEL, EMBED_CACHE_SIZE, EMBED_CACHE_PATH or None, EMBED_CACHE_MAX_ROWS
+)
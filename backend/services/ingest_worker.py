@@ -0,0 +1,244 @@
+"""
+Ingestion Worker Service
+
+Runs queued ingest jobs (see migrations/add_ingest_jobs.sql) in the
+background with bounded concurrency.
+
+Each job runs `scripts/ingest.py <client_id> --job-id <job_id>` as a
+subprocess, so chunking and embedding never share the API's event loop or
+GIL. Progress is written by ingest.py to the job tables and read back by
+the polling endpoint in backend/routes/ingest.py.
+"""
+
+import asyncio
+import sys
+from collections import deque
+from pathlib import Path
+from backend.database import get_db_pool
+from backend.config import (
+    SCRIPTS_DIR,
+    INGEST_WORKERS,
+    INGEST_JOB_TIMEOUT,
+    INGEST_STALE_AFTER,
+    INGEST_MAX_QUEUE,
+)
+
+# Output lines kept from a job subprocess, reported when it dies without finishing
+OUTPUT_TAIL_LINES = 20
+
+
+class IngestWorker:
+    """
+    Pool of `workers` tasks pulling job ids from an in-memory queue of at
+    most `max_queue` jobs. Jobs that do not fit stay pending in the database
+    and are queued when the queue runs empty.
+
+    A job is claimed with a conditional UPDATE (pending -> running), so with
+    several API processes each job still runs once. Pending jobs left by a
+    previous process are picked up on start; jobs interrupted on stop are put
+    back to pending and resumed by ingest.py on the next start. Running jobs
+    with no progress for `stale_after` seconds (their process crashed without
+    a clean stop) are reclaimed on start as well.
+    """
+
+    def __init__(
+        self,
+        workers: int = INGEST_WORKERS,
+        timeout: float = INGEST_JOB_TIMEOUT,
+        stale_after: float = INGEST_STALE_AFTER,
+        max_queue: int = INGEST_MAX_QUEUE,
+    ):
+        self.workers = workers
+        self.timeout = timeout
+        self.stale_after = stale_after
+        self.max_queue = max_queue
+        self.queue = None
+        self._tasks = []
+        self._running_jobs = {}  # job_id -> subprocess
+
+        # Metrics
+        self.jobs_completed = 0
+        self.jobs_failed = 0
+        self.jobs_timed_out = 0
+        self.jobs_reclaimed = 0
+
+    @property
+    def running(self) -> bool:
+        return any(not task.done() for task in self._tasks)
+
+    async def start(self):
+        """Start worker tasks and enqueue pending and stale jobs. Called on app startup."""
+        if self.running:
+            return
+        self.queue = asyncio.Queue(maxsize=self.max_queue)
+        self._tasks = [asyncio.create_task(self._run()) for _ in range(self.workers)]
+
+        db_pool = get_db_pool()
+        async with db_pool.acquire() as conn:
+            # Conditional UPDATE, so with several processes starting at once
+            # each stale job is reclaimed by one of them
+            reclaimed = await conn.fetch(
+                """
+                UPDATE ingest_jobs SET status = 'pending', updated_at = NOW()
+                WHERE status = 'running' AND updated_at < NOW() - make_interval(secs => $1)
+                RETURNING id
+                """,
+                self.stale_after,
+            )
+        if reclaimed:
+            self.jobs_reclaimed += len(reclaimed)
+            print(f"📥 Reclaimed {len(reclaimed)} stale running ingest job(s)")
+        await self._enqueue_pending()
+
+    async def _enqueue_pending(self):
+        """Queue the oldest pending jobs, as many as fit"""
+        free = self.max_queue - self.queue.qsize()
+        if free <= 0:
+            return
+        db_pool = get_db_pool()
+        async with db_pool.acquire() as conn:
+            pending = await conn.fetch(
+                "SELECT id, client_id FROM ingest_jobs WHERE status = 'pending' ORDER BY created_at LIMIT $1",
+                free,
+            )
+        for job in pending:
+            self.queue.put_nowait((job["id"], job["client_id"]))
+
+    async def stop(self):
+        """Stop workers; interrupted jobs go back to pending. Called on app shutdown."""
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    def full(self) -> bool:
+        return self.queue is not None and self.queue.full()
+
+    def submit(self, job_id, client_id):
+        """Queue a job created with status 'pending' (if full, it is queued later from the database)"""
+        try:
+            self.queue.put_nowait((job_id, client_id))
+        except asyncio.QueueFull:
+            print(f"📥 Ingest queue full, job {job_id} stays pending")
+
+    async def _claim(self, job_id) -> bool:
+        db_pool = get_db_pool()
+        async with db_pool.acquire() as conn:
+            claimed = await conn.fetchval(
+                """
+                UPDATE ingest_jobs SET status = 'running', updated_at = NOW()
+                WHERE id = $1 AND status = 'pending'
+                RETURNING id
+                """,
+                job_id,
+            )
+        return claimed is not None
+
+    async def _run(self):
+        while True:
+            job_id, client_id = await self.queue.get()
+            try:
+                if await self._claim(job_id):
+                    await self._execute(job_id, client_id)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"❌ Ingest job {job_id} error: {e}")
+                await self._finish_unfinished(job_id, str(e))
+            if self.queue.empty():
+                try:
+                    await self._enqueue_pending()
+                except Exception as e:
+                    print(f"❌ Ingest queue refill error: {e}")
+
+    async def _execute(self, job_id, client_id):
+        """Run ingest.py for one job and reconcile the job row when it exits"""
+        print(f"📥 Ingest job {job_id} started (client {client_id})")
+        process = await asyncio.create_subprocess_exec(
+            sys.executable,
+            "ingest.py",
+            str(client_id),
+            "--job-id",
+            str(job_id),
+            cwd=str(Path(SCRIPTS_DIR)),
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.STDOUT,
+        )
+        self._running_jobs[job_id] = process
+        output = deque(maxlen=OUTPUT_TAIL_LINES)
+
+        async def drain():
+            async for line in process.stdout:
+                output.append(line.decode("utf-8", errors="replace").rstrip())
+            await process.wait()
+
+        try:
+            await asyncio.wait_for(drain(), timeout=self.timeout)
+        except asyncio.TimeoutError:
+            process.kill()
+            await process.wait()
+            self.jobs_timed_out += 1
+            output.append(f"Timed out after {self.timeout:.0f}s")
+        except asyncio.CancelledError:
+            # App shutdown: stop the job and let the next start resume it
+            process.kill()
+            await process.wait()
+            await self._requeue(job_id)
+            raise
+        finally:
+            self._running_jobs.pop(job_id, None)
+
+        status = await self._finish_unfinished(job_id, "\n".join(output))
+        if status == "completed":
+            self.jobs_completed += 1
+            # New content is searchable right away, not only after cache TTLs
+            from backend.dependencies import invalidate_client
+            from backend.services.vector_store import collection_registry
+            invalidate_client(client_id)
+            collection_registry.invalidate(client_id)
+        else:
+            self.jobs_failed += 1
+        print(f"📥 Ingest job {job_id} {status}")
+
+    async def _finish_unfinished(self, job_id, error: str) -> str:
+        """Mark a job failed if ingest.py exited without finishing it; returns its status"""
+        db_pool = get_db_pool()
+        async with db_pool.acquire() as conn:
+            return await conn.fetchval(
+                """
+                UPDATE ingest_jobs
+                SET status = CASE WHEN status IN ('pending', 'running') THEN 'failed' ELSE status END,
+                    error = CASE WHEN status IN ('pending', 'running') THEN $2 ELSE error END,
+                    finished_at = COALESCE(finished_at, NOW()),
+                    updated_at = NOW()
+                WHERE id = $1
+                RETURNING status
+                """,
+                job_id,
+                error or "Ingest process exited without finishing the job",
+            )
+
+    async def _requeue(self, job_id):
+        db_pool = get_db_pool()
+        async with db_pool.acquire() as conn:
+            await conn.execute(
+                "UPDATE ingest_jobs SET status = 'pending', updated_at = NOW() WHERE id = $1 AND status = 'running'",
+                job_id,
+            )
+
+    def stats(self) -> dict:
+        return {
+            "running": self.running,
+            "workers": self.workers,
+            "queued": self.queue.qsize() if self.queue else 0,
+            "max_queue": self.max_queue,
+            "active_jobs": len(self._running_jobs),
+            "jobs_completed": self.jobs_completed,
+            "jobs_failed": self.jobs_failed,
+            "jobs_timed_out": self.jobs_timed_out,
+            "jobs_reclaimed": self.jobs_reclaimed,
+        }
+
+
+# Global ingest worker (started and stopped in lifespan)
+ingest_worker = IngestWorker()
@@ -0,0 +1,84 @@
+"""
+Lexical Search Service
+
+Keyword retrieval over document_chunks using Postgres full-text search,
+fused with vector results by reciprocal rank fusion (RRF).
+
+Chunks carry a generated `search_vector` column with a GIN index (see
+migrations/add_search_vector_to_document_chunks.sql), so ingestion keeps
+the index up to date with no extra work. The 'simple' text search config
+is used: no stemming or stop words, which suits short Indonesian queries
+with prices and product names ("harga upgrade RAM").
+"""
+
+import re
+from typing import Dict, List, Tuple
+from backend.database import get_db_pool
+
+_TERM = re.compile(r"\w+", re.UNICODE)
+
+# Terms kept per query, so a pasted paragraph cannot build a huge tsquery
+MAX_QUERY_TERMS = 16
+
+
+def build_tsquery(query: str) -> str:
+    """
+    OR-query over the distinct terms of `query` (to_tsquery syntax).
+    Only word characters are kept, so user input cannot inject operators.
+    ts_rank_cd still ranks chunks matching more terms higher.
+    """
+    terms = []
+    for term in _TERM.findall(query.lower()):
+        if term not in terms:
+            terms.append(term)
+    return " | ".join(terms[:MAX_QUERY_TERMS])
+
+
+async def search(client_id, query: str, limit: int) -> List[Dict]:
+    """
+    Top `limit` chunks of a client by full-text rank.
+
+    Returns:
+        List of {"id", "content"} dicts, best first. Empty on error (e.g.
+        migration not applied), so retrieval degrades to vector-only.
+    """
+    tsquery = build_tsquery(query)
+    if not tsquery:
+        return []
+
+    try:
+        db_pool = get_db_pool()
+        async with db_pool.acquire() as conn:
+            rows = await conn.fetch(
+                """
+                SELECT dc.id::text AS id, dc.content
+                FROM document_chunks dc
+                JOIN documents d ON d.id = dc.document_id,
+                     to_tsquery('simple', $2) AS q
+                WHERE d.client_id = $1
+                  AND dc.search_vector @@ q
+                ORDER BY ts_rank_cd(dc.search_vector, q) DESC
+                LIMIT $3
+            """,
+                client_id,
+                tsquery,
+                limit,
+            )
+    except Exception as e:
+        print(f"⚠️  Lexical search error (vector-only retrieval): {e}")
+        return []
+
+    return [{"id": r["id"], "content": r["content"]} for r in rows]
+
+
+def reciprocal_rank_fusion(rankings: List[List[str]], k: int = 60) -> List[Tuple[str, float]]:
+    """
+    Merge ranked id lists: score(id) = sum of 1 / (k + rank) over the lists
+    containing it. Returns (id, score) pairs by descending score; ties keep
+    first-seen order.
+    """
+    scores = {}
+    for ranking in rankings:
+        for rank, item_id in enumerate(ranking, start=1):
+            scores[item_id] = scores.get(item_id, 0.0) + 1.0 / (k + rank)
+    return sorted(scores.items(), key=lambda item: -item[1])
@@ -0,0 +1,230 @@
+"""
+LLM Scheduler Service
+
+Admission control and weighted fair queuing in front of Ollama generation.
+
+At most `max_concurrency` generations run at once (one per model slot).
+Further requests wait in a start-time fair queue: each client's requests
+get virtual start tags spaced 1 / weight apart, with the weight taken from
+the client's plan (LLM_PLAN_WEIGHTS). Free slots go to the smallest tag,
+so under contention a pro client gets 4x the slots of a free client, and
+one busy client cannot starve the others.
+
+Requests are rejected fast instead of piling up:
+- 429 when the client already has `max_queued_per_client` requests waiting
+- 503 when the whole queue is full, or a request waited `queue_timeout`
+
+Queue waits are exported per plan and per client; clients appear under an
+opaque label (backend.metrics.client_label), never their id.
+"""
+
+import asyncio
+import heapq
+import itertools
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from fastapi import HTTPException
+from backend.metrics import client_label, percentile
+from backend.config import (
+    LLM_MAX_CONCURRENCY,
+    LLM_QUEUE_TIMEOUT,
+    LLM_MAX_QUEUE,
+    LLM_MAX_QUEUED_PER_CLIENT,
+    LLM_PLAN_WEIGHTS,
+)
+
+# Recent queue waits kept per client for the percentile metrics
+WAIT_SAMPLES = 256
+
+# Finish tags kept before idle clients are pruned
+MAX_FINISH_TAGS = 1000
+
+# Clients tracked for metrics before idle ones (nothing queued or active) are pruned
+MAX_CLIENTS = 1000
+
+
+def _wait_stats(samples) -> dict:
+    samples = list(samples)
+    if not samples:
+        return {"wait_avg_ms": 0.0, "wait_p50_ms": 0.0, "wait_p95_ms": 0.0, "wait_max_ms": 0.0}
+    return {
+        "wait_avg_ms": round(sum(samples) / len(samples), 2),
+        "wait_p50_ms": round(percentile(samples, 0.5), 2),
+        "wait_p95_ms": round(percentile(samples, 0.95), 2),
+        "wait_max_ms": round(max(samples), 2),
+    }
+
+
+class LLMScheduler:
+    """Concurrency cap plus per-client weighted fair queue"""
+
+    def __init__(
+        self,
+        max_concurrency: int = LLM_MAX_CONCURRENCY,
+        queue_timeout: float = LLM_QUEUE_TIMEOUT,
+        max_queue: int = LLM_MAX_QUEUE,
+        max_queued_per_client: int = LLM_MAX_QUEUED_PER_CLIENT,
+        weights: dict = LLM_PLAN_WEIGHTS,
+    ):
+        self.max_concurrency = max_concurrency
+        self.queue_timeout = queue_timeout
+        self.max_queue = max_queue
+        self.max_queued_per_client = max_queued_per_client
+        self.weights = weights
+
+        self.active = 0
+        self.queued = 0
+        self.virtual_time = 0.0
+        self._heap = []  # (start_tag, seq, waiter)
+        self._seq = itertools.count()
+        self._finish_tags = {}  # client key -> finish tag of its last request
+        self._clients = {}  # client key -> metrics
+
+        # Metrics
+        self.rejected = 0
+        self.timed_out = 0
+
+    def _client(self, client_id, plan: str) -> dict:
+        key = str(client_id)
+        stats = self._clients.get(key)
+        if stats is None:
+            if len(self._clients) >= MAX_CLIENTS:
+                # Idle clients only hold past wait samples; callers keep
+                # references to the stats of queued and active clients
+                self._clients = {
+                    k: s for k, s in self._clients.items() if s["queued"] or s["active"]
+                }
+            stats = self._clients[key] = {
+                "plan": plan,
+                "requests": 0,
+                "queued": 0,
+                "active": 0,
+                "rejected": 0,
+                "timed_out": 0,
+                "waits_ms": deque(maxlen=WAIT_SAMPLES),
+            }
+        stats["plan"] = plan
+        return stats
+
+    def _reject(self, stats: dict, status_code: int, detail: str):
+        self.rejected += 1
+        stats["rejected"] += 1
+        raise HTTPException(status_code=status_code, detail=detail, headers={"Retry-After": "1"})
+
+    def admit(self, client_id, plan: str):
+        """Raise 429/503 right away if a request of this client would be refused"""
+        stats = self._client(client_id, plan)
+        if stats["queued"] >= self.max_queued_per_client:
+            self._reject(stats, 429, "Too many requests waiting for the model")
+        if self.queued >= self.max_queue:
+            self._reject(stats, 503, "Model busy, please retry")
+
+    def _dispatch(self):
+        """Hand free slots to the waiters with the smallest start tags"""
+        while self.active < self.max_concurrency and self._heap:
+            start, _, waiter = heapq.heappop(self._heap)
+            if waiter.done():
+                continue  # Timed out or cancelled while queued
+            self.virtual_time = max(self.virtual_time, start)
+            self.active += 1
+            waiter.set_result(None)
+
+        if len(self._finish_tags) > MAX_FINISH_TAGS:
+            # A tag at or behind virtual time behaves the same as no tag
+            self._finish_tags = {
+                k: tag for k, tag in self._finish_tags.items() if tag > self.virtual_time
+            }
+
+    async def acquire(self, client_id, plan: str):
+        """Wait for a generation slot (see class docstring for rejections)"""
+        self.admit(client_id, plan)
+        stats = self._client(client_id, plan)
+        stats["requests"] += 1
+
+        key = str(client_id)
+        weight = self.weights.get(plan, self.weights["free"])
+        start = max(self.virtual_time, self._finish_tags.get(key, 0.0))
+        self._finish_tags[key] = start + 1.0 / weight
+
+        waiter = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._heap, (start, next(self._seq), waiter))
+        self._dispatch()
+
+        started = time.monotonic()
+        if not waiter.done():
+            self.queued += 1
+            stats["queued"] += 1
+            try:
+                await asyncio.wait((waiter,), timeout=self.queue_timeout)
+            except asyncio.CancelledError:
+                if waiter.done():
+                    self.release(client_id)  # Granted just as the caller went away
+                raise
+            finally:
+                self.queued -= 1
+                stats["queued"] -= 1
+                if not waiter.done():
+                    waiter.cancel()  # Left in the heap, skipped by _dispatch
+
+            if waiter.cancelled():
+                self.timed_out += 1
+                stats["timed_out"] += 1
+                self._reject(stats, 503, "Model busy, please retry")
+
+        stats["active"] += 1
+        stats["waits_ms"].append((time.monotonic() - started) * 1000)
+
+    def release(self, client_id):
+        """Return a slot taken by acquire()"""
+        stats = self._clients.get(str(client_id))
+        if stats and stats["active"]:
+            stats["active"] -= 1
+        self.active -= 1
+        self._dispatch()
+
+    @asynccontextmanager
+    async def slot(self, client_id, plan: str):
+        """Hold a generation slot for the duration of the block"""
+        await self.acquire(client_id, plan)
+        try:
+            yield
+        finally:
+            self.release(client_id)
+
+    def stats(self) -> dict:
+        """
+        Slot usage and queue waits per plan and per client for monitoring.
+        Clients are keyed by client_label(), so /metrics shows per-tenant
+        waits without revealing tenant ids.
+        """
+        fields = ("requests", "queued", "active", "rejected", "timed_out")
+        plans = {}
+        waits = {}
+        clients = {}
+        for key, stats in self._clients.items():
+            plan = plans.setdefault(stats["plan"], {"clients": 0, **dict.fromkeys(fields, 0)})
+            plan["clients"] += 1
+            for field in fields:
+                plan[field] += stats[field]
+            waits.setdefault(stats["plan"], []).extend(stats["waits_ms"])
+            clients[client_label(key)] = {
+                "plan": stats["plan"],
+                **{field: stats[field] for field in fields},
+                **_wait_stats(stats["waits_ms"]),
+            }
+        for name, plan in plans.items():
+            plan.update(_wait_stats(waits[name]))
+        return {
+            "max_concurrency": self.max_concurrency,
+            "active": self.active,
+            "queued": self.queued,
+            "rejected": self.rejected,
+            "timed_out": self.timed_out,
+            "plans": plans,
+            "clients": clients,
+        }
+
+
+# Global LLM scheduler (shared by /chat and /chat/stream)
+llm_scheduler = LLMScheduler()
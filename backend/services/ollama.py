@@ -0,0 +1,223 @@
+"""
+Ollama Client Service
+
+Shared, pooled async HTTP client for LLM generation and embeddings,
+balanced over the generate / embed backend pools (see backend_pool.py).
+"""
+
+import json
+import httpx
+from fastapi import HTTPException
+from backend.services.backend_pool import BackendPool, NoHealthyBackend
+from backend.config import (
+    OLLAMA_GENERATE_URLS,
+    OLLAMA_EMBED_URLS,
+    OLLAMA_KEEP_ALIVE,
+    MODEL,
+    EMBED_MODEL,
+    OLLAMA_GENERATE_TIMEOUT,
+    OLLAMA_EMBED_TIMEOUT,
+    OLLAMA_CONNECT_TIMEOUT,
+    OLLAMA_MAX_CONNECTIONS,
+    OLLAMA_MAX_KEEPALIVE,
+    OLLAMA_FAILURE_THRESHOLD,
+    OLLAMA_CIRCUIT_COOLDOWN,
+)
+
+# Global HTTP client (keep-alive connection pool shared by all requests)
+http_client = None
+
+# Backend pools: generation and embedding servers are balanced separately
+generate_pool = BackendPool(
+    "generate", OLLAMA_GENERATE_URLS, OLLAMA_FAILURE_THRESHOLD, OLLAMA_CIRCUIT_COOLDOWN
+)
+embed_pool = BackendPool(
+    "embed", OLLAMA_EMBED_URLS, OLLAMA_FAILURE_THRESHOLD, OLLAMA_CIRCUIT_COOLDOWN
+)
+
+
+def _timeout(read_timeout: float) -> httpx.Timeout:
+    """Build a per-call timeout with a short connect phase"""
+    return httpx.Timeout(read_timeout, connect=OLLAMA_CONNECT_TIMEOUT)
+
+
+async def init_http_client():
+    """Create the shared HTTP client. Called on app startup."""
+    global http_client
+    if http_client is None:
+        http_client = httpx.AsyncClient(
+            limits=httpx.Limits(
+                max_connections=OLLAMA_MAX_CONNECTIONS,
+                max_keepalive_connections=OLLAMA_MAX_KEEPALIVE,
+            ),
+            timeout=_timeout(OLLAMA_GENERATE_TIMEOUT),
+        )
+    return http_client
+
+
+async def close_http_client():
+    """Close the shared HTTP client. Called on app shutdown."""
+    global http_client
+    if http_client is not None:
+        await http_client.aclose()
+        http_client = None
+
+
+async def get_http_client() -> httpx.AsyncClient:
+    """Get the shared HTTP client, creating it lazily if needed."""
+    if http_client is None:
+        return await init_http_client()
+    return http_client
+
+
+def _unavailable(error: NoHealthyBackend) -> HTTPException:
+    """503 for callers when no backend of a pool can take the request"""
+    return HTTPException(
+        status_code=503,
+        detail="Model server unavailable, please retry",
+        headers={"Retry-After": str(error.retry_after)},
+    )
+
+
+def ensure_generate_available():
+    """Raise 503 now if no generate backend would accept a request"""
+    if not generate_pool.available():
+        raise _unavailable(NoHealthyBackend("No healthy generate backend", generate_pool.retry_after()))
+
+
+async def _post(pool: BackendPool, path: str, payload: dict, read_timeout: float) -> dict:
+    """
+    POST to a backend picked from `pool`; returns the response body.
+    If a backend refuses the connection, the next one is tried (the request
+    never reached it, so retrying is safe). Raises a 503 HTTPException with
+    Retry-After once no backend is left.
+    """
+    client = await get_http_client()
+    tried = []
+    while True:
+        try:
+            async with pool.request(exclude=tried) as backend:
+                tried.append(backend)
+                r = await client.post(
+                    backend.url + path, json=payload, timeout=_timeout(read_timeout)
+                )
+                r.raise_for_status()
+                return r.json()
+        except httpx.ConnectError:
+            continue  # Excluded from the next pick
+        except NoHealthyBackend as e:
+            raise _unavailable(e) from e
+
+
+async def embed(text: str) -> list:
+    """Get embedding from Ollama using the configured embedding model"""
+    body = await _post(
+        embed_pool, "/api/embeddings", {"model": EMBED_MODEL, "prompt": text}, OLLAMA_EMBED_TIMEOUT
+    )
+    return body["embedding"]
+
+
+def _record_usage(usage: dict, body: dict):
+    """Copy Ollama's exact token counts (and KV context, if any) into `usage`"""
+    if usage is not None:
+        usage["prompt_eval_count"] = body.get("prompt_eval_count")
+        usage["eval_count"] = body.get("eval_count")
+        if body.get("context") is not None:
+            usage["context"] = body["context"]
+
+
+async def _complete(path: str, payload: dict, usage: dict = None) -> dict:
+    """Non-streaming generation call; returns the response body"""
+    body = await _post(generate_pool, path, {**payload, "stream": False}, OLLAMA_GENERATE_TIMEOUT)
+    _record_usage(usage, body)
+    return body
+
+
+async def _stream(path: str, payload: dict, text_of, usage: dict = None):
+    """
+    Streaming generation call; yields text fragments extracted by text_of(chunk).
+    Fails over like _post() (503 HTTPException when no backend is left).
+    """
+    client = await get_http_client()
+    tried = []
+    while True:
+        try:
+            async with generate_pool.request(exclude=tried) as backend:
+                tried.append(backend)
+                async with client.stream(
+                    "POST",
+                    backend.url + path,
+                    json={**payload, "stream": True},
+                    timeout=_timeout(OLLAMA_GENERATE_TIMEOUT),
+                ) as r:
+                    r.raise_for_status()
+                    async for line in r.aiter_lines():
+                        if not line:
+                            continue
+                        chunk = json.loads(line)
+                        if chunk.get("error"):
+                            raise RuntimeError(chunk["error"])
+                        text = text_of(chunk)
+                        if text:
+                            yield text
+                        if chunk.get("done"):
+                            _record_usage(usage, chunk)
+                            break
+                return
+        except httpx.ConnectError:
+            continue  # Refused before anything was streamed: fail over
+        except NoHealthyBackend as e:
+            raise _unavailable(e) from e
+
+
+def _generate_payload(prompt: str, context: list = None) -> dict:
+    payload = {"model": MODEL, "prompt": prompt, "keep_alive": OLLAMA_KEEP_ALIVE}
+    if context:
+        payload["context"] = context
+    return payload
+
+
+def _chat_payload(messages: list) -> dict:
+    return {"model": MODEL, "messages": messages, "keep_alive": OLLAMA_KEEP_ALIVE}
+
+
+async def generate(prompt: str, usage: dict = None, context: list = None) -> str:
+    """
+    Call Ollama LLM with the given prompt.
+    Exact prompt/reply token counts (and the KV `context` to continue from)
+    are written to `usage` if given.
+
+    Cancelling the awaiting task closes the underlying connection,
+    which makes Ollama abort the generation.
+    """
+    body = await _complete("/api/generate", _generate_payload(prompt, context), usage)
+    return body["response"]
+
+
+def stream_generate(prompt: str, usage: dict = None, context: list = None):
+    """
+    Stream tokens from Ollama as they are generated.
+
+    Yields response fragments (str). Exact token counts from the final
+    chunk are written to `usage` if given. Closing the generator early
+    closes the upstream connection, which makes Ollama stop generating.
+    """
+    return _stream(
+        "/api/generate", _generate_payload(prompt, context), lambda chunk: chunk.get("response"), usage
+    )
+
+
+async def chat(messages: list, usage: dict = None) -> str:
+    """Call Ollama's /api/chat with a messages list (see generate())"""
+    body = await _complete("/api/chat", _chat_payload(messages), usage)
+    return body["message"]["content"]
+
+
+def stream_chat(messages: list, usage: dict = None):
+    """Stream /api/chat reply fragments (see stream_generate())"""
+    return _stream(
+        "/api/chat",
+        _chat_payload(messages),
+        lambda chunk: (chunk.get("message") or {}).get("content"),
+        usage,
+    )
@@ -0,0 +1,162 @@
+"""
+Prompt Builder Service
+
+Assembles the chat prompt (system prompt, conversation history, retrieved
+context, question) within a per-plan token budget.
+
+Token counts are estimated following the pre-tokenization rules of the
+Llama 3 BPE tokenizer (letters, 1-3 digit number groups, punctuation runs,
+whitespace), charging long words as several sub-word tokens. Exact counts
+for billing come from Ollama's prompt_eval_count / eval_count.
+
+When the prompt would exceed the budget, parts are dropped by priority:
+    1. system prompt and question (always kept)
+    2. the most relevant context chunk
+    3. the latest history exchange
+    4. remaining context chunks, in relevance order
+    5. older history, newest first
+"""
+
+import re
+from typing import Dict, List
+from backend.config import PROMPT_TOKEN_BUDGET
+
+# Pre-tokenization pieces: contractions, letter runs, number groups, symbols, spaces
+_PIECES = re.compile(
+    r"'(?:s|t|re|ve|m|ll|d)|[^\W\d_]+|\d{1,3}|[^\s\w]+|_+|\s+",
+    re.IGNORECASE,
+)
+
+# Average characters per sub-word token inside a long word
+CHARS_PER_SUBWORD = 5
+
+
+def estimate_tokens(text: str) -> int:
+    """Approximate Llama-family BPE token count of `text`"""
+    if not text:
+        return 0
+    tokens = 0
+    for piece in _PIECES.findall(text):
+        if piece.isspace():
+            # A space before a word merges into it; longer runs cost extra
+            tokens += 1 if len(piece) > 1 or "\n" in piece else 0
+        elif piece[0].isalpha():
+            tokens += max(1, -(-len(piece) // CHARS_PER_SUBWORD))
+        else:
+            tokens += 1
+    return tokens
+
+
+def format_exchange(messages: List[Dict]) -> str:
+    """History lines in the prompt's "User: / Assistant:" format"""
+    lines = ""
+    for h in messages:
+        if h["role"] == "user":
+            lines += f"User: {h['content']}\n"
+        elif h["role"] == "assistant":
+            lines += f"Assistant: {h['content']}\n\n"
+    return lines
+
+
+def _exchanges(history: List[Dict]) -> List[List[Dict]]:
+    """Group history (oldest first) into user+assistant exchanges"""
+    exchanges = []
+    for h in history:
+        if h["role"] == "user" or not exchanges:
+            exchanges.append([h])
+        else:
+            exchanges[-1].append(h)
+    return exchanges
+
+
+def render_turn(context: str, question: str) -> str:
+    """The per-turn part of the prompt: retrieved context and question"""
+    return f"""
+Context:
+{context}
+
+User question:
+{question}
+
+Answer:
+"""
+
+
+def render(system_prompt: str, memory_block: str, context: str, question: str) -> str:
+    """The flat /api/generate prompt"""
+    return f"""
+{system_prompt}
+
+Conversation so far:
+{memory_block}
+""" + render_turn(context, question)
+
+
+def render_messages(system_prompt: str, history: List[Dict], context: str, question: str) -> List[Dict]:
+    """
+    /api/chat messages. The system message and earlier turns come first and
+    stay byte-identical across turns, so Ollama can reuse their KV cache.
+    """
+    messages = [{"role": "system", "content": system_prompt}]
+    messages += [
+        {"role": h["role"], "content": h["content"]}
+        for h in history
+        if h["role"] in ("user", "assistant")
+    ]
+    messages.append({"role": "user", "content": render_turn(context, question).strip()})
+    return messages
+
+
+def build_prompt(
+    system_prompt: str,
+    history: List[Dict],
+    chunks: List[str],
+    question: str,
+    plan: str = "free",
+) -> Dict:
+    """
+    Build the prompt within the plan's budget (PROMPT_TOKEN_BUDGET).
+
+    Returns:
+        Dict with "prompt" (flat), "messages" (chat format), "turn_prompt"
+        (context + question only, for KV context carry-over), "tokens"
+        (estimated, flat prompt), "history" and "chunks" (the parts that
+        were kept, in prompt order) and "budget"
+    """
+    budget = PROMPT_TOKEN_BUDGET.get(plan, PROMPT_TOKEN_BUDGET["free"])
+    spent = estimate_tokens(render(system_prompt, "", "", question))
+
+    exchanges = _exchanges(history)
+    chunk_costs = [estimate_tokens(chunk) + 1 for chunk in chunks]
+    exchange_costs = [estimate_tokens(format_exchange(e)) for e in exchanges]
+
+    # Candidates in priority order: (kind, index)
+    order = []
+    if chunks:
+        order.append(("chunk", 0))
+    if exchanges:
+        order.append(("exchange", len(exchanges) - 1))
+    order += [("chunk", i) for i in range(1, len(chunks))]
+    order += [("exchange", i) for i in range(len(exchanges) - 2, -1, -1)]
+
+    kept = {"chunk": set(), "exchange": set()}
+    for kind, i in order:
+        cost = chunk_costs[i] if kind == "chunk" else exchange_costs[i]
+        if spent + cost <= budget:
+            kept[kind].add(i)
+            spent += cost
+
+    kept_chunks = [chunks[i] for i in sorted(kept["chunk"])]
+    kept_history = [h for i in sorted(kept["exchange"]) for h in exchanges[i]]
+    context = "\n\n".join(kept_chunks)
+    prompt = render(system_prompt, format_exchange(kept_history), context, question)
+
+    return {
+        "prompt": prompt,
+        "messages": render_messages(system_prompt, kept_history, context, question),
+        "turn_prompt": render_turn(context, question),
+        "tokens": estimate_tokens(prompt),
+        "history": kept_history,
+        "chunks": kept_chunks,
+        "budget": budget,
+    }
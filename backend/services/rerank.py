@@ -0,0 +1,80 @@
+"""
+Rerank Service
+
+Maximal Marginal Relevance (MMR) selection of retrieved chunks under a
+context token budget.
+
+Retrieval over-fetches candidates. MMR then picks them one at a time,
+trading relevance against similarity to chunks already picked (using the
+stored chunk embeddings), so near-duplicate chunks do not fill the prompt.
+Selection stops at `k` chunks or when the token budget is spent. A shorter
+prompt means faster generation on CPU-only Ollama hosts.
+"""
+
+from typing import List, Optional
+import numpy as np
+
+
+def mmr_select(
+    relevance: List[float],
+    vectors: List[Optional[list]],
+    costs: List[int],
+    k: int,
+    budget: int,
+    lambda_: float = 0.7,
+) -> List[int]:
+    """
+    Pick candidate indices by MMR.
+
+    Args:
+        relevance: Relevance per candidate (higher is better, any scale)
+        vectors: Embedding per candidate (None = no redundancy penalty)
+        costs: Token cost per candidate
+        k: Maximum number of picks
+        budget: Maximum total cost; the first pick is always kept
+        lambda_: 1.0 = relevance only, 0.0 = diversity only
+
+    Returns:
+        Picked indices in pick order
+    """
+    if not relevance:
+        return []
+
+    # Min-max normalize relevance so it is comparable with cosine similarity
+    scores = np.asarray(relevance, dtype=np.float64)
+    low, high = scores.min(), scores.max()
+    scores = (scores - low) / ((high - low) or 1.0)
+
+    # Unit vectors as one matrix (zero rows for candidates without a vector),
+    # so each pick updates all similarities with one matrix-vector product
+    has_vector = np.array([v is not None and len(v) > 0 for v in vectors])
+    units = None
+    if has_vector.any():
+        units = np.zeros((len(scores), len(vectors[int(np.argmax(has_vector))])), dtype=np.float32)
+        for i in np.flatnonzero(has_vector):
+            units[i] = vectors[i]
+        norms = np.linalg.norm(units, axis=1, keepdims=True)
+        units /= np.where(norms == 0, 1.0, norms)
+
+    costs = np.asarray(costs)
+    picked = []
+    # Highest similarity of each candidate to any picked chunk
+    max_similarity = np.zeros(len(scores))
+    available = np.ones(len(scores), dtype=bool)
+    spent = 0
+
+    while len(picked) < k:
+        eligible = available & (spent + costs <= budget) if picked else available
+        if not eligible.any():
+            break  # Nothing left fits the budget
+        candidates = np.flatnonzero(eligible)
+        score = lambda_ * scores[candidates] - (1 - lambda_) * max_similarity[candidates]
+        best = int(candidates[np.argmax(score)])  # Ties go to the lower index
+
+        picked.append(best)
+        available[best] = False
+        spent += int(costs[best])
+        if units is not None and has_vector[best]:
+            np.maximum(max_similarity, units @ units[best], out=max_similarity)
+
+    return picked
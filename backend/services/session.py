@@ -6,96 +6,88 @@ Handles chat session creation and management.
 
 import uuid as uuid_lib
 from backend.database import get_db_pool
-from backend.config import DEFAULT_SYSTEM_PROMPT
 
 
-async def get_or_create_session(
-    session_identifier: str, client_id: uuid_lib.UUID
-) -> uuid_lib.UUID:
-    """Get existing session or create new one"""
-    db_pool = get_db_pool()
-    
-    async with db_pool.acquire() as conn:
-        # Try to get existing session
-        session = await conn.fetchrow(
-            """
-            SELECT id FROM chat_sessions
-            WHERE user_identifier = $1 AND client_id = $2
-        """,
-            session_identifier,
-            client_id,
-        )
-
-        if session:
-            return session["id"]
-
-        # Create new session
-        new_session = await conn.fetchrow(
-            """
-            INSERT INTO chat_sessions (client_id, user_identifier)
-            VALUES ($1, $2)
-            RETURNING id
-        """,
-            client_id,
-            session_identifier,
-        )
-
-        return new_session["id"]
-
+async def load_chat_turn(
+    session_identifier: str, client_id: uuid_lib.UUID, history_limit: int = 5
+) -> tuple:
+    """
+    Upsert the session and read its recent history in one statement.
 
-async def get_chat_history(session_id: uuid_lib.UUID, limit: int = 5) -> list:
-    """Get recent chat history for session"""
+    Returns (session_id, history) with history in chronological order.
+    Relies on the UNIQUE (client_id, user_identifier) constraint.
+    """
     db_pool = get_db_pool()
     
     async with db_pool.acquire() as conn:
-        messages = await conn.fetch(
-            """
-            SELECT role, content
-            FROM chat_messages
-            WHERE session_id = $1
-            ORDER BY created_at DESC
-            LIMIT $2
-        """,
-            session_id,
-            limit,
-        )
-
-        # Return in chronological order (oldest first)
-        return list(reversed(messages))
-
+        # Second attempt only happens when a concurrent request inserted
+        # the same session between our SELECT and INSERT
+        for _ in range(2):
+            rows = await conn.fetch(
+                """
+                WITH existing AS (
+                    SELECT id FROM chat_sessions
+                    WHERE user_identifier = $1 AND client_id = $2
+                ),
+                inserted AS (
+                    INSERT INTO chat_sessions (client_id, user_identifier)
+                    SELECT $2, $1
+                    WHERE NOT EXISTS (SELECT 1 FROM existing)
+                    ON CONFLICT (client_id, user_identifier) DO NOTHING
+                    RETURNING id
+                ),
+                session AS (
+                    SELECT id FROM existing
+                    UNION ALL
+                    SELECT id FROM inserted
+                )
+                SELECT s.id AS session_id, h.role, h.content
+                FROM session s
+                LEFT JOIN LATERAL (
+                    SELECT role, content, created_at
+                    FROM chat_messages
+                    WHERE session_id = s.id
+                    ORDER BY created_at DESC
+                    LIMIT $3
+                ) h ON true
+                ORDER BY h.created_at
+            """,
+                session_identifier,
+                client_id,
+                history_limit,
+            )
+            if rows:
+                break
+        else:
+            raise RuntimeError("Could not create chat session")
+
+        history = [
+            {"role": r["role"], "content": r["content"]}
+            for r in rows
+            if r["role"] is not None
+        ]
+        return rows[0]["session_id"], history
+
+
+async def save_chat_turn(session_id: uuid_lib.UUID, messages: list):
+    """
+    Persist a finished chat turn in one statement.
 
-async def save_message(
-    session_id: uuid_lib.UUID, role: str, content: str, token_count: int = 0
-):
-    """Save message to database"""
+    Args:
+        session_id: Chat session UUID
+        messages: List of (role, content, token_count) tuples
+    """
     db_pool = get_db_pool()
     
     async with db_pool.acquire() as conn:
-        await conn.execute(
+        # executemany runs in an implicit transaction: both rows or neither
+        await conn.executemany(
             """
             INSERT INTO chat_messages (session_id, role, content, token_count, created_at)
-            VALUES ($1, $2, $3, $4, NOW())
+            VALUES ($1, $2, $3, $4, clock_timestamp())
         """,
-            session_id,
-            role,
-            content,
-            token_count,
-        )
-
-
-async def get_client_prompt(client_id: uuid_lib.UUID) -> str:
-    """
-    Load client-specific system prompt from database.
-    Returns client's custom prompt if set, otherwise returns DEFAULT_SYSTEM_PROMPT.
-    """
-    db_pool = get_db_pool()
-    
-    async with db_pool.acquire() as conn:
-        result = await conn.fetchval(
-            "SELECT system_prompt FROM clients WHERE id = $1",
-            client_id
+            [(session_id, role, content, tokens) for role, content, tokens in messages],
         )
-        return result if result else DEFAULT_SYSTEM_PROMPT
 
 
 async def get_template_message(client_id: uuid_lib.UUID) -> str:
@@ -4,35 +4,242 @@ Usage Logging Service
 Handles API usage tracking and analytics.
 """
 
+import asyncio
+import time
 import uuid as uuid_lib
+import asyncpg
 from backend.database import get_db_pool
+from backend.config import (
+    USAGE_QUEUE_SIZE,
+    USAGE_BATCH_SIZE,
+    USAGE_FLUSH_INTERVAL_MS,
+    USAGE_ENQUEUE_TIMEOUT,
+    USAGE_FLUSH_RETRIES,
+    USAGE_RETRY_BACKOFF_MS,
+)
+
+USAGE_COLUMNS = ["client_id", "api_key_id", "endpoint", "tokens_in", "tokens_out"]
+
+# Errors caused by a record itself: retrying the same COPY cannot succeed
+RECORD_ERRORS = (asyncpg.IntegrityConstraintViolationError, asyncpg.DataError)
+
+
+async def insert_usage(
+    conn,
+    client_id: uuid_lib.UUID,
+    api_key_id,
+    endpoint: str,
+    tokens_in: int,
+    tokens_out: int,
+):
+    """Insert one usage row on an existing connection / transaction"""
+    await conn.execute(
+        """
+        INSERT INTO usage_logs (client_id, api_key_id, endpoint, tokens_in, tokens_out)
+        VALUES ($1, $2, $3, $4, $5)
+    """,
+        client_id,
+        api_key_id,
+        endpoint,
+        tokens_in,
+        tokens_out,
+    )
+
+
+class UsageLogger:
+    """
+    Write-behind usage logger.
+
+    Events are queued in memory and a background task flushes them with
+    COPY, either when `batch_size` events are pending or every
+    `flush_interval_ms`. When the queue is full, producers wait up to
+    `enqueue_timeout` seconds (backpressure) and then fall back to an
+    inline INSERT so no usage row is lost.
+
+    COPY is all-or-nothing, so a failed flush is retried with exponential
+    backoff (`flush_retries` times, starting at `retry_backoff_ms`), and
+    then written row by row: a bad record (e.g. its API key was deleted)
+    only loses itself, not the whole batch.
+    """
+
+    def __init__(
+        self,
+        max_queue: int = USAGE_QUEUE_SIZE,
+        batch_size: int = USAGE_BATCH_SIZE,
+        flush_interval_ms: int = USAGE_FLUSH_INTERVAL_MS,
+        enqueue_timeout: float = USAGE_ENQUEUE_TIMEOUT,
+        flush_retries: int = USAGE_FLUSH_RETRIES,
+        retry_backoff_ms: int = USAGE_RETRY_BACKOFF_MS,
+    ):
+        self.max_queue = max_queue
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval_ms / 1000
+        self.enqueue_timeout = enqueue_timeout
+        self.flush_retries = flush_retries
+        self.retry_backoff = retry_backoff_ms / 1000
+        self.queue = None
+        self._task = None
+
+        # Metrics
+        self.events_logged = 0
+        self.events_inline = 0
+        self.events_failed = 0
+        self.events_row_by_row = 0
+        self.flush_retries_total = 0
+        self.flushes = 0
+        self.last_flush_ms = 0.0
+        self.max_flush_ms = 0.0
+        self.total_flush_ms = 0.0
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    async def start(self):
+        """Start the background flush task. Called on app startup."""
+        if self.running:
+            return
+        self.queue = asyncio.Queue(maxsize=self.max_queue)
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """Flush everything still queued and stop. Called on app shutdown."""
+        if not self.running:
+            return
+        await self.queue.put(None)  # Shutdown marker, queued after pending events
+        await self._task
+        self._task = None
+
+    async def log(self, record: tuple):
+        """Queue one usage record (ordered as USAGE_COLUMNS)"""
+        if not self.running:
+            await self._insert_inline(record)
+            return
+
+        try:
+            await asyncio.wait_for(self.queue.put(record), timeout=self.enqueue_timeout)
+        except asyncio.TimeoutError:
+            # Queue stayed full: write through rather than drop the event
+            await self._insert_inline(record)
+
+    async def _insert_inline(self, record: tuple):
+        db_pool = get_db_pool()
+        async with db_pool.acquire() as conn:
+            await insert_usage(conn, *record)
+        self.events_inline += 1
+
+    async def _run(self):
+        """Collect events into batches and flush on size or interval"""
+        stopping = False
+        while not stopping:
+            batch = []
+            deadline = time.monotonic() + self.flush_interval
+
+            while len(batch) < self.batch_size:
+                timeout = deadline - time.monotonic()
+                if timeout <= 0:
+                    break
+                try:
+                    record = await asyncio.wait_for(self.queue.get(), timeout=timeout)
+                except asyncio.TimeoutError:
+                    break
+                if record is None:
+                    stopping = True
+                    break
+                batch.append(record)
+
+            if batch:
+                await self._flush(batch)
+
+    async def _flush(self, batch: list):
+        """Write a batch; never let a failure kill the flush task"""
+        started = time.perf_counter()
+        try:
+            await self._copy(batch)
+            self.events_logged += len(batch)
+        except Exception as e:
+            print(f"⚠️  Usage COPY failed ({len(batch)} events), inserting row by row: {e}")
+            await self._insert_rows(batch)
+        finally:
+            elapsed_ms = (time.perf_counter() - started) * 1000
+            self.flushes += 1
+            self.last_flush_ms = elapsed_ms
+            self.total_flush_ms += elapsed_ms
+            self.max_flush_ms = max(self.max_flush_ms, elapsed_ms)
+
+    async def _copy(self, batch: list):
+        """COPY the batch, retrying transient failures with exponential backoff"""
+        for attempt in range(self.flush_retries + 1):
+            try:
+                db_pool = get_db_pool()
+                async with db_pool.acquire() as conn:
+                    await conn.copy_records_to_table(
+                        "usage_logs", records=batch, columns=USAGE_COLUMNS
+                    )
+                return
+            except RECORD_ERRORS:
+                raise
+            except Exception as e:
+                if attempt == self.flush_retries:
+                    raise
+                delay = self.retry_backoff * 2 ** attempt
+                self.flush_retries_total += 1
+                print(f"⚠️  Usage flush failed, retrying in {delay:.1f}s: {e}")
+                await asyncio.sleep(delay)
+
+    async def _insert_rows(self, batch: list):
+        """
+        Insert records one by one so only the bad ones are lost.
+        (executemany would not help here: asyncpg runs it atomically.)
+        """
+        processed = 0
+        try:
+            db_pool = get_db_pool()
+            async with db_pool.acquire() as conn:
+                for record in batch:
+                    try:
+                        await insert_usage(conn, *record)
+                        self.events_logged += 1
+                        self.events_row_by_row += 1
+                    except asyncpg.PostgresError as e:
+                        self.events_failed += 1
+                        print(f"❌ Usage event dropped ({e}): {record}")
+                    processed += 1
+        except Exception as e:
+            self.events_failed += len(batch) - processed
+            print(f"❌ Usage flush failed ({len(batch) - processed} events dropped): {e}")
+
+    def stats(self) -> dict:
+        """Queue depth and flush metrics for monitoring"""
+        return {
+            "running": self.running,
+            "queue_depth": self.queue.qsize() if self.queue else 0,
+            "queue_max": self.max_queue,
+            "events_logged": self.events_logged,
+            "events_inline": self.events_inline,
+            "events_failed": self.events_failed,
+            "events_row_by_row": self.events_row_by_row,
+            "flush_retries": self.flush_retries_total,
+            "flushes": self.flushes,
+            "last_flush_ms": round(self.last_flush_ms, 2),
+            "max_flush_ms": round(self.max_flush_ms, 2),
+            "avg_flush_ms": round(self.total_flush_ms / self.flushes, 2) if self.flushes else 0.0,
+        }
+
+
+# Global usage logger (started and drained in lifespan)
+usage_logger = UsageLogger()
 
 
 async def log_usage(
     client_id: uuid_lib.UUID,
-    api_key: str,
+    api_key_id,
     endpoint: str,
     tokens_in: int,
     tokens_out: int,
 ):
-    """Log API usage for analytics"""
-    db_pool = get_db_pool()
-    
-    async with db_pool.acquire() as conn:
-        # Get api_key ID from key_hash
-        api_key_row = await conn.fetchrow(
-            "SELECT id FROM api_keys WHERE key_hash = $1", api_key
-        )
-
-        if api_key_row:
-            await conn.execute(
-                """
-                INSERT INTO usage_logs (client_id, api_key_id, endpoint, tokens_in, tokens_out)
-                VALUES ($1, $2, $3, $4, $5)
-            """,
-                client_id,
-                api_key_row["id"],  # Use api_keys.id, not client_id
-                endpoint,
-                tokens_in,
-                tokens_out,
-            )
+    """
+    Log API usage for analytics (write-behind, batched).
+    api_key_id is api_keys.id (from verify_api_key), not the key itself.
+    """
+    await usage_logger.log((client_id, api_key_id, endpoint, tokens_in, tokens_out))
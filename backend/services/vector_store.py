@@ -0,0 +1,84 @@
+"""
+Vector Store Service
+
+ChromaDB client and a per-process registry of client collection handles.
+"""
+
+import asyncio
+import chromadb
+from backend.config import VECTOR_DB_DIR
+from backend.database import get_db_pool
+
+# Initialize ChromaDB client
+chroma_client = chromadb.PersistentClient(path=VECTOR_DB_DIR)
+
+
+def collection_name_for(client_id) -> str:
+    """ChromaDB collection name used for a client (matches scripts/ingest.py)"""
+    return f"client_{str(client_id).replace('-', '_')}"
+
+
+class CollectionRegistry:
+    """
+    Caches ChromaDB collection handles keyed by client_id.
+
+    Each handle is stored with the client's `collection_version` from
+    Postgres. scripts/ingest.py bumps that version whenever it creates,
+    deletes or rewrites a collection, so a version mismatch means the
+    cached handle is stale and must be looked up again.
+    """
+
+    def __init__(self):
+        self._handles = {}
+        self.hits = 0
+        self.misses = 0
+
+    async def get(self, client_id, version: int = 0):
+        """Return the collection handle, refreshing it if the version changed"""
+        key = str(client_id)
+        cached = self._handles.get(key)
+        if cached is not None and cached[1] == version:
+            self.hits += 1
+            return cached[0]
+
+        self.misses += 1
+        handle = await asyncio.to_thread(
+            chroma_client.get_collection, name=collection_name_for(key)
+        )
+        self._handles[key] = (handle, version)
+        return handle
+
+    def invalidate(self, client_id=None):
+        """Drop one client's handle, or all handles"""
+        if client_id is None:
+            self._handles.clear()
+        else:
+            self._handles.pop(str(client_id), None)
+
+    async def warm_up(self):
+        """Load handles for all active clients. Called on app startup."""
+        db_pool = get_db_pool()
+        async with db_pool.acquire() as conn:
+            clients = await conn.fetch(
+                "SELECT id, collection_version FROM clients WHERE status = 'active'"
+            )
+
+        loaded = 0
+        for client in clients:
+            try:
+                await self.get(client["id"], client["collection_version"])
+                loaded += 1
+            except Exception:
+                pass  # Client has no collection yet
+        return loaded
+
+    def stats(self) -> dict:
+        return {
+            "handles": len(self._handles),
+            "hits": self.hits,
+            "misses": self.misses,
+        }
+
+
+# Global collection registry
+collection_registry = CollectionRegistry()
@@ -0,0 +1,196 @@
+"""
+Chat Path Round-Trip Benchmark
+
+Counts Postgres round trips and pool acquisitions per /chat request, and
+measures p50/p99 latency of the data-access part of the request, for:
+
+    before  the original per-step queries (API key lookup, session
+            SELECT + INSERT, history, client prompt, two message INSERTs,
+            usage lookup + INSERT), reproduced here verbatim
+    after   verify_api_key (cached), load_chat_turn, save_chat_turn and the
+            write-behind usage logger (its COPY flushes are included in
+            the counts, amortized over the requests)
+
+LLM and retrieval are left out; they are the same for both paths.
+
+Needs the app database (DATABASE_* settings in .env) and an active API key.
+Rows written by the benchmark are deleted at the end.
+
+Usage (from the project root):
+    python -m bench.chat_round_trips --api-key <key> [--requests 500] [--concurrency 10]
+"""
+
+import argparse
+import asyncio
+import uuid
+
+import asyncpg
+
+from backend import database
+from backend.config import DB_CONFIG
+from bench.common import CountingPool, Timer, summarize_ms
+
+SESSION_PREFIX = "bench-rt-"
+ENDPOINT = "/bench"
+TURNS_PER_SESSION = 3
+
+
+# ---------------- Before: original data access, one acquisition per step
+
+async def legacy_request(pool, api_key: str, session_identifier: str):
+    async with pool.acquire() as conn:
+        row = await conn.fetchrow(
+            """
+            SELECT ak.client_id, ak.rate_limit_per_minute, c.name as client_name, c.plan, c.status
+            FROM api_keys ak
+            JOIN clients c ON ak.client_id = c.id
+            WHERE ak.key_hash = $1 AND ak.is_active = true AND c.status = 'active'
+        """,
+            api_key,
+        )
+    client_id = row["client_id"]
+
+    async with pool.acquire() as conn:
+        session = await conn.fetchrow(
+            "SELECT id FROM chat_sessions WHERE user_identifier = $1 AND client_id = $2",
+            session_identifier,
+            client_id,
+        )
+        if session:
+            session_id = session["id"]
+        else:
+            session_id = await conn.fetchval(
+                "INSERT INTO chat_sessions (client_id, user_identifier) VALUES ($1, $2) RETURNING id",
+                client_id,
+                session_identifier,
+            )
+
+    async with pool.acquire() as conn:
+        await conn.fetch(
+            """
+            SELECT role, content FROM chat_messages
+            WHERE session_id = $1 ORDER BY created_at DESC LIMIT $2
+        """,
+            session_id,
+            5,
+        )
+
+    async with pool.acquire() as conn:
+        await conn.fetchval("SELECT system_prompt FROM clients WHERE id = $1", client_id)
+
+    for role, content in (("user", "berapa harga instal ulang?"), ("assistant", "Rp 150.000")):
+        async with pool.acquire() as conn:
+            await conn.execute(
+                """
+                INSERT INTO chat_messages (session_id, role, content, token_count, created_at)
+                VALUES ($1, $2, $3, $4, NOW())
+            """,
+                session_id,
+                role,
+                content,
+                10,
+            )
+
+    async with pool.acquire() as conn:
+        api_key_row = await conn.fetchrow("SELECT id FROM api_keys WHERE key_hash = $1", api_key)
+        if api_key_row:
+            await conn.execute(
+                """
+                INSERT INTO usage_logs (client_id, api_key_id, endpoint, tokens_in, tokens_out)
+                VALUES ($1, $2, $3, $4, $5)
+            """,
+                client_id,
+                api_key_row["id"],
+                ENDPOINT,
+                10,
+                3,
+            )
+
+
+# ---------------- After: current data access layer
+
+async def current_request(pool, api_key: str, session_identifier: str):
+    from backend.dependencies import verify_api_key
+    from backend.services.session import load_chat_turn, save_chat_turn
+    from backend.services.usage import log_usage
+
+    client_info = await verify_api_key(api_key)
+    session_id, _ = await load_chat_turn(session_identifier, client_info["client_id"])
+    await save_chat_turn(
+        session_id,
+        [("user", "berapa harga instal ulang?", 10), ("assistant", "Rp 150.000", 3)],
+    )
+    await log_usage(client_info["client_id"], client_info["api_key_id"], ENDPOINT, 10, 3)
+
+
+# ---------------- Runner
+
+async def run(request_fn, counting: CountingPool, api_key: str, requests: int, concurrency: int):
+    timer = Timer()
+    gate = asyncio.Semaphore(concurrency)
+    run_id = uuid.uuid4().hex[:8]
+
+    async def one(i: int):
+        session_identifier = f"{SESSION_PREFIX}{run_id}-{i // TURNS_PER_SESSION}"
+        async with gate:
+            with timer.measure():
+                await request_fn(counting, api_key, session_identifier)
+
+    counting.counter.clear()
+    await asyncio.gather(*(one(i) for i in range(requests)))
+    return timer
+
+
+async def cleanup(pool):
+    async with pool.acquire() as conn:
+        await conn.execute(
+            """
+            DELETE FROM chat_messages WHERE session_id IN (
+                SELECT id FROM chat_sessions WHERE user_identifier LIKE $1
+            )
+        """,
+            SESSION_PREFIX + "%",
+        )
+        await conn.execute("DELETE FROM chat_sessions WHERE user_identifier LIKE $1", SESSION_PREFIX + "%")
+        await conn.execute("DELETE FROM usage_logs WHERE endpoint = $1", ENDPOINT)
+
+
+def report(label: str, timer: Timer, counting: CountingPool, requests: int):
+    counter = counting.counter
+    print(
+        f"{label:<7} round trips/request {counter['round_trips'] / requests:5.2f}   "
+        f"acquisitions/request {counter['acquisitions'] / requests:5.2f}   "
+        f"{summarize_ms(timer.samples)}"
+    )
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--api-key", required=True)
+    parser.add_argument("--requests", type=int, default=500)
+    parser.add_argument("--concurrency", type=int, default=10)
+    args = parser.parse_args()
+
+    pool = await asyncpg.create_pool(**DB_CONFIG, min_size=2, max_size=10)
+    counting = CountingPool(pool)
+    database.db_pool = counting  # Service functions use get_db_pool()
+
+    from backend.dependencies import api_key_cache
+    from backend.services.usage import usage_logger
+
+    try:
+        before = await run(legacy_request, counting, args.api_key, args.requests, args.concurrency)
+        report("before", before, counting, args.requests)
+
+        api_key_cache.clear()
+        await usage_logger.start()
+        after = await run(current_request, counting, args.api_key, args.requests, args.concurrency)
+        await usage_logger.stop()  # Include the batched usage flushes in the counts
+        report("after", after, counting, args.requests)
+    finally:
+        await cleanup(pool)
+        await pool.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,163 @@
+"""
+Multi-Turn Chat Benchmark
+
+Plays the same 10-turn conversation against Ollama in three modes and
+reports per turn the prompt tokens Ollama evaluated (prompt_eval_count)
+and the time to first token, plus totals:
+
+    generate  flat /api/generate prompt with history, resent every turn
+    context   /api/generate continuing the previous turn's KV `context`
+              (SESSION_CONTEXT_CARRYOVER): only context chunks and the
+              question are sent after the first turn, with the same
+              budget fallback as the /chat route
+    chat      /api/chat messages (stable prefix, Ollama's prompt cache)
+
+Context chunks come from the `data/Toko ABC (Test)` corpus, ranked with
+the hashing embedder of retrieval_hit_rate.py so every mode gets the same
+chunks without Chroma or Postgres. Prompts are built with build_prompt()
+for --plan. Modes run one after the other on fresh sessions; with several
+generate servers use --url so all turns hit the same one.
+
+Usage (from the project root):
+    python -m bench.chat_turns [--turns 10] [--plan pro] [--top-k 4] [--url http://localhost:11434]
+"""
+
+import argparse
+import asyncio
+import time
+
+from backend.services import ollama
+from backend.services.backend_pool import BackendPool
+from backend.services.prompt import build_prompt, estimate_tokens
+from bench.common import percentile
+from bench.retrieval_hit_rate import CORPUS_DIR, cosine, create_chunker, hashing_embed, load_corpus
+
+SYSTEM_PROMPT = (
+    "Kamu adalah asisten customer service Toko ABC, toko servis laptop di Banda Aceh. "
+    "Jawab singkat dan ramah dalam bahasa Indonesia, hanya berdasarkan konteks."
+)
+CONVERSATION = [
+    "halo, toko buka hari apa saja?",
+    "jam berapa tutupnya?",
+    "berapa harga instal ulang windows?",
+    "sudah termasuk lisensi?",
+    "kalau linux berapa?",
+    "laptop saya lemot, sebaiknya upgrade ram atau ganti ssd?",
+    "berapa biaya jasa ganti ssd?",
+    "data saya dipindahkan juga?",
+    "cek kerusakan bayar tidak?",
+    "alamat toko di mana?",
+]
+HISTORY_LIMIT = 5  # Messages loaded per turn, as load_chat_turn does
+MODES = ("generate", "context", "chat")
+
+
+class Retriever:
+    def __init__(self, top_k: int):
+        chunker = create_chunker("title+row")
+        self.chunks = [c for title, content in load_corpus(CORPUS_DIR) for c in chunker.split(title, content)]
+        self.vectors = [hashing_embed(c) for c in self.chunks]
+        self.top_k = top_k
+
+    def __call__(self, question: str) -> list:
+        q = hashing_embed(question)
+        ranked = sorted(range(len(self.chunks)), key=lambda i: cosine(q, self.vectors[i]), reverse=True)
+        return [self.chunks[i] for i in ranked[: self.top_k]]
+
+
+async def timed_stream(fragments) -> tuple:
+    """(reply, time to first token, total time) of a streaming call"""
+    started = time.perf_counter()
+    first = None
+    reply = ""
+    async for text in fragments:
+        if first is None:
+            first = time.perf_counter() - started
+        reply += text
+    return reply, first or 0.0, time.perf_counter() - started
+
+
+async def play(mode: str, turns: int, plan: str, retrieve) -> list:
+    messages = []  # Full conversation, oldest first
+    carried = None  # (reply, context) of the previous generate turn
+    results = []
+    for question in CONVERSATION[:turns]:
+        history = messages[-HISTORY_LIMIT:]
+        built = build_prompt(SYSTEM_PROMPT, history, retrieve(question), question, plan)
+        usage = {}
+        continued = False
+        if mode == "chat":
+            fragments = ollama.stream_chat(built["messages"], usage)
+        else:
+            prompt, context = built["prompt"], None
+            if (
+                mode == "context"
+                and carried
+                and history
+                and history[-1]["content"] == carried[0]
+                and len(carried[1]) + estimate_tokens(built["turn_prompt"]) <= built["budget"]
+            ):
+                prompt, context, continued = built["turn_prompt"], carried[1], True
+            fragments = ollama.stream_generate(prompt, usage, context)
+        reply, first_token, total = await timed_stream(fragments)
+        if usage.get("context"):
+            carried = (reply, usage["context"])
+        messages += [{"role": "user", "content": question}, {"role": "assistant", "content": reply}]
+        results.append(
+            {
+                "prompt_eval": usage.get("prompt_eval_count") or 0,
+                "estimated": built["tokens"],
+                "first_token": first_token,
+                "total": total,
+                "continued": continued,
+            }
+        )
+    return results
+
+
+async def run(args):
+    if args.url:
+        ollama.generate_pool = BackendPool("generate", [args.url])
+    retrieve = Retriever(args.top_k)
+    results = {}
+    try:
+        # Load the model (and open the connection) before anything is timed
+        await ollama.generate("halo")
+        for mode in MODES:
+            results[mode] = await play(mode, args.turns, args.plan, retrieve)
+    finally:
+        await ollama.close_http_client()
+
+    print(f"{args.turns} turns, plan={args.plan}, top_k={args.top_k}")
+    print("prompt_eval_count / time to first token per turn (* = continued KV context)\n")
+    print("turn " + "".join(f"{mode:>24}" for mode in MODES))
+    for turn in range(args.turns):
+        cells = ""
+        for mode in MODES:
+            r = results[mode][turn]
+            mark = "*" if r["continued"] else " "
+            cells += f"{r['prompt_eval']:>11}{mark} {r['first_token'] * 1000:>8.0f} ms"
+        print(f"{turn + 1:>4} {cells}")
+    print()
+    for mode in MODES:
+        rows = results[mode]
+        first_tokens = [r["first_token"] * 1000 for r in rows]
+        totals = [r["total"] for r in rows]
+        print(
+            f"{mode:<9} prompt_eval total {sum(r['prompt_eval'] for r in rows):>6}   "
+            f"first token p50 {percentile(first_tokens, 0.5):7.0f} ms  max {max(first_tokens):7.0f} ms   "
+            f"turn total {sum(totals):6.1f} s"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--turns", type=int, default=len(CONVERSATION), choices=range(1, len(CONVERSATION) + 1))
+    parser.add_argument("--plan", default="pro")
+    parser.add_argument("--top-k", type=int, default=4)
+    parser.add_argument("--url", help="Single generate server (default: OLLAMA_GENERATE_URLS)")
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
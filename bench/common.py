@@ -0,0 +1,84 @@
+"""
+Benchmark Helpers
+
+Shared timing and round-trip counting utilities for the bench/ scripts.
+"""
+
+import time
+from collections import Counter
+from contextlib import asynccontextmanager, contextmanager
+from backend.metrics import percentile
+
+# asyncpg connection methods that each cost one round trip to Postgres
+QUERY_METHODS = (
+    "fetch",
+    "fetchrow",
+    "fetchval",
+    "execute",
+    "executemany",
+    "copy_records_to_table",
+)
+
+
+def summarize_ms(seconds: list) -> str:
+    """p50 / p99 / max of durations given in seconds, formatted in ms"""
+    ms = [s * 1000 for s in seconds]
+    return (
+        f"p50 {percentile(ms, 0.5):8.2f} ms   p99 {percentile(ms, 0.99):8.2f} ms   "
+        f"max {max(ms):8.2f} ms"
+    )
+
+
+class Timer:
+    """Collects wall-clock durations into `samples` (safe for concurrent tasks)"""
+
+    def __init__(self):
+        self.samples = []
+
+    @contextmanager
+    def measure(self):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.samples.append(time.perf_counter() - started)
+
+
+class CountingConnection:
+    """asyncpg connection proxy counting queries (and BEGIN/COMMIT) as round trips"""
+
+    def __init__(self, conn, counter: Counter):
+        self._conn = conn
+        self._counter = counter
+
+    def transaction(self, **kwargs):
+        self._counter["round_trips"] += 2  # BEGIN + COMMIT
+        return self._conn.transaction(**kwargs)
+
+    def __getattr__(self, name):
+        attr = getattr(self._conn, name)
+        if name not in QUERY_METHODS:
+            return attr
+
+        async def counted(*args, **kwargs):
+            self._counter["round_trips"] += 1
+            return await attr(*args, **kwargs)
+
+        return counted
+
+
+class CountingPool:
+    """asyncpg pool proxy counting acquisitions and round trips"""
+
+    def __init__(self, pool):
+        self._pool = pool
+        self.counter = Counter()
+
+    @asynccontextmanager
+    async def acquire(self):
+        self.counter["acquisitions"] += 1
+        async with self._pool.acquire() as conn:
+            yield CountingConnection(conn, self.counter)
+
+    def __getattr__(self, name):
+        return getattr(self._pool, name)
@@ -0,0 +1,108 @@
+"""
+Embedding Batch Size Benchmark
+
+Embeds the same chunks through scripts/ingest.py's embed_batch() with
+batch sizes 1 / 8 / 32 / 64 and reports per batch size:
+- throughput in chunks/s
+- request latency p50 / p99 / max
+
+Chunks come from the `data/Toko ABC (Test)` corpus (title+row chunker),
+repeated up to --chunks. Requests go out with ingest.py's settings: one
+pooled keep-alive client and at most INGEST_EMBED_CONCURRENCY in flight.
+
+By default they hit a local fake server (tests/fake_ollama.py) that takes
+--request-ms per request plus --item-ms per chunk, so the numbers show
+how batching amortizes per-request overhead, not model speed. Use --url
+to measure a real Ollama server (e.g. to pick EMBED_BATCH_SIZE).
+
+Usage (from the project root):
+    python -m bench.embed_batch [--batch-sizes 1,8,32,64] [--chunks 512]
+        [--request-ms 20] [--item-ms 2] [--url http://localhost:11434]
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+import httpx
+
+from bench.common import Timer, summarize_ms
+from bench.retrieval_hit_rate import CORPUS_DIR, create_chunker, load_corpus
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, "tests"))
+
+import ingest  # noqa: E402 (scripts/ is on the path via bench.retrieval_hit_rate)
+from fake_ollama import FakeOllama  # noqa: E402
+
+
+def load_chunks(count: int) -> list:
+    chunker = create_chunker("title+row")
+    chunks = [c for title, content in load_corpus(CORPUS_DIR) for c in chunker.split(title, content)]
+    return [chunks[i % len(chunks)] for i in range(count)]
+
+
+async def measure(chunks: list, batch_size: int) -> dict:
+    """Embed `chunks` with EMBED_CONCURRENCY workers, like ingest.py's embed stage"""
+    timer = Timer()
+    batches = [chunks[i : i + batch_size] for i in range(0, len(chunks), batch_size)]
+    pending = iter(batches)
+
+    async def worker():
+        for batch in pending:
+            with timer.measure():
+                await ingest.embed_batch(batch)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(ingest.EMBED_CONCURRENCY)))
+    wall = time.perf_counter() - started
+    return {"requests": len(batches), "wall": wall, "latencies": timer.samples}
+
+
+async def run_against(url: str, args):
+    ingest.OLLAMA_EMBED_URL = url.rstrip("/") + "/api/embed"
+    ingest.http_client = httpx.AsyncClient(
+        limits=httpx.Limits(
+            max_connections=ingest.EMBED_CONCURRENCY, max_keepalive_connections=ingest.EMBED_CONCURRENCY
+        )
+    )
+    ingest.embed_semaphore = asyncio.Semaphore(ingest.EMBED_CONCURRENCY)
+    chunks = load_chunks(args.chunks)
+    try:
+        await ingest.embed_batch(chunks[:1])  # Open the connection (and load the model) first
+        print(f"{len(chunks)} chunks, {ingest.EMBED_CONCURRENCY} requests in flight at most\n")
+        for size in args.batch_sizes:
+            result = await measure(chunks, size)
+            print(
+                f"batch {size:>3}  {len(chunks) / result['wall']:8.1f} chunks/s   "
+                f"{result['requests']:>4} requests   {summarize_ms(result['latencies'])}"
+            )
+    finally:
+        await ingest.http_client.aclose()
+
+
+async def run(args):
+    if args.url:
+        await run_against(args.url, args)
+        return
+    print(f"fake embedding server: {args.request_ms:g} ms per request + {args.item_ms:g} ms per chunk")
+    async with FakeOllama(delay=args.request_ms / 1000, item_delay=args.item_ms / 1000, dim=768) as fake:
+        await run_against(fake.url, args)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument(
+        "--batch-sizes", type=lambda v: [int(x) for x in v.split(",")], default=[1, 8, 32, 64]
+    )
+    parser.add_argument("--chunks", type=int, default=512)
+    parser.add_argument("--request-ms", type=float, default=20.0, help="Fake server: cost per request")
+    parser.add_argument("--item-ms", type=float, default=2.0, help="Fake server: cost per chunk")
+    parser.add_argument("--url", help="Real Ollama server instead of the fake one")
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,126 @@
+"""
+Embedding Cache Replay Benchmark
+
+Replays a query log through the embedding cache and reports:
+- hit ratio (memory / disk / miss) and embed calls saved
+- get_or_embed() latency p50 / p99
+- disk tier rows and evictions against --max-rows
+
+The log is replayed twice on the same SQLite file: the second pass is a
+restart with an empty memory tier, which shows what the disk tier keeps.
+
+Without --log, a synthetic customer-service log is generated: questions
+drawn from a Zipf distribution, with random case and whitespace changes.
+Embeddings come from a fake embedder with --embed-ms latency, or from the
+configured Ollama servers with --ollama.
+
+Usage (from the project root):
+    python -m bench.embedding_cache_replay [--log queries.txt] [--queries 20000]
+        [--memory-size 5000] [--max-rows 50000] [--embed-ms 30] [--ollama]
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import tempfile
+import time
+
+from backend.services import ollama
+from backend.services.embedding_cache import EmbeddingCache
+from bench.common import summarize_ms
+
+TOPICS = [
+    "harga instal ulang windows", "jam buka toko", "garansi laptop", "ongkos kirim ke bandung",
+    "servis printer", "ganti lcd laptop", "upgrade ram", "ganti keyboard laptop",
+    "cara pembayaran", "lokasi toko", "harga ssd 512gb", "bersihkan virus",
+]
+TEMPLATES = ["berapa {}?", "{} berapa ya", "mau tanya {}", "info {} dong", "{}"]
+
+
+def synthetic_log(n: int, distinct: int, seed: int = 42) -> list:
+    """n queries over `distinct` questions, Zipf-distributed, with case/spacing noise"""
+    rng = random.Random(seed)
+    questions = [
+        TEMPLATES[i % len(TEMPLATES)].format(f"{TOPICS[i % len(TOPICS)]} {i // len(TOPICS) or ''}".strip())
+        for i in range(distinct)
+    ]
+    weights = [1 / (rank + 1) for rank in range(distinct)]
+    log = []
+    for question in rng.choices(questions, weights, k=n):
+        if rng.random() < 0.3:
+            question = question.upper()
+        if rng.random() < 0.3:
+            question = "  " + question.replace(" ", "  ")
+        log.append(question)
+    return log
+
+
+def fake_embedder(delay_ms: float, dim: int = 768):
+    async def embed(text: str) -> list:
+        await asyncio.sleep(delay_ms / 1000)
+        return [float(len(text))] * dim
+
+    return embed
+
+
+async def replay(cache: EmbeddingCache, log: list, embed) -> list:
+    latencies = []
+    for query in log:
+        started = time.perf_counter()
+        await cache.get_or_embed(query, embed)
+        latencies.append(time.perf_counter() - started)
+    return latencies
+
+
+def report(label: str, cache: EmbeddingCache, latencies: list):
+    s = cache.stats()
+    print(f"{label}")
+    print(
+        f"  hit ratio {s['hit_ratio']:.1%}   memory hits {s['memory_hits']}   "
+        f"disk hits {s['disk_hits']}   embed calls {s['misses']}"
+    )
+    print(f"  disk rows {s['disk_rows']} / {s['disk_max_rows']}   evictions {s['disk_evictions']}")
+    print(f"  get_or_embed  {summarize_ms(latencies)}\n")
+
+
+async def run(args):
+    if args.log:
+        with open(args.log, encoding="utf-8") as f:
+            log = [line.strip() for line in f if line.strip()]
+    else:
+        log = synthetic_log(args.queries, args.distinct)
+    embed = ollama.embed if args.ollama else fake_embedder(args.embed_ms)
+    print(f"{len(log)} queries, {len(set(log))} distinct strings\n")
+
+    path = os.path.join(tempfile.mkdtemp(prefix="embed-cache-bench-"), "cache.sqlite3")
+    try:
+        baseline = await replay(EmbeddingCache("bench", maxsize=1, path=None), log[:500], embed)
+        print(f"no cache (first 500 queries)\n  embed  {summarize_ms(baseline)}\n")
+
+        cold = EmbeddingCache("bench", args.memory_size, path, args.max_rows)
+        report("cold start", cold, await replay(cold, log, embed))
+        cold.close()
+
+        warm = EmbeddingCache("bench", args.memory_size, path, args.max_rows)
+        report("restart (disk tier only)", warm, await replay(warm, log, embed))
+        warm.close()
+    finally:
+        if args.ollama:
+            await ollama.close_http_client()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--log", help="Query log, one query per line")
+    parser.add_argument("--queries", type=int, default=20_000)
+    parser.add_argument("--distinct", type=int, default=3_000)
+    parser.add_argument("--memory-size", type=int, default=5000)
+    parser.add_argument("--max-rows", type=int, default=50_000)
+    parser.add_argument("--embed-ms", type=float, default=30.0)
+    parser.add_argument("--ollama", action="store_true", help="Embed with the configured Ollama servers")
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,155 @@
+"""
+Hybrid Retrieval Benchmark
+
+Offline comparison of vector-only retrieval against vector + full-text
+search fused with reciprocal rank fusion (the HYBRID_SEARCH_ENABLED path),
+on the `data/Toko ABC (Test)` corpus and the labelled questions of
+bench/retrieval_hit_rate.py. Reports per path:
+- recall@2 / @4 / @8: share of questions whose answer is in the top k
+- retrieval latency p50 / p99 (query embedding + ranking + fusion)
+
+Chunks use the ingest default strategy (title+row). The lexical ranking
+runs in Postgres by default: chunks are loaded into a temporary table with
+the same generated 'simple' tsvector and ts_rank_cd query as
+lexical_search.py (DATABASE_* settings; nothing persistent is written).
+`--lexical memory` ranks by matched query terms in process instead, for
+smoke runs without Postgres. Embeddings come from Ollama unless
+`--embedder hashing` is given (see retrieval_hit_rate.py).
+
+Usage (from the project root):
+    python -m bench.hybrid_retrieval [--embedder ollama|hashing] [--lexical postgres|memory]
+        [--candidates 10] [--rrf-k 60]
+"""
+
+import argparse
+import asyncio
+import re
+import time
+
+from backend.config import DB_CONFIG, HYBRID_CANDIDATES, HYBRID_RRF_K
+from backend.services import ollama
+from backend.services.lexical_search import build_tsquery, reciprocal_rank_fusion
+from bench.common import summarize_ms
+from bench.retrieval_hit_rate import CORPUS_DIR, QUESTIONS, cosine, create_chunker, embed_all, load_corpus
+
+K_VALUES = (2, 4, 8)
+_TERM = re.compile(r"\w+", re.UNICODE)
+
+
+class PostgresLexical:
+    """Full-text ranking over a temporary copy of the chunks"""
+
+    async def load(self, chunks: list):
+        import asyncpg
+
+        self.conn = await asyncpg.connect(**DB_CONFIG)
+        await self.conn.execute(
+            """
+            CREATE TEMP TABLE bench_chunks (
+                id TEXT PRIMARY KEY,
+                content TEXT NOT NULL,
+                search_vector tsvector GENERATED ALWAYS AS (to_tsvector('simple', content)) STORED
+            )
+            """
+        )
+        await self.conn.copy_records_to_table(
+            "bench_chunks", records=[(str(i), c) for i, c in enumerate(chunks)], columns=["id", "content"]
+        )
+
+    async def search(self, query: str, limit: int) -> list:
+        tsquery = build_tsquery(query)
+        if not tsquery:
+            return []
+        rows = await self.conn.fetch(
+            """
+            SELECT c.id FROM bench_chunks c, to_tsquery('simple', $1) AS q
+            WHERE c.search_vector @@ q
+            ORDER BY ts_rank_cd(c.search_vector, q) DESC
+            LIMIT $2
+            """,
+            tsquery,
+            limit,
+        )
+        return [r["id"] for r in rows]
+
+    async def close(self):
+        await self.conn.close()
+
+
+class MemoryLexical:
+    """Distinct matched query terms, then term frequency (smoke runs only)"""
+
+    async def load(self, chunks: list):
+        self.terms = [_TERM.findall(c.lower()) for c in chunks]
+
+    async def search(self, query: str, limit: int) -> list:
+        query_terms = set(build_tsquery(query).split(" | ")) - {""}
+        scored = []
+        for i, terms in enumerate(self.terms):
+            matched = query_terms.intersection(terms)
+            if matched:
+                scored.append((len(matched), sum(terms.count(t) for t in matched), -i))
+        scored.sort(reverse=True)
+        return [str(-i) for _, _, i in scored[:limit]]
+
+    async def close(self):
+        pass
+
+
+async def vector_ranking(question: str, chunk_vectors: list, limit: int, embedder: str) -> list:
+    [q_vec] = await embed_all([question], embedder)
+    ranked = sorted(range(len(chunk_vectors)), key=lambda i: cosine(q_vec, chunk_vectors[i]), reverse=True)
+    return [str(i) for i in ranked[:limit]]
+
+
+async def run(args):
+    chunker = create_chunker("title+row")
+    chunks = [c for title, content in load_corpus(args.corpus) for c in chunker.split(title, content)]
+    lexical = PostgresLexical() if args.lexical == "postgres" else MemoryLexical()
+    print(
+        f"{len(chunks)} chunks, {len(QUESTIONS)} questions, embedder={args.embedder}, "
+        f"lexical={args.lexical}, candidates={args.candidates}, rrf_k={args.rrf_k}\n"
+    )
+    try:
+        chunk_vectors = await embed_all(chunks, args.embedder)
+        await lexical.load(chunks)
+
+        results = {"vector": ([], {k: 0 for k in K_VALUES}), "hybrid": ([], {k: 0 for k in K_VALUES})}
+        for question, answer in QUESTIONS:
+            for path in results:
+                started = time.perf_counter()
+                if path == "vector":
+                    ids = await vector_ranking(question, chunk_vectors, max(K_VALUES), args.embedder)
+                else:
+                    # Same shape as chat.retrieve: both rankings concurrently, then RRF
+                    dense, keyword = await asyncio.gather(
+                        vector_ranking(question, chunk_vectors, args.candidates, args.embedder),
+                        lexical.search(question, args.candidates),
+                    )
+                    ids = [i for i, _ in reciprocal_rank_fusion([dense, keyword], args.rrf_k)]
+                latencies, hits = results[path]
+                latencies.append(time.perf_counter() - started)
+                for k in K_VALUES:
+                    hits[k] += any(answer in chunks[int(i)].lower() for i in ids[:k])
+
+        for path, (latencies, hits) in results.items():
+            recall = "   ".join(f"recall@{k} {hits[k] / len(QUESTIONS):4.0%}" for k in K_VALUES)
+            print(f"{path:<8}{recall}")
+            print(f"{'':<8}{summarize_ms(latencies)}\n")
+    finally:
+        await lexical.close()
+        await ollama.close_http_client()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--corpus", default=CORPUS_DIR)
+    parser.add_argument("--embedder", choices=["ollama", "hashing"], default="ollama")
+    parser.add_argument("--lexical", choices=["postgres", "memory"], default="postgres")
+    parser.add_argument("--candidates", type=int, default=HYBRID_CANDIDATES)
+    parser.add_argument("--rrf-k", type=int, default=HYBRID_RRF_K)
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
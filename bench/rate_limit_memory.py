@@ -0,0 +1,116 @@
+"""
+Rate Limiter Microbenchmark
+
+Simulates traffic from up to 100k API keys and reports, per limiter:
+- traced memory after 10k / 50k / 100k distinct keys
+- bytes per key
+- allow() latency p50 / p99
+
+The original limiter (a defaultdict of timestamp deques) is included as
+the baseline. With `--max-keys` below the number of keys, the bounded
+limiters stop growing once the cap is reached.
+
+Pure Python, no services needed. Usage (from the project root):
+    python -m bench.rate_limit_memory [--keys 100000] [--requests-per-key 10] [--max-keys 100000]
+"""
+
+import argparse
+import time
+import tracemalloc
+from collections import defaultdict, deque
+
+from backend.rate_limit import create_limiter
+from bench.common import percentile
+
+LIMIT = 60  # requests per minute
+CHECKPOINTS = (10_000, 50_000, 100_000)
+
+
+class DequeLimiter:
+    """The original limiter: one deque of timestamps per key, never evicted"""
+
+    mode = "deque (original)"
+
+    def __init__(self):
+        self.store = defaultdict(deque)
+
+    def __len__(self) -> int:
+        return len(self.store)
+
+    def allow(self, key: str, limit: int, burst: int = 0, now: float = None) -> bool:
+        window = self.store[key]
+        while window and window[0] <= now - 60:
+            window.popleft()
+        if len(window) >= limit:
+            return False
+        window.append(now)
+        return True
+
+
+def simulate(limiter, keys: int, requests_per_key: int, on_key=None):
+    """Each key sends `requests_per_key` requests spread over one minute"""
+    now = 0.0
+    step = 60.0 / requests_per_key
+    for i in range(keys):
+        key = f"key-{i}"
+        for r in range(requests_per_key):
+            limiter.allow(key, LIMIT, 0, now + r * step)
+        now += 0.001  # Keys arrive spread over time, like real traffic
+        if on_key:
+            on_key(i + 1)
+
+
+def measure_memory(limiter, keys: int, requests_per_key: int) -> dict:
+    """Traced memory held by the limiter at each checkpoint"""
+    memory = {}
+    tracemalloc.start()
+    baseline = tracemalloc.get_traced_memory()[0]
+
+    def checkpoint(n: int):
+        if n in CHECKPOINTS:
+            memory[n] = tracemalloc.get_traced_memory()[0] - baseline
+
+    simulate(limiter, keys, requests_per_key, checkpoint)
+    tracemalloc.stop()
+    return memory
+
+
+def measure_latency(limiter, samples: int = 200_000) -> list:
+    """allow() latency in microseconds on a limiter already full of keys"""
+    latencies = []
+    keys = max(1, len(limiter))
+    now = 120.0
+    for i in range(samples):
+        key = f"key-{(i * 7919) % keys}"
+        started = time.perf_counter_ns()
+        limiter.allow(key, LIMIT, 0, now)
+        latencies.append((time.perf_counter_ns() - started) / 1000)
+        now += 0.0001
+    return latencies
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--keys", type=int, default=100_000)
+    parser.add_argument("--requests-per-key", type=int, default=10)
+    parser.add_argument("--max-keys", type=int, default=100_000)
+    args = parser.parse_args()
+
+    limiters = [
+        DequeLimiter(),
+        create_limiter("token_bucket", max_keys=args.max_keys),
+        create_limiter("sliding_window", max_keys=args.max_keys),
+    ]
+    print(f"{args.keys} keys x {args.requests_per_key} requests, max_keys={args.max_keys}\n")
+    for limiter in limiters:
+        result = measure_memory(limiter, args.keys, args.requests_per_key)
+        lat = measure_latency(limiter)
+        memory = "   ".join(f"{n // 1000}k keys {b / 1e6:6.1f} MB" for n, b in result.items())
+        last_keys, last_bytes = max(result.items())
+        print(f"{limiter.mode}")
+        print(f"  memory   {memory}   ({last_bytes / last_keys:.0f} B/key)")
+        print(f"  allow()  p50 {percentile(lat, 0.5):.2f} us   p99 {percentile(lat, 0.99):.2f} us\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,176 @@
+"""
+Retrieval Hit Rate Benchmark
+
+Chunks the `data/Toko ABC (Test)` CSVs with each chunking strategy, embeds
+the chunks and a set of labelled questions, and reports for k = 2 / 4 / 8:
+- hit rate: share of questions whose answer appears in the top-k chunks
+- average context size (characters sent to the LLM)
+
+A question counts as a hit when its expected answer text is found in one
+of the retrieved chunks, so this measures whether a fact survives
+chunking intact and ranks high enough, not answer quality.
+
+Embeddings come from the configured Ollama embedding servers (same model
+and endpoint as live queries). `--embedder hashing` uses a hashed
+bag-of-words vector instead, for smoke runs without Ollama; its numbers
+say nothing about the real model.
+
+With --rerank, the top k are picked the way retrieve() does with
+RERANK_ENABLED: MMR over the RERANK_CANDIDATES nearest chunks within
+CONTEXT_TOKEN_BUDGET. Compare both runs before enabling reranking.
+
+Usage (from the project root):
+    python -m bench.retrieval_hit_rate [--strategies fixed,sentence,row,title+row]
+        [--size 500] [--overlap 1] [--embedder ollama|hashing] [--rerank]
+"""
+
+import argparse
+import asyncio
+import csv
+import hashlib
+import math
+import os
+import re
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "scripts"))
+
+from chunking import create_chunker  # noqa: E402
+
+from backend.config import CONTEXT_TOKEN_BUDGET, MMR_LAMBDA, RERANK_CANDIDATES  # noqa: E402
+from backend.services import ollama  # noqa: E402
+from backend.services.prompt import estimate_tokens  # noqa: E402
+from backend.services.rerank import mmr_select  # noqa: E402
+
+CORPUS_DIR = os.path.join("data", "Toko ABC (Test)")
+K_VALUES = (2, 4, 8)
+
+# (question, text that must appear in a retrieved chunk)
+QUESTIONS = [
+    ("berapa harga instal ulang windows?", "rp150.000"),
+    ("berapa lama instal ulang windows?", "30 sampai 60 menit"),
+    ("instal ulang linux berapa?", "rp100.000"),
+    ("biaya upgrade ram berapa?", "rp50.000"),
+    ("ganti ssd harganya berapa?", "rp75.000"),
+    ("apakah data pindah kalau ganti ssd?", "migrasi data dari hdd ke ssd"),
+    ("berapa biaya bersihin laptop yang panas?", "rp80.000"),
+    ("cek kerusakan bayar tidak?", "gratis"),
+    ("apakah harga sudah termasuk komponen?", "belum termasuk komponen fisik"),
+    ("harga instal windows sudah termasuk lisensi?", "belum termasuk lisensi windows"),
+    ("apakah data saya aman?", "konfirmasi sebelum menghapus data"),
+    ("bisa ditunggu di toko?", "layanan ringan"),
+    ("hari minggu buka?", "senin sampai sabtu"),
+    ("jam buka toko jam berapa?", "08:00 - 20:00"),
+    ("alamat toko di mana?", "jl. contoh no. 123"),
+    ("distro linux apa saja yang tersedia?", "ubuntu, mint, fedora"),
+    ("laptop saya kena virus, bisa dibersihkan?", "membersihkan virus dan malware"),
+    ("bisa ganti thermal paste?", "thermal paste"),
+    ("sejak kapan toko abc berdiri?", "sejak tahun 2018"),
+    ("siapa target pelanggan toko abc?", "pelajar, mahasiswa, umkm"),
+    ("apa visi toko abc?", "servis terpercaya"),
+    ("laptop blue screen bisa diperbaiki?", "blue screen"),
+]
+
+
+def load_corpus(directory: str) -> list:
+    """(title, content) for every CSV row, like upload_documents.py"""
+    documents = []
+    for name in sorted(os.listdir(directory)):
+        if not name.endswith(".csv"):
+            continue
+        with open(os.path.join(directory, name), newline="", encoding="utf-8") as f:
+            for row in csv.DictReader(f):
+                title = (row.get("title") or "").strip()
+                content = (row.get("content") or "").strip()
+                if title and content:
+                    documents.append((title, content))
+    return documents
+
+
+def hashing_embed(text: str, dim: int = 512) -> list:
+    """Hashed bag of words and word bigrams (offline smoke runs only)"""
+    words = re.findall(r"\w+", text.lower())
+    vector = [0.0] * dim
+    for token in words + [f"{a} {b}" for a, b in zip(words, words[1:])]:
+        vector[int(hashlib.md5(token.encode()).hexdigest(), 16) % dim] += 1.0
+    return vector
+
+
+def cosine(a: list, b: list) -> float:
+    dot = sum(x * y for x, y in zip(a, b))
+    norm = math.sqrt(sum(x * x for x in a)) * math.sqrt(sum(y * y for y in b))
+    return dot / norm if norm else 0.0
+
+
+async def embed_all(texts: list, embedder: str) -> list:
+    if embedder == "hashing":
+        return [hashing_embed(t) for t in texts]
+    return list(await asyncio.gather(*(ollama.embed(t) for t in texts)))
+
+
+async def evaluate(strategy: str, documents: list, question_vectors: list, args) -> dict:
+    chunker = create_chunker(strategy, args.size, args.overlap)
+    chunks = [chunk for title, content in documents for chunk in chunker.split(title, content)]
+    chunk_vectors = await embed_all(chunks, args.embedder)
+
+    hits = {k: 0 for k in K_VALUES}
+    context_chars = {k: 0 for k in K_VALUES}
+    costs = [estimate_tokens(chunk) for chunk in chunks]
+    for (_, answer), q_vec in zip(QUESTIONS, question_vectors):
+        similarity = [cosine(q_vec, v) for v in chunk_vectors]
+        ranked = sorted(range(len(chunks)), key=lambda i: similarity[i], reverse=True)
+        for k in K_VALUES:
+            if args.rerank:
+                pool = ranked[: max(k, RERANK_CANDIDATES)]
+                order = mmr_select(
+                    [similarity[i] for i in pool],
+                    [chunk_vectors[i] for i in pool],
+                    [costs[i] for i in pool],
+                    k,
+                    CONTEXT_TOKEN_BUDGET,
+                    MMR_LAMBDA,
+                )
+                top = [chunks[pool[i]] for i in order]
+            else:
+                top = [chunks[i] for i in ranked[:k]]
+            hits[k] += any(answer in chunk.lower() for chunk in top)
+            context_chars[k] += sum(len(chunk) for chunk in top)
+    n = len(QUESTIONS)
+    return {
+        "chunks": len(chunks),
+        "hit_rate": {k: hits[k] / n for k in K_VALUES},
+        "context_chars": {k: context_chars[k] / n for k in K_VALUES},
+    }
+
+
+async def run(args):
+    documents = load_corpus(args.corpus)
+    rerank = f", MMR rerank of {RERANK_CANDIDATES} within {CONTEXT_TOKEN_BUDGET} tokens" if args.rerank else ""
+    print(f"{len(documents)} documents, {len(QUESTIONS)} questions, embedder={args.embedder}{rerank}\n")
+    try:
+        question_vectors = await embed_all([q for q, _ in QUESTIONS], args.embedder)
+        header = "   ".join(f"k={k} hit  ctx chars" for k in K_VALUES)
+        print(f"{'strategy':<16}{'chunks':>7}   {header}")
+        for strategy in args.strategies.split(","):
+            result = await evaluate(strategy.strip(), documents, question_vectors, args)
+            cells = "   ".join(
+                f"{result['hit_rate'][k]:7.0%} {result['context_chars'][k]:10.0f}" for k in K_VALUES
+            )
+            print(f"{strategy:<16}{result['chunks']:>7}   {cells}")
+    finally:
+        await ollama.close_http_client()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--corpus", default=CORPUS_DIR)
+    parser.add_argument("--strategies", default="fixed,sentence,row,title+sentence,title+row")
+    parser.add_argument("--size", type=int, default=500)
+    parser.add_argument("--overlap", type=int, default=1)
+    parser.add_argument("--embedder", choices=["ollama", "hashing"], default="ollama")
+    parser.add_argument("--rerank", action="store_true", help="Pick the top k by MMR like RERANK_ENABLED")
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
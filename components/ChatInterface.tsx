@@ -82,7 +82,7 @@ export default function ChatInterface() {
     setLoading(true);
 
     try {
-      const response = await fetch("http://localhost:8000/chat", {
+      const response = await fetch("http://localhost:8000/chat/stream", {
         method: "POST",
         headers: {
           "Content-Type": "application/json",
@@ -94,15 +94,62 @@ export default function ChatInterface() {
         }),
       });
 
-      if (!response.ok) {
+      if (!response.ok || !response.body) {
         throw new Error(`Error: ${response.status}`);
       }
 
-      const data = await response.json();
-      setLoading(false);
+      // Read Server-Sent Events and render tokens as they arrive
+      const reader = response.body.getReader();
+      const decoder = new TextDecoder();
+      let buffer = "";
+      let reply = "";
+      let failed = false;
+
+      while (true) {
+        const { value, done } = await reader.read();
+        if (done) break;
+        buffer += decoder.decode(value, { stream: true });
+
+        // SSE frames are separated by a blank line
+        const frames = buffer.split("\n\n");
+        buffer = frames.pop() || "";
+
+        for (const frame of frames) {
+          let event = "message";
+          let data = "";
+          for (const line of frame.split("\n")) {
+            if (line.startsWith("event: ")) event = line.slice(7);
+            else if (line.startsWith("data: ")) data += line.slice(6);
+          }
+          if (!data) continue;
+          const payload = JSON.parse(data);
+
+          if (event === "error") {
+            failed = true;
+          } else if (event === "done") {
+            reply = payload.reply ?? reply;
+          } else if (payload.token) {
+            if (!reply) {
+              setLoading(false);
+              setIsTyping(true);
+            }
+            reply += payload.token;
+            setTypingMessage(reply);
+          }
+        }
+      }
 
-      // Use typewriter effect for assistant response
-      typewriterEffect(data.reply || "Tidak ada respons.");
+      if (failed) {
+        throw new Error("Stream error");
+      }
+
+      setLoading(false);
+      setIsTyping(false);
+      setTypingMessage("");
+      setMessages((prev) => [
+        ...prev,
+        { role: "assistant", content: reply.trim() || "Tidak ada respons." },
+      ]);
     } catch (error) {
       console.error("Error:", error);
       setLoading(false);
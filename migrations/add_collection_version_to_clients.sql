@@ -0,0 +1,12 @@
+-- Add collection_version column to clients table
+-- Bumped by scripts/ingest.py whenever a client's ChromaDB collection changes,
+-- so API workers know to refresh their cached collection handles
+
+BEGIN;
+
+ALTER TABLE clients
+ADD COLUMN IF NOT EXISTS collection_version INTEGER NOT NULL DEFAULT 0;
+
+COMMENT ON COLUMN clients.collection_version IS 'Incremented on every vector collection rebuild or update';
+
+COMMIT;
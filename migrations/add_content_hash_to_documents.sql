@@ -0,0 +1,21 @@
+-- Add content_hash columns to documents and document_chunks
+-- Used by scripts/ingest.py for incremental re-ingestion: unchanged documents
+-- are skipped and only chunks whose content changed are re-embedded
+
+BEGIN;
+
+ALTER TABLE documents
+ADD COLUMN IF NOT EXISTS content_hash TEXT;
+
+ALTER TABLE document_chunks
+ADD COLUMN IF NOT EXISTS content_hash TEXT;
+
+COMMENT ON COLUMN documents.content_hash IS 'SHA-256 of chunker version + content at the last completed ingest (NULL = never ingested)';
+COMMENT ON COLUMN document_chunks.content_hash IS 'SHA-256 of the chunk content';
+
+-- Existing chunks predate hashing: fill them so they are not re-embedded needlessly
+UPDATE document_chunks
+SET content_hash = encode(sha256(convert_to(content, 'UTF8') || '\x00'::bytea), 'hex')
+WHERE content_hash IS NULL;
+
+COMMIT;
@@ -0,0 +1,48 @@
+-- Add ingest job tracking tables
+-- scripts/ingest.py records each run as a job with per-document progress,
+-- so a crashed or failed ingest resumes where it stopped instead of
+-- requiring a clean reprocess
+
+BEGIN;
+
+CREATE TABLE IF NOT EXISTS ingest_jobs (
+    id UUID PRIMARY KEY DEFAULT gen_random_uuid(),
+    client_id UUID NOT NULL REFERENCES clients(id) ON DELETE CASCADE,
+    source_filter TEXT,
+    status TEXT NOT NULL DEFAULT 'pending'
+        CHECK (status IN ('pending', 'running', 'completed', 'failed', 'cancelled')),
+    total_documents INTEGER NOT NULL DEFAULT 0,
+    processed_documents INTEGER NOT NULL DEFAULT 0,
+    chunks_embedded INTEGER NOT NULL DEFAULT 0,
+    error TEXT,
+    created_at TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+    started_at TIMESTAMPTZ,
+    updated_at TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+    finished_at TIMESTAMPTZ
+);
+
+CREATE INDEX IF NOT EXISTS idx_ingest_jobs_client_status
+ON ingest_jobs (client_id, status, created_at DESC);
+
+-- Per-document state machine:
+--   pending -> chunked (changed chunks queued for embedding) -> done
+--   pending -> done    (no chunk needed re-embedding)
+--   pending -> skipped (content hash unchanged)
+-- On resume, 'chunked' documents go back to 'pending'
+CREATE TABLE IF NOT EXISTS ingest_job_documents (
+    job_id UUID NOT NULL REFERENCES ingest_jobs(id) ON DELETE CASCADE,
+    document_id UUID NOT NULL REFERENCES documents(id) ON DELETE CASCADE,
+    state TEXT NOT NULL DEFAULT 'pending'
+        CHECK (state IN ('pending', 'chunked', 'done', 'skipped')),
+    chunks INTEGER NOT NULL DEFAULT 0,
+    updated_at TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+    PRIMARY KEY (job_id, document_id)
+);
+
+CREATE INDEX IF NOT EXISTS idx_ingest_job_documents_state
+ON ingest_job_documents (job_id, state);
+
+COMMENT ON TABLE ingest_jobs IS 'Ingestion runs (scripts/ingest.py), resumable while running or failed';
+COMMENT ON COLUMN ingest_job_documents.chunks IS 'Changed chunks queued for embedding in this job';
+
+COMMIT;
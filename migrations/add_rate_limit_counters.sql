@@ -0,0 +1,18 @@
+-- Shared rate limit counters for multi-worker / multi-node deployments
+-- Used when RATE_LIMIT_BACKEND=postgres (sliding window counter per API key)
+
+BEGIN;
+
+-- UNLOGGED: counters are short-lived and need not survive a crash
+CREATE UNLOGGED TABLE IF NOT EXISTS rate_limit_counters (
+    key TEXT NOT NULL,
+    window_start BIGINT NOT NULL,  -- epoch seconds, aligned to 60s windows
+    count INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (key, window_start)
+);
+
+-- Speeds up cleanup of expired windows
+CREATE INDEX IF NOT EXISTS idx_rate_limit_counters_window_start
+ON rate_limit_counters(window_start);
+
+COMMIT;
@@ -0,0 +1,18 @@
+-- Add full-text search column to document_chunks
+-- Used by hybrid retrieval (backend/services/lexical_search.py). The column is
+-- generated, so every chunk written by scripts/ingest.py is indexed automatically
+
+BEGIN;
+
+ALTER TABLE document_chunks
+ADD COLUMN IF NOT EXISTS search_vector tsvector
+GENERATED ALWAYS AS (to_tsvector('simple', COALESCE(content, ''))) STORED;
+
+CREATE INDEX IF NOT EXISTS idx_document_chunks_search_vector
+ON document_chunks USING GIN (search_vector);
+
+-- Lexical search filters chunks by client through documents
+CREATE INDEX IF NOT EXISTS idx_documents_client_id
+ON documents (client_id);
+
+COMMIT;
@@ -0,0 +1,13 @@
+-- Add source_exact column to ingest_jobs
+-- Jobs queued by the API filter documents by their exact source; jobs
+-- started from the ingest.py command line keep substring matching
+-- (e.g. "faq.csv" matches "Toko ABC_faq.csv")
+
+BEGIN;
+
+ALTER TABLE ingest_jobs
+ADD COLUMN IF NOT EXISTS source_exact BOOLEAN NOT NULL DEFAULT false;
+
+COMMENT ON COLUMN ingest_jobs.source_exact IS 'Match source_filter with equality instead of LIKE';
+
+COMMIT;
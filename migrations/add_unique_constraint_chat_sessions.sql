@@ -0,0 +1,28 @@
+-- Add UNIQUE constraint on chat session identity per client
+-- Lets the chat path upsert its session in a single statement
+
+BEGIN;
+
+-- Remove duplicate sessions created by concurrent first requests,
+-- keeping one per (client, identifier) and moving its messages over
+WITH ranked AS (
+    SELECT id,
+           MIN(id::text) OVER (PARTITION BY client_id, user_identifier)::uuid AS keep_id
+    FROM chat_sessions
+)
+UPDATE chat_messages m
+SET session_id = r.keep_id
+FROM ranked r
+WHERE m.session_id = r.id
+  AND r.id <> r.keep_id;
+
+DELETE FROM chat_sessions s
+USING chat_sessions k
+WHERE s.client_id = k.client_id
+  AND s.user_identifier = k.user_identifier
+  AND k.id::text < s.id::text;
+
+ALTER TABLE chat_sessions
+ADD CONSTRAINT chat_sessions_client_user_unique UNIQUE (client_id, user_identifier);
+
+COMMIT;
@@ -0,0 +1,41 @@
+-- Add UNIQUE constraint on document identity per client
+-- Lets scripts/upload_documents.py upsert on (client_id, source, title),
+-- so re-running an upload no longer duplicates documents
+
+BEGIN;
+
+-- Remove duplicate documents created by earlier re-uploads,
+-- keeping the oldest copy of each (client, source, title)
+WITH ranked AS (
+    SELECT id,
+           ROW_NUMBER() OVER (
+               PARTITION BY client_id, source, title
+               ORDER BY created_at, id::text
+           ) AS rn
+    FROM documents
+)
+DELETE FROM document_chunks dc
+USING ranked r
+WHERE dc.document_id = r.id
+  AND r.rn > 1;
+
+WITH ranked AS (
+    SELECT id,
+           ROW_NUMBER() OVER (
+               PARTITION BY client_id, source, title
+               ORDER BY created_at, id::text
+           ) AS rn
+    FROM documents
+)
+DELETE FROM documents d
+USING ranked r
+WHERE d.id = r.id
+  AND r.rn > 1;
+
+ALTER TABLE documents
+ADD CONSTRAINT documents_client_source_title_unique UNIQUE (client_id, source, title);
+
+COMMIT;
+
+-- Vectors of the removed duplicate chunks are cleaned up by the next
+-- `python scripts/ingest.py` run (orphan vector reconciliation)
@@ -0,0 +1,171 @@
+"""
+Chunking Strategies - Used by ingest.py
+
+Splits a document (title + content) into chunks for embedding. Strategies
+respect word, sentence and row boundaries instead of slicing every N
+characters, so facts are not cut in half and fewer chunks need to be
+retrieved per question.
+
+Strategies:
+    fixed       Every `size` characters (legacy behaviour)
+    sentence    Sentences packed up to `size` characters, last `overlap`
+                sentences repeated at the start of the next chunk
+    row         Whole document as one chunk (one CSV row from
+                upload_documents.py); falls back to `sentence` when longer
+                than `size`
+    title+<s>   Any strategy above, with the document title prefixed to
+                every chunk (e.g. "title+row")
+
+Each chunker has a `signature` that identifies the strategy and its
+parameters; ingest.py stores it in document hashes so changing the
+strategy re-chunks every document on the next run.
+"""
+
+import re
+from abc import ABC, abstractmethod
+
+# Sentence end: . ! ? (optionally followed by quotes/brackets) then whitespace, or a line break
+_SENTENCE_END = re.compile(r"(?<=[.!?])[\"')\]]*\s+|\n+")
+_WHITESPACE = re.compile(r"\s+")
+
+
+def split_sentences(text: str) -> list:
+    """Split text into sentences, dropping empty pieces"""
+    return [s.strip() for s in _SENTENCE_END.split(text) if s and s.strip()]
+
+
+def split_words(text: str, size: int) -> list:
+    """Split text at word boundaries into pieces of at most `size` characters"""
+    pieces = []
+    current = ""
+    for word in _WHITESPACE.split(text.strip()):
+        if not word:
+            continue
+        # A single word longer than size is hard-sliced
+        while len(word) > size:
+            if current:
+                pieces.append(current)
+                current = ""
+            pieces.append(word[:size])
+            word = word[size:]
+        if current and len(current) + 1 + len(word) > size:
+            pieces.append(current)
+            current = word
+        else:
+            current = f"{current} {word}" if current else word
+    if current:
+        pieces.append(current)
+    return pieces
+
+
+class Chunker(ABC):
+    """Base class: split(title, content) -> list of chunk texts"""
+
+    name = "base"
+
+    def __init__(self, size: int = 500, overlap: int = 1):
+        self.size = size
+        self.overlap = overlap
+
+    @property
+    def signature(self) -> str:
+        return f"{self.name}:{self.size}:{self.overlap}"
+
+    @abstractmethod
+    def split(self, title: str, content: str) -> list:
+        """Chunk texts of one document"""
+
+
+class FixedChunker(Chunker):
+    """Every `size` characters, no overlap"""
+
+    name = "fixed"
+
+    @property
+    def signature(self) -> str:
+        return f"{self.name}:{self.size}"
+
+    def split(self, title: str, content: str) -> list:
+        return [content[i : i + self.size] for i in range(0, len(content), self.size)]
+
+
+class SentenceChunker(Chunker):
+    """Sentences packed up to `size` characters with `overlap` sentences of overlap"""
+
+    name = "sentence"
+
+    def split(self, title: str, content: str) -> list:
+        # Over-long sentences are broken at word boundaries first
+        units = []
+        for sentence in split_sentences(content):
+            units.extend(split_words(sentence, self.size) if len(sentence) > self.size else [sentence])
+
+        chunks = []
+        window = []  # Sentences of the chunk being built
+        length = 0
+        fresh = 0  # Sentences in window not yet emitted in a previous chunk
+        for unit in units:
+            if window and length + 1 + len(unit) > self.size:
+                chunks.append(" ".join(window))
+                window = window[-self.overlap:] if self.overlap else []
+                length = sum(len(s) + 1 for s in window) - 1 if window else 0
+                fresh = 0
+                # Drop overlap that would not leave room for the next sentence
+                while window and length + 1 + len(unit) > self.size:
+                    length -= len(window.pop(0)) + 1
+            window.append(unit)
+            length = length + 1 + len(unit) if length else len(unit)
+            fresh += 1
+        if fresh:
+            chunks.append(" ".join(window))
+        return chunks
+
+
+class RowChunker(SentenceChunker):
+    """One chunk per document (CSV row); long documents fall back to sentence splitting"""
+
+    name = "row"
+
+    def split(self, title: str, content: str) -> list:
+        content = content.strip()
+        if len(content) <= self.size:
+            return [content] if content else []
+        return super().split(title, content)
+
+
+class TitlePrefixedChunker(Chunker):
+    """Wraps another chunker and prefixes the document title to every chunk"""
+
+    def __init__(self, inner: Chunker):
+        super().__init__(inner.size, inner.overlap)
+        self.inner = inner
+        self.name = f"title+{inner.name}"
+
+    @property
+    def signature(self) -> str:
+        return f"title+{self.inner.signature}"
+
+    def split(self, title: str, content: str) -> list:
+        title = (title or "").strip()
+        chunks = self.inner.split(title, content)
+        if not title:
+            return chunks
+        return [f"{title}\n{chunk}" for chunk in chunks]
+
+
+CHUNKERS = {
+    FixedChunker.name: FixedChunker,
+    SentenceChunker.name: SentenceChunker,
+    RowChunker.name: RowChunker,
+}
+
+
+def create_chunker(strategy: str, size: int = 500, overlap: int = 1) -> Chunker:
+    """Build a chunker from a strategy name such as "sentence" or "title+row" """
+    prefixed = strategy.startswith("title+")
+    base = strategy[len("title+"):] if prefixed else strategy
+    if base not in CHUNKERS:
+        valid = list(CHUNKERS) + [f"title+{name}" for name in CHUNKERS]
+        raise ValueError(f"Unknown chunk strategy: {strategy}. Must be one of: {valid}")
+    chunker = CHUNKERS[base](size=size, overlap=overlap)
+    return TitlePrefixedChunker(chunker) if prefixed else chunker
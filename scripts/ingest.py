@@ -5,21 +5,34 @@ Reads documents from PostgreSQL database and creates embeddings for each client.
 Metadata stored in document_chunks table, vectors stored in ChromaDB with
 separate collections per client.
 
+Re-runs are incremental: each document's content hash is compared with the
+hash stored at its last ingest, and within changed documents only chunks whose
+content hash changed are re-embedded. Chunks and vectors of removed content are
+deleted from both PostgreSQL and ChromaDB.
+
 Usage:
     python ingest.py                                        # Process all clients, all documents
     python ingest.py <client_id_or_name>                    # Process specific client, all documents
     python ingest.py <client_id_or_name> file.csv           # Process specific client, specific source file
     python ingest.py <client_id_or_name> --clean-reprocess YES_DELETE_ALL    # Clean reprocess for client
+    python ingest.py <client_id_or_name> --job-id <job_uuid>               # Run/resume a specific ingest job
+
+Each run is recorded as an ingest job with per-document progress
+(migrations/add_ingest_jobs.sql). If a run crashes or the embedding server
+fails, the next run for the same client resumes the unfinished job.
 """
 
 import sys
 import os
+import time
+import hashlib
 import uuid
 import asyncio
 import asyncpg
-import requests
+import httpx
 import chromadb
 from dotenv import load_dotenv
+from chunking import create_chunker
 
 load_dotenv()
 
@@ -33,30 +46,126 @@ DB_CONFIG = {
 }
 
 VECTOR_DB_DIR = "vectordb"
-OLLAMA_EMBED_URL = "http://localhost:11434/api/embeddings"
+OLLAMA_BASE_URL = os.getenv("OLLAMA_BASE_URL", "http://localhost:11434")
+OLLAMA_EMBED_URL = OLLAMA_BASE_URL + "/api/embed"  # Batch endpoint, accepts input lists
 EMBED_MODEL = "nomic-embed-text"
-CHUNK_SIZE = 500  # Characters per chunk
+EMBED_BATCH_SIZE = int(os.getenv("EMBED_BATCH_SIZE", 32))  # Chunks per embedding request
+EMBED_MAX_RETRIES = int(os.getenv("EMBED_MAX_RETRIES", 4))
+EMBED_RETRY_BACKOFF = float(os.getenv("EMBED_RETRY_BACKOFF", 1.0))  # Seconds, doubled per retry
+CHUNK_STRATEGY = os.getenv("CHUNK_STRATEGY", "title+row")  # See chunking.py
+CHUNK_SIZE = int(os.getenv("CHUNK_SIZE", 500))  # Max characters per chunk (title prefix excluded)
+CHUNK_OVERLAP = int(os.getenv("CHUNK_OVERLAP", 1))  # Sentences repeated between consecutive chunks
+chunker = create_chunker(CHUNK_STRATEGY, CHUNK_SIZE, CHUNK_OVERLAP)
+CHUNKER_VERSION = chunker.signature  # Part of document hashes: changing the chunker re-chunks everything
+
+# Pipeline concurrency
+CLIENT_CONCURRENCY = int(os.getenv("INGEST_CLIENT_CONCURRENCY", 4))  # Clients processed in parallel
+EMBED_CONCURRENCY = int(os.getenv("INGEST_EMBED_CONCURRENCY", 4))  # Global cap on in-flight embedding requests
+EMBED_WORKERS_PER_CLIENT = int(os.getenv("INGEST_EMBED_WORKERS_PER_CLIENT", 2))
+PIPELINE_QUEUE_SIZE = int(os.getenv("INGEST_QUEUE_SIZE", 8))  # Batches buffered between stages
+DB_POOL_SIZE = int(os.getenv("INGEST_DB_POOL_SIZE", CLIENT_CONCURRENCY * 2 + 2))  # One cursor connection per client + stage connections
+DOCUMENT_PREFETCH = int(os.getenv("INGEST_DOCUMENT_PREFETCH", 50))  # Documents fetched per cursor round trip
+ORPHAN_SCAN_PAGE = 1000  # Vector ids checked per reconciliation query
+JOB_STATE_BATCH = 500  # Unchanged documents recorded per job-state update
+JOB_STALE_AFTER = float(os.getenv("INGEST_STALE_AFTER", 900))  # Seconds without progress before a running job may be taken over
+JOB_DOCUMENTS_RETENTION_DAYS = float(os.getenv("INGEST_JOB_DOCUMENTS_RETENTION_DAYS", 7))  # Per-document rows of unfinished jobs
+
+# Shared resources, created in main()
+http_client = None  # Pooled keep-alive HTTP client for embedding requests
+embed_semaphore = None
+chroma = None
+chroma_lock = None  # ChromaDB writes are synchronous; serialize them in a worker thread
 
 
 # ---------------- HELPERS ----------------
-def embed(text: str):
+async def embed_batch(texts: list):
+    """Generate embeddings for a list of texts in one Ollama request, with retry"""
+    for attempt in range(EMBED_MAX_RETRIES + 1):
+        try:
+            async with embed_semaphore:
+                r = await http_client.post(
+                    OLLAMA_EMBED_URL,
+                    json={"model": EMBED_MODEL, "input": texts},
+                    timeout=60 + 5 * len(texts),
+                )
+            r.raise_for_status()
+            embeddings = r.json()["embeddings"]
+            if len(embeddings) != len(texts):
+                raise ValueError(f"Expected {len(texts)} embeddings, got {len(embeddings)}")
+            return embeddings
+        except Exception as e:
+            if attempt == EMBED_MAX_RETRIES:
+                print(f"❌ Embedding error: {e}")
+                raise
+            delay = EMBED_RETRY_BACKOFF * (2 ** attempt)
+            print(f"     ⚠️  Embedding failed ({e}), retrying in {delay:.1f}s...")
+            await asyncio.sleep(delay)
+
+
+async def embed(text: str):
     """Generate embedding using Ollama"""
-    try:
-        r = requests.post(
-            OLLAMA_EMBED_URL,
-            json={"model": EMBED_MODEL, "prompt": text},
-            timeout=60,
-        )
-        r.raise_for_status()
-        return r.json()["embedding"]
-    except Exception as e:
-        print(f"❌ Embedding error: {e}")
-        raise
+    return (await embed_batch([text]))[0]
+
+
+def chunk_text(title: str, text: str):
+    """Split a document into chunks with the configured strategy"""
+    return chunker.split(title, text)
 
 
-def chunk_text(text: str, size: int = CHUNK_SIZE):
-    """Split text into chunks"""
-    return [text[i : i + size] for i in range(0, len(text), size)]
+def content_hash(*parts: str) -> str:
+    """SHA-256 over the given strings"""
+    h = hashlib.sha256()
+    for part in parts:
+        h.update(part.encode("utf-8"))
+        h.update(b"\0")
+    return h.hexdigest()
+
+
+def diff_chunks(existing: list, chunks: list):
+    """
+    Compare a document's stored chunks with its freshly computed chunks.
+    
+    Args:
+        existing: Rows with id, chunk_index, content_hash (from document_chunks)
+        chunks: New chunk texts, in order
+    
+    Returns:
+        (changed, moved, deleted):
+        - changed: list of (chunk_id, chunk_index, content, hash) to embed and upsert.
+          Reuses the old id at the same index when there is one.
+        - moved: list of (chunk_id, new_index) for unchanged chunks that shifted
+        - deleted: list of chunk ids that no longer exist
+    """
+    unused_by_hash = {}
+    for row in existing:
+        unused_by_hash.setdefault(row['content_hash'], []).append(row)
+    
+    moved = []
+    pending = []
+    for idx, text in enumerate(chunks):
+        h = content_hash(text)
+        matches = unused_by_hash.get(h)
+        if matches:
+            # Identical chunks: keep the row already at this index, else the earliest
+            row = next((r for r in matches if r['chunk_index'] == idx), matches[0])
+            matches.remove(row)
+            if row['chunk_index'] != idx:
+                moved.append((row['id'], idx))
+        else:
+            pending.append((idx, text, h))
+    
+    # Leftover rows are either overwritten in place (same index) or deleted
+    leftover_by_index = {
+        row['chunk_index']: row for rows in unused_by_hash.values() for row in rows
+    }
+    changed = []
+    for idx, text, h in pending:
+        row = leftover_by_index.pop(idx, None)
+        chunk_id = row['id'] if row else uuid.uuid4()
+        changed.append((chunk_id, idx, text, h))
+    deleted = [row['id'] for row in leftover_by_index.values()]
+    
+    return changed, moved, deleted
 
 
 async def get_client_by_name_or_id(conn: asyncpg.Connection, identifier: str):
@@ -80,22 +189,531 @@ async def get_client_by_name_or_id(conn: asyncpg.Connection, identifier: str):
     return client
 
 
+async def bump_collection_version(conn: asyncpg.Connection, client_id):
+    """Signal API workers that this client's collection changed"""
+    await conn.execute(
+        "UPDATE clients SET collection_version = collection_version + 1 WHERE id = $1",
+        client_id
+    )
+
+
+async def store_chunks(pool: asyncpg.Pool, collection, client, chunks: list, embeddings: list):
+    """
+    Upsert a batch of embedded chunks into ChromaDB, then PostgreSQL.
+    Vectors go first so a chunk row in PostgreSQL always has its vector; a crash
+    in between only leaves orphan vectors, which remove_orphan_vectors cleans up.
+    """
+    # Upsert vectors to ChromaDB
+    async with chroma_lock:
+        await asyncio.to_thread(
+            collection.upsert,
+            ids=[str(c['id']) for c in chunks],
+            embeddings=embeddings,
+            metadatas=[
+                {
+                    "client_id": str(client['id']),
+                    "document_id": str(c['document_id']),
+                    "document_title": c['document_title'],
+                    "chunk_index": c['chunk_index'],
+                }
+                for c in chunks
+            ],
+            documents=[c['content'] for c in chunks],
+        )
+    
+    # Bulk upsert chunks to PostgreSQL
+    async with pool.acquire() as conn:
+        await conn.executemany(
+            """
+            INSERT INTO document_chunks (id, document_id, chunk_index, content, content_hash)
+            VALUES ($1, $2, $3, $4, $5)
+            ON CONFLICT (id) DO UPDATE
+            SET chunk_index = EXCLUDED.chunk_index,
+                content = EXCLUDED.content,
+                content_hash = EXCLUDED.content_hash
+            """,
+            [(str(c['id']), str(c['document_id']), c['chunk_index'], c['content'], c['content_hash'])
+             for c in chunks]
+        )
+
+
+async def apply_chunk_changes(conn: asyncpg.Connection, collection, moved: list, deleted: list):
+    """Re-index shifted chunks and drop removed ones, in PostgreSQL and ChromaDB"""
+    if moved:
+        await conn.executemany(
+            "UPDATE document_chunks SET chunk_index = $2 WHERE id = $1",
+            [(str(chunk_id), idx) for chunk_id, idx in moved]
+        )
+        new_index = {str(chunk_id): idx for chunk_id, idx in moved}
+        async with chroma_lock:
+            existing = await asyncio.to_thread(
+                collection.get, ids=list(new_index), include=["metadatas"]
+            )
+            await asyncio.to_thread(
+                collection.update,
+                ids=existing["ids"],
+                metadatas=[
+                    {**metadata, "chunk_index": new_index[vector_id]}
+                    for vector_id, metadata in zip(existing["ids"], existing["metadatas"])
+                ],
+            )
+    
+    if deleted:
+        await conn.execute(
+            "DELETE FROM document_chunks WHERE id = ANY($1::uuid[])",
+            [str(chunk_id) for chunk_id in deleted]
+        )
+        async with chroma_lock:
+            await asyncio.to_thread(collection.delete, ids=[str(chunk_id) for chunk_id in deleted])
+
+
+async def mark_document_synced(conn: asyncpg.Connection, document_id, doc_hash: str):
+    """Record the hash of the content that is now fully embedded"""
+    await conn.execute(
+        "UPDATE documents SET content_hash = $2 WHERE id = $1",
+        document_id,
+        doc_hash
+    )
+
+
+async def remove_orphan_vectors(conn: asyncpg.Connection, collection, client) -> int:
+    """
+    Delete vectors whose chunk no longer exists in PostgreSQL (e.g. deleted documents).
+    Vector ids are checked page by page, so memory does not grow with the collection.
+    """
+    orphans = []
+    offset = 0
+    while True:
+        async with chroma_lock:
+            page = await asyncio.to_thread(
+                collection.get, include=[], limit=ORPHAN_SCAN_PAGE, offset=offset
+            )
+        vector_ids = page["ids"]
+        if not vector_ids:
+            break
+        offset += len(vector_ids)
+        
+        known = await conn.fetch(
+            """
+            SELECT dc.id::text AS id
+            FROM document_chunks dc
+            JOIN documents d ON d.id = dc.document_id
+            WHERE d.client_id = $1 AND dc.id = ANY($2::uuid[])
+            """,
+            client['id'],
+            vector_ids
+        )
+        known_ids = {r['id'] for r in known}
+        orphans.extend(vector_id for vector_id in vector_ids if vector_id not in known_ids)
+    
+    # Deleted after the scan so paging offsets stay valid
+    for i in range(0, len(orphans), ORPHAN_SCAN_PAGE):
+        async with chroma_lock:
+            await asyncio.to_thread(collection.delete, ids=orphans[i : i + ORPHAN_SCAN_PAGE])
+    return len(orphans)
+
+
+async def remove_chunks_without_vectors(conn: asyncpg.Connection, collection, client) -> int:
+    """
+    Delete chunk rows whose vector is missing from ChromaDB and reset their
+    documents' content_hash, so the next pipeline pass re-embeds them.
+    Chunk ids are checked page by page (keyset pagination on id).
+    """
+    missing = 0
+    last_id = None
+    while True:
+        rows = await conn.fetch(
+            """
+            SELECT dc.id::text AS id, dc.document_id
+            FROM document_chunks dc
+            JOIN documents d ON d.id = dc.document_id
+            WHERE d.client_id = $1 AND ($2::uuid IS NULL OR dc.id > $2::uuid)
+            ORDER BY dc.id
+            LIMIT $3
+            """,
+            client['id'],
+            last_id,
+            ORPHAN_SCAN_PAGE
+        )
+        if not rows:
+            break
+        last_id = rows[-1]['id']
+        
+        async with chroma_lock:
+            found = await asyncio.to_thread(
+                collection.get, ids=[r['id'] for r in rows], include=[]
+            )
+        found_ids = set(found["ids"])
+        lost = [r for r in rows if r['id'] not in found_ids]
+        if not lost:
+            continue
+        
+        missing += len(lost)
+        async with conn.transaction():
+            await conn.execute(
+                "DELETE FROM document_chunks WHERE id = ANY($1::uuid[])",
+                [r['id'] for r in lost]
+            )
+            await conn.execute(
+                "UPDATE documents SET content_hash = NULL WHERE id = ANY($1::uuid[])",
+                list({r['document_id'] for r in lost})
+            )
+    return missing
+
+
+# ---------------- JOBS ----------------
+async def start_job(conn: asyncpg.Connection, client, source_filter: str, job_id: str = None, clean_reprocess: bool = False):
+    """
+    Create or resume the ingest job for a client.
+    
+    With job_id, that job is run (e.g. a job queued by the API). Otherwise the
+    latest unfinished job with the same source filter is resumed, or a new one
+    is created. Command-line jobs match the source filter as a substring;
+    API jobs (source_exact) match it exactly. Documents not yet finished in the job are (re)registered as
+    pending, so resuming only processes what the crashed run left behind.
+    
+    Without job_id the job is claimed with a conditional UPDATE, like the API
+    worker does: a running job is only taken over once it made no progress
+    for JOB_STALE_AFTER seconds, so two runs never process the same job.
+    (With job_id the API worker has already claimed it.)
+    
+    Returns:
+        (job_id, resumed); job_id is None if another run holds the job
+    """
+    if clean_reprocess:
+        # Clean reprocess starts over; unfinished jobs are abandoned
+        await conn.execute(
+            """
+            WITH cancelled AS (
+                UPDATE ingest_jobs SET status = 'cancelled', finished_at = NOW(), updated_at = NOW()
+                WHERE client_id = $1 AND status IN ('pending', 'running', 'failed')
+                RETURNING id
+            )
+            DELETE FROM ingest_job_documents WHERE job_id IN (SELECT id FROM cancelled)
+            """,
+            client['id']
+        )
+    
+    if job_id:
+        job = await conn.fetchrow(
+            "SELECT id, status, started_at, source_filter, source_exact FROM ingest_jobs WHERE id = $1 AND client_id = $2",
+            uuid.UUID(str(job_id)),
+            client['id']
+        )
+        if not job:
+            raise ValueError(f"Ingest job {job_id} not found for client {client['name']}")
+    else:
+        job = await conn.fetchrow(
+            """
+            SELECT id, status, started_at, source_filter, source_exact FROM ingest_jobs
+            WHERE client_id = $1
+              AND source_filter IS NOT DISTINCT FROM $2
+              AND NOT source_exact
+              AND status IN ('running', 'failed')
+            ORDER BY created_at DESC
+            LIMIT 1
+            """,
+            client['id'],
+            source_filter
+        )
+        if not job:
+            job = await conn.fetchrow(
+                """
+                INSERT INTO ingest_jobs (client_id, source_filter, status)
+                VALUES ($1, $2, 'pending')
+                RETURNING id, status, started_at, source_filter, source_exact
+                """,
+                client['id'],
+                source_filter
+            )
+        claimed = await conn.fetchval(
+            """
+            UPDATE ingest_jobs SET status = 'running', updated_at = NOW()
+            WHERE id = $1
+              AND (status IN ('pending', 'failed')
+                   OR (status = 'running' AND updated_at < NOW() - make_interval(secs => $2)))
+            RETURNING id
+            """,
+            job['id'],
+            JOB_STALE_AFTER
+        )
+        if claimed is None:
+            return None, False
+    
+    resumed = job['started_at'] is not None
+    
+    async with conn.transaction():
+        # Documents that were mid-flight when the previous run stopped start over
+        await conn.execute(
+            """
+            UPDATE ingest_job_documents SET state = 'pending', updated_at = NOW()
+            WHERE job_id = $1 AND state = 'chunked'
+            """,
+            job['id']
+        )
+        await conn.execute(
+            """
+            INSERT INTO ingest_job_documents (job_id, document_id)
+            SELECT $1, d.id
+            FROM documents d
+            WHERE d.client_id = $2
+              AND ($3::text IS NULL
+                   OR d.source = $3
+                   OR (NOT $4 AND d.source LIKE '%' || $3 || '%'))
+            ON CONFLICT (job_id, document_id) DO NOTHING
+            """,
+            job['id'],
+            client['id'],
+            job['source_filter'],
+            job['source_exact']
+        )
+        await conn.execute(
+            """
+            UPDATE ingest_jobs
+            SET status = 'running',
+                error = NULL,
+                started_at = COALESCE(started_at, NOW()),
+                finished_at = NULL,
+                updated_at = NOW(),
+                total_documents = (SELECT COUNT(*) FROM ingest_job_documents WHERE job_id = $1)
+            WHERE id = $1
+            """,
+            job['id']
+        )
+    return job['id'], resumed
+
+
+async def set_document_states(conn: asyncpg.Connection, job_id, document_ids: list, state: str, chunks: int = None):
+    """Move job documents to a new state (see migrations/add_ingest_jobs.sql)"""
+    await conn.execute(
+        """
+        UPDATE ingest_job_documents
+        SET state = $3, chunks = COALESCE($4, chunks), updated_at = NOW()
+        WHERE job_id = $1 AND document_id = ANY($2::uuid[])
+        """,
+        job_id,
+        document_ids,
+        state,
+        chunks
+    )
+
+
+async def checkpoint_job(conn: asyncpg.Connection, job_id, documents: int, chunks: int):
+    """Add progress counters to the job"""
+    await conn.execute(
+        """
+        UPDATE ingest_jobs
+        SET processed_documents = processed_documents + $2,
+            chunks_embedded = chunks_embedded + $3,
+            updated_at = NOW()
+        WHERE id = $1
+        """,
+        job_id,
+        documents,
+        chunks
+    )
+
+
+async def finish_job(conn: asyncpg.Connection, job_id, error: str = None):
+    """
+    Mark the job completed, or failed (resumable) with the error.
+    A completed job's per-document rows are deleted; its counters stay.
+    """
+    await conn.execute(
+        """
+        WITH finished AS (
+            UPDATE ingest_jobs
+            SET status = $2, error = $3, finished_at = NOW(), updated_at = NOW()
+            WHERE id = $1
+            RETURNING id, status
+        )
+        DELETE FROM ingest_job_documents
+        WHERE job_id IN (SELECT id FROM finished WHERE status = 'completed')
+        """,
+        job_id,
+        "failed" if error else "completed",
+        error
+    )
+
+
+async def run_stages(*stages):
+    """Run pipeline stages together; if one fails, cancel the rest and re-raise"""
+    tasks = [asyncio.ensure_future(stage) for stage in stages]
+    try:
+        await asyncio.gather(*tasks)
+    except BaseException:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        raise
+
+
+async def run_pipeline(pool: asyncpg.Pool, collection, client, job_id, documents, label: str) -> dict:
+    """
+    Staged producer/consumer pipeline for one client:
+        documents -> hash diff + chunk -> embed (N workers, global cap) -> write Postgres + ChromaDB
+    Stages are connected by bounded queues so a slow stage applies backpressure.
+    A document's content_hash is only updated once all of its changed chunks are stored.
+    Job document states move pending -> chunked -> done (or pending -> skipped),
+    and every stored batch checkpoints the job's progress counters.
+    """
+    embed_queue = asyncio.Queue(maxsize=PIPELINE_QUEUE_SIZE)  # Chunk batches to embed
+    write_queue = asyncio.Queue(maxsize=PIPELINE_QUEUE_SIZE)  # Embedded batches to store
+    stats = {
+        "documents": 0,
+        "unchanged_documents": 0,
+        "chunks": 0,
+        "kept_chunks": 0,
+        "deleted_chunks": 0,
+        "embed_seconds": 0.0,
+    }
+    # document_id -> [chunks still to store, document hash]
+    unfinished = {}
+    
+    async def flush_skipped(skipped: list):
+        async with pool.acquire() as conn:
+            async with conn.transaction():
+                await set_document_states(conn, job_id, skipped, "skipped")
+                await checkpoint_job(conn, job_id, len(skipped), 0)
+    
+    async def chunk_stage():
+        batch = []  # May span documents
+        skipped = []  # Unchanged documents, recorded in groups
+        async for doc in documents:
+            # Get content from database or use fallback
+            content = doc.get('content') or f"Document: {doc['title']}\nSource: {doc['source']}\n\n[No content available]"
+            
+            doc_hash = content_hash(CHUNKER_VERSION, doc['title'], content)
+            if doc['content_hash'] == doc_hash:
+                stats["unchanged_documents"] += 1
+                skipped.append(doc['id'])
+                if len(skipped) >= JOB_STATE_BATCH:
+                    await flush_skipped(skipped)
+                    skipped = []
+                continue
+            
+            # Empty content keeps no chunks (stale ones are removed)
+            if not content or len(content.strip()) < 10:
+                print(f"  [{label}] ⚠️  Skipped - No content: {doc['title']}")
+                chunks = []
+            else:
+                chunks = chunk_text(doc['title'], content)
+            
+            # Short-lived connection per document so the pool is never starved
+            async with pool.acquire() as conn:
+                existing = await conn.fetch(
+                    "SELECT id, chunk_index, content_hash FROM document_chunks WHERE document_id = $1",
+                    doc['id']
+                )
+                changed, moved, deleted = diff_chunks(existing, chunks)
+                await apply_chunk_changes(conn, collection, moved, deleted)
+                async with conn.transaction():
+                    if changed:
+                        await set_document_states(conn, job_id, [doc['id']], "chunked", len(changed))
+                    else:
+                        await mark_document_synced(conn, doc['id'], doc_hash)
+                        await set_document_states(conn, job_id, [doc['id']], "done", 0)
+                        await checkpoint_job(conn, job_id, 1, 0)
+            stats["documents"] += 1
+            stats["kept_chunks"] += len(chunks) - len(changed)
+            stats["deleted_chunks"] += len(deleted)
+            
+            if not changed:
+                continue
+            
+            unfinished[doc['id']] = [len(changed), doc_hash]
+            for chunk_id, idx, chunk_content, chunk_hash in changed:
+                batch.append({
+                    'id': chunk_id,
+                    'document_id': doc['id'],
+                    'document_title': doc['title'],
+                    'chunk_index': idx,
+                    'content': chunk_content,
+                    'content_hash': chunk_hash,
+                })
+                if len(batch) >= EMBED_BATCH_SIZE:
+                    await embed_queue.put(batch)
+                    batch = []
+        if skipped:
+            await flush_skipped(skipped)
+        if batch:
+            await embed_queue.put(batch)
+        for _ in range(EMBED_WORKERS_PER_CLIENT):
+            await embed_queue.put(None)
+    
+    async def embed_stage():
+        while True:
+            batch = await embed_queue.get()
+            if batch is None:
+                return
+            started = time.perf_counter()
+            embeddings = await embed_batch([c['content'] for c in batch])
+            stats["embed_seconds"] += time.perf_counter() - started
+            await write_queue.put((batch, embeddings))
+    
+    async def embed_workers():
+        await asyncio.gather(*(embed_stage() for _ in range(EMBED_WORKERS_PER_CLIENT)))
+        await write_queue.put(None)
+    
+    async def write_stage():
+        while True:
+            item = await write_queue.get()
+            if item is None:
+                return
+            batch, embeddings = item
+            await store_chunks(pool, collection, client, batch, embeddings)
+            stats["chunks"] += len(batch)
+            
+            # Mark documents whose last changed chunk just landed
+            finished = []
+            for c in batch:
+                entry = unfinished[c['document_id']]
+                entry[0] -= 1
+                if entry[0] == 0:
+                    finished.append((c['document_id'], entry[1]))
+                    del unfinished[c['document_id']]
+            async with pool.acquire() as conn:
+                async with conn.transaction():
+                    for document_id, doc_hash in finished:
+                        await mark_document_synced(conn, document_id, doc_hash)
+                    if finished:
+                        await set_document_states(conn, job_id, [d for d, _ in finished], "done")
+                    await checkpoint_job(conn, job_id, len(finished), len(batch))
+            
+            print(f"  [{label}] ✅ {stats['chunks']} chunks embedded and stored so far")
+    
+    await run_stages(chunk_stage(), embed_workers(), write_stage())
+    return stats
+
+
 # ---------------- MAIN PROCESSING ----------------
-async def process_client(client_id: str, conn: asyncpg.Connection, source_filter: str = None, clean_reprocess: bool = False):
+async def process_client(client_id: str, pool: asyncpg.Pool, source_filter: str = None, clean_reprocess: bool = False, job_id: str = None):
     """
     Process all documents for a specific client:
-    1. Fetch documents without chunks (or all if clean reprocess)
-    2. Chunk the content
-    3. Generate embeddings
+    1. Fetch documents and skip those whose content hash is unchanged
+    2. Chunk the content and diff it against the stored chunks
+    3. Generate embeddings for changed chunks only (batched across documents)
     4. Store chunks in PostgreSQL
     5. Store vectors in ChromaDB (client-specific collection)
+    Steps 2-5 run as a concurrent staged pipeline (see run_pipeline) fed by a
+    server-side cursor, so documents are never all loaded at once.
+    
+    Work is tracked as an ingest job (see start_job): a crashed or failed run
+    is resumed by the next run instead of starting over.
     
     Args:
         client_id: UUID of the client
-        conn: Database connection
+        pool: Database connection pool
         source_filter: Optional source filename to filter (e.g., "faq.csv")
         clean_reprocess: If True, delete existing chunks/vectors and reprocess all
+        job_id: Optional existing ingest job to run (e.g. queued by the API)
     """
+    async with pool.acquire() as conn:
+        return await _process_client(client_id, pool, conn, source_filter, clean_reprocess, job_id)
+
+
+async def _process_client(client_id: str, pool: asyncpg.Pool, conn: asyncpg.Connection, source_filter: str, clean_reprocess: bool, job_id: str):
+    """process_client body; `conn` is used for setup queries only"""
     
     # Get client info (accepts UUID or name)
     client = await get_client_by_name_or_id(conn, client_id)
@@ -113,8 +731,6 @@ async def process_client(client_id: str, conn: asyncpg.Connection, source_filter
         print(f"   ⚠️  CLEAN REPROCESS MODE")
     print(f"{'='*60}\n")
     
-    # Initialize ChromaDB first
-    chroma = chromadb.PersistentClient(path=VECTOR_DB_DIR)
     collection_name = f"client_{str(client['id']).replace('-', '_')}"
     
     # Handle clean reprocess
@@ -131,6 +747,10 @@ async def process_client(client_id: str, conn: asyncpg.Connection, source_filter
             """,
             client['id']
         )
+        await conn.execute(
+            "UPDATE documents SET content_hash = NULL WHERE client_id = $1",
+            client['id']
+        )
         
         # Delete ChromaDB collection
         try:
@@ -176,67 +796,30 @@ async def process_client(client_id: str, conn: asyncpg.Connection, source_filter
             except Exception as e:
                 print(f"   ⚠️  Could not clean vectordb files: {e}")
         
+        await bump_collection_version(conn, client['id'])
         print(f"   ✅ Deleted all chunks from PostgreSQL\n")
     
-    # Build query based on clean_reprocess and source_filter
-    if clean_reprocess:
-        # For clean reprocess, get ALL documents (ignore existing chunks)
-        if source_filter:
-            documents = await conn.fetch(
-                """
-                SELECT d.id, d.title, d.source, d.content
-                FROM documents d
-                WHERE d.client_id = $1 AND d.source LIKE $2
-               ORDER BY d.created_at
-                """,
-                client['id'],
-                f"%{source_filter}%"
-            )
-        else:
-            documents = await conn.fetch(
-                """
-                SELECT d.id, d.title, d.source, d.content
-                FROM documents d
-                WHERE d.client_id = $1
-                ORDER BY d.created_at
-                """,
-                client['id']
-            )
-    else:
-        # Normal mode: only get documents without chunks
-        if source_filter:
-            documents = await conn.fetch(
-                """
-                SELECT d.id, d.title, d.source, d.content
-                FROM documents d
-                LEFT JOIN document_chunks dc ON d.id = dc.document_id
-                WHERE d.client_id = $1 AND d.source LIKE $2
-                GROUP BY d.id, d.title, d.source, d.content
-                HAVING COUNT(dc.id) = 0
-                ORDER BY d.created_at
-                """,
-                client['id'],
-                f"%{source_filter}%"
-            )
-        else:
-            documents = await conn.fetch(
-                """
-                SELECT d.id, d.title, d.source, d.content
-                FROM documents d
-                LEFT JOIN document_chunks dc ON d.id = dc.document_id
-                WHERE d.client_id = $1
-                GROUP BY d.id, d.title, d.source, d.content
-                HAVING COUNT(dc.id) = 0
-                ORDER BY d.created_at
-                """,
-                client['id']
-            )
+    job_id, resumed = await start_job(conn, client, source_filter, job_id, clean_reprocess)
+    if job_id is None:
+        print(f"⏭️  An ingest job for {client['name']} is being run by another process, skipping")
+        return
+    print(f"🧾 Ingest job: {job_id}{' (resumed)' if resumed else ''}\n")
+    
+    # Every pending document of the job is considered; unchanged ones are
+    # skipped by content hash. Documents are streamed through a server-side
+    # cursor, so memory stays bounded by the pipeline queues regardless of
+    # corpus size.
+    pending_documents = await conn.fetchval(
+        "SELECT COUNT(*) FROM ingest_job_documents WHERE job_id = $1 AND state = 'pending'",
+        job_id
+    )
     
-    if not documents:
-        print(f"ℹ️  No new documents to process for {client['name']}")
+    if not pending_documents:
+        await finish_job(conn, job_id)
+        print(f"ℹ️  No documents to process for {client['name']}")
         return
     
-    print(f"📄 Found {len(documents)} document(s) to process\n")
+    print(f"📄 Found {pending_documents} document(s) to check\n")
     
     # Get or create ChromaDB collection (already initialized earlier)
     collection = chroma.get_or_create_collection(
@@ -250,81 +833,48 @@ async def process_client(client_id: str, conn: asyncpg.Connection, source_filter
     
     print(f"🗂️  ChromaDB Collection: {collection_name}\n")
     
-    total_chunks = 0
-    
-    # Process each document
-    for doc in documents:
-        doc_id = doc['id']
-        print(f"  📄 Processing: {doc['title']}")
-        
-        # Get content from database or use fallback
-        content = doc.get('content') or f"Document: {doc['title']}\nSource: {doc['source']}\n\n[No content available]"
-        
-        # Skip if content is empty
-        if not content or len(content.strip()) < 10:
-            print(f"     ⚠️  Skipped - No content")
-            continue
-        
-        # Chunk the content
-        chunks = chunk_text(content, CHUNK_SIZE)
-        print(f"     → {len(chunks)} chunks")
-        
-        # Process each chunk
-        chunk_rows = []
-        vector_ids = []
-        embeddings_list = []
-        metadatas = []
-        documents_list = []
-        
-        for idx, chunk_content in enumerate(chunks):
-            chunk_id = uuid.uuid4()
-            
-            # Prepare for PostgreSQL
-            chunk_rows.append({
-                'id': chunk_id,
-                'document_id': doc_id,
-                'chunk_index': idx,
-                'content': chunk_content,
-            })
-            
-            # Generate embedding
-            embedding = embed(chunk_content)
-            
-            # Prepare for ChromaDB
-            vector_ids.append(str(chunk_id))
-            embeddings_list.append(embedding)
-            metadatas.append({
-                "client_id": str(client['id']),
-                "document_id": str(doc_id),
-                "document_title": doc['title'],
-                "chunk_index": idx,
-            })
-            documents_list.append(chunk_content)
-        
-        # Bulk insert chunks to PostgreSQL
-        await conn.executemany(
-            """
-            INSERT INTO document_chunks (id, document_id, chunk_index, content)
-            VALUES ($1, $2, $3, $4)
-            """,
-            [(str(row['id']), str(row['document_id']), row['chunk_index'], row['content']) 
-             for row in chunk_rows]
-        )
-        
-        # Add vectors to ChromaDB
-        collection.add(
-            ids=vector_ids,
-            embeddings=embeddings_list,
-            metadatas=metadatas,
-            documents=documents_list,
-        )
+    try:
+        # A previous run may have stopped between writes: chunk rows whose
+        # vector is missing are dropped so their documents get re-embedded
+        missing_vectors = await remove_chunks_without_vectors(conn, collection, client) if resumed else 0
+        if missing_vectors:
+            print(f"   🔧 Reconciled {missing_vectors} chunk(s) missing from ChromaDB\n")
         
-        total_chunks += len(chunks)
-        print(f"     ✅ {len(chunks)} chunks embedded and stored")
+        async with conn.transaction(readonly=True):
+            documents = conn.cursor(
+                """
+                SELECT d.id, d.title, d.source, d.content, d.content_hash
+                FROM ingest_job_documents jd
+                JOIN documents d ON d.id = jd.document_id
+                WHERE jd.job_id = $1 AND jd.state = 'pending'
+                ORDER BY d.created_at
+                """,
+                job_id,
+                prefetch=DOCUMENT_PREFETCH
+            )
+            stats = await run_pipeline(pool, collection, client, job_id, documents, client['name'])
+        stats["missing_vectors"] = missing_vectors
+    except Exception as e:
+        await finish_job(conn, job_id, error=str(e) or type(e).__name__)
+        print(f"\n⚠️  Job {job_id} failed; re-run to resume from the last stored batch")
+        raise
+    
+    total_chunks = stats["chunks"]
+    embed_seconds = stats["embed_seconds"]
+    stats["orphan_vectors"] = await remove_orphan_vectors(conn, collection, client)
     
-    print(f"\n✅ Completed! Total chunks: {total_chunks}")
+    if total_chunks or stats["deleted_chunks"] or stats["orphan_vectors"] or stats["missing_vectors"]:
+        await bump_collection_version(conn, client['id'])
+    await finish_job(conn, job_id)
+    
+    print(f"\n✅ Completed {client['name']}! Documents changed: {stats['documents']}, unchanged: {stats['unchanged_documents']}")
+    print(f"   Chunks embedded: {total_chunks}, kept: {stats['kept_chunks']}, deleted: {stats['deleted_chunks']}, orphan vectors removed: {stats['orphan_vectors']}")
+    if total_chunks and embed_seconds:
+        # embed_seconds sums all workers, so this is per-worker throughput
+        print(f"   Embedding throughput: {total_chunks / embed_seconds:.1f} chunks/s per worker (batch size {EMBED_BATCH_SIZE})")
     print(f"   Vector Collection: {collection_name}")
     print(f"   Total Vectors: {collection.count()}\n")
+    return stats
 
 
 async def main():
@@ -334,32 +884,70 @@ async def main():
     target_client_id = None
     target_source = None
     clean_reprocess = False
+    job_id = None
+    
+    argv = list(sys.argv)
+    if "--job-id" in argv:
+        i = argv.index("--job-id")
+        if i + 1 >= len(argv):
+            print("❌ ERROR: --job-id requires a job UUID")
+            return
+        job_id = argv[i + 1]
+        del argv[i : i + 2]
     
-    if len(sys.argv) > 1:
-        target_client_id = sys.argv[1]
+    if len(argv) > 1:
+        target_client_id = argv[1]
         
         # Check for source file or clean-reprocess flag
-        if len(sys.argv) > 2:
-            if sys.argv[2] == "--clean-reprocess":
+        if len(argv) > 2:
+            if argv[2] == "--clean-reprocess":
                 # Validate safety confirmation
-                if len(sys.argv) <= 3 or sys.argv[3] != "YES_DELETE_ALL":
+                if len(argv) <= 3 or argv[3] != "YES_DELETE_ALL":
                     print("❌ ERROR: Clean reprocess requires confirmation!")
                     print("   Usage: python ingest.py <client_id> --clean-reprocess YES_DELETE_ALL")
                     print("   ⚠️  WARNING: This will DELETE all chunks and vectors for this client!")
                     return
                 clean_reprocess = True
             else:
-                target_source = sys.argv[2]
+                target_source = argv[2]
     
-    conn = await asyncpg.connect(**DB_CONFIG)
+    global http_client, embed_semaphore, chroma, chroma_lock
+    pool = await asyncpg.create_pool(**DB_CONFIG, min_size=1, max_size=DB_POOL_SIZE)
+    http_client = httpx.AsyncClient(
+        limits=httpx.Limits(max_connections=EMBED_CONCURRENCY, max_keepalive_connections=EMBED_CONCURRENCY)
+    )
+    embed_semaphore = asyncio.Semaphore(EMBED_CONCURRENCY)
+    chroma = chromadb.PersistentClient(path=VECTOR_DB_DIR)
+    chroma_lock = asyncio.Lock()
+    started = time.perf_counter()
     
     try:
+        # Chunks of deleted documents; their vectors are removed per client below
+        await pool.execute(
+            """
+            DELETE FROM document_chunks dc
+            WHERE NOT EXISTS (SELECT 1 FROM documents d WHERE d.id = dc.document_id)
+            """
+        )
+        # Per-document rows of jobs abandoned as failed or cancelled (completed
+        # jobs drop theirs in finish_job); a resumed job re-registers them
+        await pool.execute(
+            """
+            DELETE FROM ingest_job_documents jd
+            USING ingest_jobs j
+            WHERE jd.job_id = j.id
+              AND j.status IN ('completed', 'failed', 'cancelled')
+              AND j.updated_at < NOW() - make_interval(secs => $1)
+            """,
+            JOB_DOCUMENTS_RETENTION_DAYS * 86400
+        )
+        
         if target_client_id:
             # Process specific client with optional source filter and/or clean reprocess
-            await process_client(target_client_id, conn, target_source, clean_reprocess)
+            await process_client(target_client_id, pool, target_source, clean_reprocess, job_id)
         else:
             # Process all clients
-            clients = await conn.fetch(
+            clients = await pool.fetch(
                 "SELECT id FROM clients WHERE status = 'active' ORDER BY created_at"
             )
             
@@ -367,13 +955,22 @@ async def main():
                 print("❌ No active clients found in database")
                 return
             
-            print(f"🔄 Processing {len(clients)} active client(s)...\n")
+            print(f"🔄 Processing {len(clients)} active client(s), {CLIENT_CONCURRENCY} at a time...\n")
+            
+            client_slots = asyncio.Semaphore(CLIENT_CONCURRENCY)
+            
+            async def run_client(client_id: str):
+                async with client_slots:
+                    try:
+                        return await process_client(client_id, pool)
+                    except Exception as e:
+                        # One failing client must not abort the others
+                        print(f"\n❌ Client {client_id} failed: {e}")
             
-            for client in clients:
-                await process_client(str(client['id']), conn)
+            await asyncio.gather(*(run_client(str(c['id'])) for c in clients))
         
         print("=" * 60)
-        print("🎉 Embedding process completed!")
+        print(f"🎉 Embedding process completed in {time.perf_counter() - started:.1f}s!")
         print("=" * 60)
         
     except Exception as e:
@@ -381,7 +978,8 @@ async def main():
         import traceback
         traceback.print_exc()
     finally:
-        await conn.close()
+        await http_client.aclose()
+        await pool.close()
 
 
 if __name__ == "__main__":
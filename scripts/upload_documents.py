@@ -16,6 +16,9 @@ CSV Format:
     "FAQ 1","Content here","faq"
     "FAQ 2","More content","faq"
 
+Uploads are idempotent: documents are keyed by (client, source file, title),
+so re-running updates changed rows and leaves the rest untouched.
+
 Usage:
     python upload_documents.py                              # Upload all clients, all files
     python upload_documents.py "Client Name"                # Upload specific client, all files
@@ -28,7 +31,6 @@ import os
 import csv
 import asyncio
 import asyncpg
-import uuid
 from pathlib import Path
 from dotenv import load_dotenv
 
@@ -44,6 +46,7 @@ DB_CONFIG = {
 }
 
 DATA_DIR = "data"
+UPLOAD_BATCH_SIZE = int(os.getenv("UPLOAD_BATCH_SIZE", 5000))  # CSV rows per COPY batch
 
 
 # ---------------- HELPERS ----------------
@@ -56,58 +59,99 @@ async def get_client_by_name(conn: asyncpg.Connection, client_name: str):
     return client
 
 
+def read_csv_rows(reader: csv.DictReader):
+    """Stream (row_num, title, content) tuples from a CSV reader, skipping incomplete rows"""
+    for row_num, row in enumerate(reader):
+        title = (row.get('title') or '').strip()
+        content = (row.get('content') or '').strip()
+        
+        if not title or not content:
+            continue
+        
+        yield row_num, title, content
+
+
 async def upload_csv_document(conn: asyncpg.Connection, client_id: str, client_name: str, csv_path: str):
     """
     Upload documents from CSV file to database
     
+    Rows are streamed into a temporary staging table with COPY, then merged
+    into documents with an upsert on (client_id, source, title), all in one
+    transaction. Re-running with the same file changes nothing; rows whose
+    content changed are updated in place (ingest.py re-embeds them).
+    
     CSV Format:
         title,content,category (optional)
+    
+    Returns:
+        Dict with rows, inserted and updated counts (None if the file was skipped)
     """
-    documents_added = 0
+    # Format source as: foldername_filename
+    # e.g., "Toko ABC (Test)_faq"
+    filename = Path(csv_path).stem
+    source_name = f"{client_name}_{filename}"
     
-    with open(csv_path, 'r', encoding='utf-8') as f:
+    with open(csv_path, 'r', encoding='utf-8', newline='') as f:
         reader = csv.DictReader(f)
         
         # Check if required columns exist
-        if 'title' not in reader.fieldnames or 'content' not in reader.fieldnames:
+        if not reader.fieldnames or 'title' not in reader.fieldnames or 'content' not in reader.fieldnames:
             print(f"  ⚠️  Skipping {csv_path}: Missing required columns (title, content)")
-            return 0
+            return None
         
-        for row in reader:
-            title = row.get('title', '').strip()
-            content = row.get('content', '').strip()
-            
-            if not title or not content:
-                continue
-            
-            # Create document
-            doc_id = uuid.uuid4()
-            
-            # Format source as: foldername_filename
-            # e.g., "Toko ABC (Test)_faq"
-            filename = Path(csv_path).stem
-            source_name = f"{client_name}_{filename}"
+        async with conn.transaction():
+            await conn.execute(
+                """
+                CREATE TEMP TABLE upload_staging (
+                    row_num INTEGER,
+                    title TEXT,
+                    content TEXT
+                ) ON COMMIT DROP
+                """
+            )
             
             # Content is ONLY the content, NOT including title
             # Title is stored in separate column
+            rows = 0
+            batch = []
+            for record in read_csv_rows(reader):
+                batch.append(record)
+                if len(batch) >= UPLOAD_BATCH_SIZE:
+                    await conn.copy_records_to_table('upload_staging', records=batch)
+                    rows += len(batch)
+                    batch = []
+            if batch:
+                await conn.copy_records_to_table('upload_staging', records=batch)
+                rows += len(batch)
             
-            # Insert document
-            await conn.execute(
+            # Merge: last row wins for duplicate titles within the file,
+            # unchanged documents are not rewritten
+            merged = await conn.fetch(
                 """
                 INSERT INTO documents (id, client_id, title, source, content)
-                VALUES ($1, $2, $3, $4, $5)
-                ON CONFLICT (id) DO NOTHING
+                SELECT gen_random_uuid(), $1, s.title, $2, s.content
+                FROM (
+                    SELECT DISTINCT ON (title) title, content
+                    FROM upload_staging
+                    ORDER BY title, row_num DESC
+                ) s
+                ON CONFLICT (client_id, source, title) DO UPDATE
+                SET content = EXCLUDED.content
+                WHERE documents.content IS DISTINCT FROM EXCLUDED.content
+                RETURNING (xmax = 0) AS inserted
                 """,
-                str(doc_id),
-                str(client_id),
-                title,
-                source_name,
-                content  # Only content, no title duplication
+                client_id,
+                source_name
             )
-            
-            documents_added += 1
     
-    return documents_added
+    inserted = sum(1 for r in merged if r['inserted'])
+    return {"rows": rows, "inserted": inserted, "updated": len(merged) - inserted}
+
+
+def print_upload_stats(stats: dict):
+    """Print the result of one upload_csv_document call"""
+    unchanged = stats['rows'] - stats['inserted'] - stats['updated']
+    print(f"     ✅ {stats['inserted']} added, {stats['updated']} updated, {unchanged} unchanged")
 
 
 async def process_client_folder(conn: asyncpg.Connection, folder_path: str):
@@ -142,11 +186,12 @@ async def process_client_folder(conn: asyncpg.Connection, folder_path: str):
     
     for csv_file in csv_files:
         print(f"  📄 Uploading: {csv_file.name}")
-        docs_count = await upload_csv_document(conn, client['id'], folder_name, str(csv_file))
-        print(f"     ✅ {docs_count} document(s) added")
-        total_docs += docs_count
+        stats = await upload_csv_document(conn, client['id'], folder_name, str(csv_file))
+        if stats:
+            print_upload_stats(stats)
+            total_docs += stats['inserted'] + stats['updated']
     
-    print(f"\n✅ Total documents uploaded: {total_docs}\n")
+    print(f"\n✅ Total documents added or updated: {total_docs}\n")
 
 
 async def main():
@@ -232,8 +277,9 @@ async def main():
                 print(f"   File: {target_file}")
                 print(f"{'='*60}\n")
                 
-                docs_count = await upload_csv_document(conn, client['id'], target_client, str(csv_path))
-                print(f"\n✅ Total documents uploaded: {docs_count}\n")
+                stats = await upload_csv_document(conn, client['id'], target_client, str(csv_path))
+                if stats:
+                    print_upload_stats(stats)
             else:
                 await process_client_folder(conn, str(folder_path))
         else:
@@ -0,0 +1,92 @@
+"""
+Shared test setup.
+
+Tests run from a scratch working directory, so the relative paths in
+backend/config.py (./scripts/vectordb, the embedding cache file) never
+touch the repository checkout. Async code is driven with asyncio.run()
+inside plain test functions.
+
+The fixtures below stand in for the database-backed steps of the chat
+routes (API key, rate limit, retrieval, session and usage) so /chat can be
+driven over ASGI against a fake Ollama (tests/fake_ollama.py).
+"""
+
+import os
+import tempfile
+import uuid
+
+import pytest
+from fastapi import APIRouter, FastAPI
+
+from backend.routes import chat as chat_routes
+from backend.routes import health as health_routes
+from backend.services import ollama
+from backend.services.llm_scheduler import LLMScheduler
+
+CLIENT_INFO = {
+    "api_key_id": uuid.uuid4(),
+    "client_id": uuid.uuid4(),
+    "client_name": "Toko ABC",
+    "rate_limit": 1000,
+    "plan": "pro",
+    "system_prompt": "Kamu adalah asisten Toko ABC.",
+    "collection_version": 0,
+}
+
+
+def pytest_configure(config):
+    os.chdir(tempfile.mkdtemp(prefix="acm-ai-tests-"))
+
+
+@pytest.fixture
+def fake_chat_auth(monkeypatch):
+    """Any x-api-key is CLIENT_INFO's key, no rate limit, one fixed chunk"""
+
+    async def verify_api_key(x_api_key):
+        return CLIENT_INFO
+
+    async def check_rate_limit(*args):
+        return None
+
+    async def retrieve(query, client_id=None, k=4, collection_version=0):
+        embedding = await ollama.embed(query)
+        return {"context": "", "documents": ["Instal ulang Windows: Rp 150.000"], "ids": [], "embedding": embedding}
+
+    monkeypatch.setattr(chat_routes, "verify_api_key", verify_api_key)
+    monkeypatch.setattr(chat_routes, "check_rate_limit", check_rate_limit)
+    monkeypatch.setattr(chat_routes, "retrieve", retrieve)
+    return CLIENT_INFO
+
+
+@pytest.fixture
+def fake_backend(fake_chat_auth, monkeypatch):
+    """fake_chat_auth plus in-memory sessions and usage; no database at all"""
+
+    async def load_chat_turn(session_id, client_id, history_limit=5):
+        return session_id, []
+
+    async def save_chat_turn(session_id, messages):
+        return None
+
+    async def log_usage(*args):
+        return None
+
+    monkeypatch.setattr(chat_routes, "load_chat_turn", load_chat_turn)
+    monkeypatch.setattr(chat_routes, "save_chat_turn", save_chat_turn)
+    monkeypatch.setattr(chat_routes, "log_usage", log_usage)
+    # A model slot for every concurrent request, so only the event loop could serialize them
+    monkeypatch.setattr(chat_routes, "llm_scheduler", LLMScheduler(max_concurrency=64))
+    return fake_chat_auth
+
+
+@pytest.fixture
+def make_app():
+    """Build an app from routers (default: chat and health)"""
+
+    def make(*routers: APIRouter) -> FastAPI:
+        app = FastAPI()
+        for router in routers or (chat_routes.router, health_routes.router):
+            app.include_router(router)
+        return app
+
+    return make
@@ -0,0 +1,74 @@
+"""
+In-memory stand-in for the asyncpg pool.
+
+FakePool hands out FakeConnections that record every query and answer it
+through a `respond(method, query, args)` callback. It has a fixed number
+of connections, so tests can check how long connections are held.
+With `record=False` calls are answered but not kept (memory tests).
+"""
+
+import asyncio
+from contextlib import asynccontextmanager
+
+
+class FakeConnection:
+    def __init__(self, pool: "FakePool"):
+        self.pool = pool
+
+    async def _call(self, method: str, query: str, *args):
+        if self.pool.record:
+            self.pool.calls.append((method, " ".join(query.split()), args))
+        result = self.pool.respond(method, query, args)
+        if isinstance(result, BaseException):
+            raise result
+        return result
+
+    async def fetch(self, query, *args):
+        return await self._call("fetch", query, *args)
+
+    async def fetchrow(self, query, *args):
+        return await self._call("fetchrow", query, *args)
+
+    async def fetchval(self, query, *args):
+        return await self._call("fetchval", query, *args)
+
+    async def execute(self, query, *args):
+        return await self._call("execute", query, *args)
+
+    async def executemany(self, query, args):
+        return await self._call("executemany", query, args)
+
+    async def copy_records_to_table(self, table, records, columns=None):
+        return await self._call("copy_records_to_table", table, list(records), columns)
+
+    @asynccontextmanager
+    async def transaction(self, **kwargs):
+        if self.pool.record:
+            self.pool.calls.append(("transaction", "", ()))
+        yield
+
+
+class FakePool:
+    def __init__(self, respond=None, size: int = 10, record: bool = True):
+        self.respond = respond or (lambda method, query, args: None)
+        self.size = size
+        self.record = record
+        self.calls = []
+        self.acquisitions = 0
+        self.in_use = 0
+        self.max_in_use = 0
+        self._slots = asyncio.Semaphore(size)
+
+    @asynccontextmanager
+    async def acquire(self):
+        async with self._slots:
+            self.acquisitions += 1
+            self.in_use += 1
+            self.max_in_use = max(self.max_in_use, self.in_use)
+            try:
+                yield FakeConnection(self)
+            finally:
+                self.in_use -= 1
+
+    def queries(self, method: str = None) -> list:
+        return [q for m, q, _ in self.calls if method is None or m == method]
@@ -0,0 +1,155 @@
+"""
+Fake Ollama server for tests and benchmarks.
+
+A small HTTP/1.1 server on 127.0.0.1 that answers /api/generate, /api/chat,
+/api/embeddings and the batch /api/embed (string or list `input`) like
+Ollama does (JSON, or NDJSON chunks when "stream" is true), after an
+optional delay, plus `item_delay` per input of a batch embed. It records
+requests and the peak number served at once, and can be told to fail with
+a status code.
+"""
+
+import asyncio
+import json
+
+
+class FakeOllama:
+    def __init__(
+        self,
+        delay: float = 0.0,
+        reply: str = "Halo, ada yang bisa dibantu?",
+        dim: int = 8,
+        item_delay: float = 0.0,
+    ):
+        self.delay = delay
+        self.item_delay = item_delay
+        self.reply = reply
+        self.dim = dim
+        self.status = 200  # Set to e.g. 500 to simulate a broken backend
+        self.requests = []  # (path, payload)
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self._server = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.sockets[0].getsockname()[:2]
+        return f"http://{host}:{port}"
+
+    async def start(self) -> "FakeOllama":
+        self._server = await asyncio.start_server(self._serve, "127.0.0.1", 0)
+        return self
+
+    async def stop(self):
+        """Stop listening; later connections are refused"""
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+
+    async def __aenter__(self):
+        return await self.start()
+
+    async def __aexit__(self, *exc):
+        await self.stop()
+
+    # ---------------- Responses
+
+    def eval_counts(self, path: str, payload: dict) -> dict:
+        """Token counts reported with the final chunk (whitespace-split words)"""
+        if path == "/api/chat":
+            prompt = " ".join(m["content"] for m in payload.get("messages", []))
+        else:
+            prompt = payload.get("prompt", "")
+        return {"prompt_eval_count": len(prompt.split()), "eval_count": len(self.reply.split())}
+
+    def vector(self, text: str) -> list:
+        seed = sum(map(ord, text))
+        return [((seed * (i + 1)) % 97) / 97.0 for i in range(self.dim)]
+
+    @staticmethod
+    def inputs(payload: dict) -> list:
+        """Texts of a batch /api/embed request"""
+        texts = payload.get("input", [])
+        return [texts] if isinstance(texts, str) else texts
+
+    def body(self, path: str, payload: dict) -> dict:
+        if path == "/api/embeddings":
+            return {"embedding": self.vector(payload.get("prompt", ""))}
+        if path == "/api/embed":
+            return {"embeddings": [self.vector(text) for text in self.inputs(payload)]}
+        done = {"done": True, **self.eval_counts(path, payload)}
+        if path == "/api/chat":
+            return {"message": {"role": "assistant", "content": self.reply}, **done}
+        return {"response": self.reply, "context": [1, 2, 3], **done}
+
+    def chunks(self, path: str, payload: dict) -> list:
+        words = self.reply.split(" ")
+        parts = [w + (" " if i < len(words) - 1 else "") for i, w in enumerate(words)]
+        if path == "/api/chat":
+            chunks = [{"message": {"role": "assistant", "content": p}, "done": False} for p in parts]
+        else:
+            chunks = [{"response": p, "done": False} for p in parts]
+        final = self.body(path, payload)
+        final.pop("response", None)
+        final.pop("message", None)
+        return chunks + [final]
+
+    # ---------------- HTTP
+
+    async def _serve(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                _, path, _ = request_line.decode().split(" ", 2)
+                headers = {}
+                while True:
+                    line = (await reader.readline()).decode().strip()
+                    if not line:
+                        break
+                    name, value = line.split(":", 1)
+                    headers[name.strip().lower()] = value.strip()
+                raw = await reader.readexactly(int(headers.get("content-length", 0)))
+                payload = json.loads(raw) if raw else {}
+                await self._respond(writer, path, payload)
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    async def _respond(self, writer: asyncio.StreamWriter, path: str, payload: dict):
+        self.requests.append((path, payload))
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            delay = self.delay
+            if path == "/api/embed":
+                delay += self.item_delay * len(self.inputs(payload))
+            await asyncio.sleep(delay)
+            if self.status != 200:
+                data = json.dumps({"error": "fake failure"}).encode()
+                writer.write(
+                    f"HTTP/1.1 {self.status} Error\r\nContent-Type: application/json\r\n"
+                    f"Content-Length: {len(data)}\r\n\r\n".encode() + data
+                )
+            elif payload.get("stream"):
+                writer.write(
+                    b"HTTP/1.1 200 OK\r\nContent-Type: application/x-ndjson\r\n"
+                    b"Transfer-Encoding: chunked\r\n\r\n"
+                )
+                for chunk in self.chunks(path, payload):
+                    line = (json.dumps(chunk) + "\n").encode()
+                    writer.write(f"{len(line):x}\r\n".encode() + line + b"\r\n")
+                    await writer.drain()
+                writer.write(b"0\r\n\r\n")
+            else:
+                data = json.dumps(self.body(path, payload)).encode()
+                writer.write(
+                    b"HTTP/1.1 200 OK\r\nContent-Type: application/json\r\n"
+                    + f"Content-Length: {len(data)}\r\n\r\n".encode()
+                    + data
+                )
+            await writer.drain()
+        finally:
+            self.in_flight -= 1
@@ -0,0 +1,94 @@
+"""
+Streams a generated corpus through ingest.run_pipeline and prints the
+process's peak RSS in KB. Run in a fresh process per corpus size (see
+test_ingest_memory.py), so each measurement has its own peak.
+
+Sources:
+    generated   documents built one at a time by an async generator
+    postgres    a generate_series() query read through an asyncpg
+                server-side cursor (DSN from TEST_DATABASE_URL)
+
+Embeddings and ChromaDB are replaced by no-op fakes; Postgres writes go to
+a FakePool that does not record calls.
+
+Usage:
+    python ingest_memory_probe.py <corpus_mb> [generated|postgres]
+"""
+
+import asyncio
+import os
+import resource
+import sys
+import uuid
+
+import ingest
+from chunking import create_chunker
+from fake_db import FakePool
+
+DOCUMENT_BYTES = 64 * 1024
+CHUNK_SIZE = 16 * 1024
+
+
+class NullCollection:
+    def upsert(self, **kwargs):
+        pass
+
+
+async def fake_embed_batch(texts: list):
+    return [[0.0] * 8 for _ in texts]
+
+
+async def generated_documents(count: int):
+    for i in range(count):
+        # Fresh string per document, like rows decoded from the database
+        yield {
+            "id": uuid.uuid4(),
+            "title": f"Dokumen {i}",
+            "source": "generated.csv",
+            "content": (f"{i:08d} " * (DOCUMENT_BYTES // 9 + 1))[:DOCUMENT_BYTES],
+            "content_hash": None,
+        }
+
+
+async def run(corpus_mb: int, source: str):
+    count = corpus_mb * 1024 * 1024 // DOCUMENT_BYTES
+    ingest.chunker = create_chunker("fixed", CHUNK_SIZE)
+    ingest.embed_batch = fake_embed_batch
+    ingest.chroma_lock = asyncio.Lock()
+    pool = FakePool(lambda method, query, args: [] if method == "fetch" else None, record=False)
+    client = {"id": uuid.uuid4(), "name": "memory-probe"}
+
+    if source == "generated":
+        stats = await ingest.run_pipeline(
+            pool, NullCollection(), client, uuid.uuid4(), generated_documents(count), "probe"
+        )
+    else:
+        import asyncpg
+
+        conn = await asyncpg.connect(os.environ["TEST_DATABASE_URL"])
+        try:
+            async with conn.transaction(readonly=True):
+                documents = conn.cursor(
+                    """
+                    SELECT gen_random_uuid() AS id, 'Dokumen ' || i AS title,
+                           'generated.csv' AS source,
+                           left(repeat(lpad(i::text, 8, '0') || ' ', $2 / 9 + 1), $2) AS content,
+                           NULL::text AS content_hash
+                    FROM generate_series(1, $1) AS i
+                    """,
+                    count,
+                    DOCUMENT_BYTES,
+                    prefetch=ingest.DOCUMENT_PREFETCH,
+                )
+                stats = await ingest.run_pipeline(
+                    pool, NullCollection(), client, uuid.uuid4(), documents, "probe"
+                )
+        finally:
+            await conn.close()
+
+    assert stats["documents"] == count, stats
+
+
+if __name__ == "__main__":
+    asyncio.run(run(int(sys.argv[1]), sys.argv[2] if len(sys.argv) > 2 else "generated"))
+    print(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss)
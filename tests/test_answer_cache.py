@@ -0,0 +1,113 @@
+"""
+Semantic answer cache: similarity threshold, context fingerprint and prompt
+version rules, TTL expiry, per-client bounds and invalidation after
+re-ingestion.
+"""
+
+import uuid
+
+import numpy as np
+
+from backend import dependencies
+from backend.services import answer_cache as answer_cache_module
+from backend.services.answer_cache import SemanticAnswerCache, context_fingerprint, prompt_version
+
+CLIENT_ID = uuid.uuid4()
+DIM = 768
+CONTEXT = context_fingerprint(["faq-1", "faq-2"], collection_version=3)
+PROMPT = prompt_version("Kamu adalah asisten Toko ABC.")
+
+
+def vector(seed: int) -> list:
+    return np.random.default_rng(seed).standard_normal(DIM).tolist()
+
+
+def near(base: list, cosine: float, seed: int = 99) -> list:
+    """A vector with the given cosine similarity to `base`"""
+    u = np.asarray(base) / np.linalg.norm(base)
+    other = np.asarray(vector(seed))
+    other -= (other @ u) * u
+    other /= np.linalg.norm(other)
+    return (cosine * u + np.sqrt(1 - cosine**2) * other).tolist()
+
+
+def test_similar_question_hits_and_dissimilar_misses():
+    cache = SemanticAnswerCache(threshold=0.95, enabled=True)
+    question = vector(1)
+    cache.store(CLIENT_ID, question, CONTEXT, PROMPT, "Buka jam 09.00")
+    cache.store(CLIENT_ID, vector(2), CONTEXT, PROMPT, "Ongkir gratis")
+
+    assert cache.lookup(CLIENT_ID, near(question, 0.97), CONTEXT, PROMPT) == "Buka jam 09.00"
+    assert cache.lookup(CLIENT_ID, near(question, 0.93), CONTEXT, PROMPT) is None
+    assert cache.lookup(uuid.uuid4(), question, CONTEXT, PROMPT) is None
+    assert (cache.hits, cache.misses) == (1, 2)
+
+
+def test_the_most_similar_answer_wins():
+    cache = SemanticAnswerCache(threshold=0.9, enabled=True)
+    question = vector(1)
+    cache.store(CLIENT_ID, near(question, 0.95, seed=5), CONTEXT, PROMPT, "close")
+    cache.store(CLIENT_ID, near(question, 0.99, seed=6), CONTEXT, PROMPT, "closest")
+
+    assert cache.lookup(CLIENT_ID, question, CONTEXT, PROMPT) == "closest"
+
+
+def test_other_context_or_prompt_misses():
+    cache = SemanticAnswerCache(threshold=0.95, enabled=True)
+    question = vector(1)
+    cache.store(CLIENT_ID, question, CONTEXT, PROMPT, "Buka jam 09.00")
+
+    other_chunks = context_fingerprint(["faq-1", "faq-3"], collection_version=3)
+    assert cache.lookup(CLIENT_ID, question, other_chunks, PROMPT) is None
+    assert cache.lookup(CLIENT_ID, question, CONTEXT, prompt_version("Prompt baru")) is None
+    # Chunk order does not matter
+    same_chunks = context_fingerprint(["faq-2", "faq-1"], collection_version=3)
+    assert cache.lookup(CLIENT_ID, question, same_chunks, PROMPT) == "Buka jam 09.00"
+
+
+def test_entries_expire_after_ttl(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(answer_cache_module.time, "monotonic", lambda: now[0])
+    cache = SemanticAnswerCache(threshold=0.95, ttl=60, enabled=True)
+    question = vector(1)
+    cache.store(CLIENT_ID, question, CONTEXT, PROMPT, "Buka jam 09.00")
+
+    now[0] += 59
+    assert cache.lookup(CLIENT_ID, question, CONTEXT, PROMPT) == "Buka jam 09.00"
+    now[0] += 1
+    assert cache.lookup(CLIENT_ID, question, CONTEXT, PROMPT) is None
+
+
+def test_oldest_entry_is_dropped_when_full():
+    cache = SemanticAnswerCache(threshold=0.95, max_per_client=20, enabled=True)
+    questions = [vector(seed) for seed in range(25)]
+    for i, question in enumerate(questions):
+        cache.store(CLIENT_ID, question, CONTEXT, PROMPT, f"answer {i}")
+
+    for i, question in enumerate(questions):
+        expected = f"answer {i}" if i >= 5 else None
+        assert cache.lookup(CLIENT_ID, question, CONTEXT, PROMPT) == expected
+
+
+def test_reingest_invalidates_answers(monkeypatch):
+    cache = SemanticAnswerCache(threshold=0.95, enabled=True)
+    monkeypatch.setattr(dependencies, "answer_cache", cache)
+    question = vector(1)
+    cache.store(CLIENT_ID, question, CONTEXT, PROMPT, "Buka jam 09.00")
+
+    # A re-ingest bumps the collection version, so the fingerprint changes...
+    reingested = context_fingerprint(["faq-1", "faq-2"], collection_version=4)
+    assert cache.lookup(CLIENT_ID, question, reingested, PROMPT) is None
+    # ...and the ingest worker drops the client's answers outright
+    dependencies.invalidate_client(CLIENT_ID)
+    assert cache.lookup(CLIENT_ID, question, CONTEXT, PROMPT) is None
+    assert cache.stats()["clients"] == 0
+
+
+def test_disabled_cache_stores_nothing():
+    cache = SemanticAnswerCache(enabled=False)
+    question = vector(1)
+    cache.store(CLIENT_ID, question, CONTEXT, PROMPT, "Buka jam 09.00")
+
+    assert cache.lookup(CLIENT_ID, question, CONTEXT, PROMPT) is None
+    assert cache.stats()["clients"] == 0
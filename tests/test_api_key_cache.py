@@ -0,0 +1,134 @@
+"""
+API key cache: TTL expiry, LRU eviction, and verify_api_key serving from
+the cache until a key is revoked or its entry expires.
+"""
+
+import asyncio
+import uuid
+
+import pytest
+from fastapi import HTTPException
+
+from backend import cache as cache_module
+from backend import database, dependencies
+from backend.cache import TTLCache
+from fake_db import FakePool
+
+CLIENT_ID = uuid.uuid4()
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(cache_module.time, "monotonic", lambda: now[0])
+    return now
+
+
+def test_entries_expire_after_ttl(clock):
+    cache = TTLCache(maxsize=10, ttl=60)
+    cache.set("key", {"plan": "pro"})
+    cache.set("short", 1, ttl=5)
+
+    clock[0] += 5
+    assert cache.get("short") is None
+    clock[0] += 54
+    assert cache.get("key") == {"plan": "pro"}
+    clock[0] += 1
+    assert cache.get("key") is None
+    assert len(cache) == 0
+
+
+def test_least_recently_used_is_evicted():
+    cache = TTLCache(maxsize=2)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")  # "b" is now least recently used
+    cache.set("c", 3)
+
+    assert cache.get("b") is None
+    assert (cache.get("a"), cache.get("c")) == (1, 3)
+    assert cache.evictions == 1
+
+
+def test_falsy_values_are_hits():
+    cache = TTLCache()
+    cache.set("empty", {})
+
+    assert cache.get("empty", "missing") == {}
+    assert (cache.hits, cache.misses) == (1, 0)
+
+
+@pytest.fixture
+def keys(monkeypatch):
+    """Fresh key cache over a fake `api_keys` table"""
+    active = {"key-a": True, "key-b": True}
+
+    def respond(method, query, args):
+        if "FROM api_keys" in query and active.get(args[0]):
+            return {
+                "api_key_id": uuid.uuid4(),
+                "client_id": CLIENT_ID,
+                "rate_limit_per_minute": 60,
+                "client_name": "Toko ABC",
+                "plan": "pro",
+                "status": "active",
+                "system_prompt": "Kamu adalah asisten Toko ABC.",
+                "collection_version": 1,
+            }
+        return None
+
+    pool = FakePool(respond)
+    monkeypatch.setattr(database, "db_pool", pool)
+    monkeypatch.setattr(dependencies, "api_key_cache", TTLCache(maxsize=10, ttl=60))
+    return active, pool
+
+
+def verify(key: str) -> dict:
+    return asyncio.run(dependencies.verify_api_key(key))
+
+
+def test_verified_key_is_served_from_cache_until_ttl(keys, clock):
+    _, pool = keys
+
+    first = verify("key-a")
+    assert verify("key-a") is first
+    assert pool.acquisitions == 1
+
+    clock[0] += 60
+    assert verify("key-a")["client_id"] == CLIENT_ID
+    assert pool.acquisitions == 2
+
+
+def test_unknown_key_is_not_cached(keys):
+    _, pool = keys
+
+    for _ in range(2):
+        with pytest.raises(HTTPException) as refused:
+            verify("key-unknown")
+        assert refused.value.status_code == 401
+    assert pool.acquisitions == 2
+
+
+def test_revoked_key_is_refused_after_invalidation(keys):
+    active, _ = keys
+    verify("key-a")
+    verify("key-b")
+
+    active["key-a"] = False
+    dependencies.invalidate_api_key("key-a")
+
+    with pytest.raises(HTTPException) as refused:
+        verify("key-a")
+    assert refused.value.status_code == 401
+    assert dependencies.api_key_cache.get("key-b") is not None
+
+
+def test_client_invalidation_drops_all_its_keys(keys):
+    verify("key-a")
+    verify("key-b")
+    dependencies.api_key_cache.set("other", {"client_id": uuid.uuid4()})
+
+    dependencies.invalidate_client(CLIENT_ID)
+
+    assert len(dependencies.api_key_cache) == 1
+    assert dependencies.api_key_cache.get("other") is not None
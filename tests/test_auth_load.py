@@ -0,0 +1,113 @@
+"""
+Mixed login and /chat load on a small connection pool.
+
+Logins verify bcrypt hashes on the password executor. A login must not hold
+a database connection while it waits for a bcrypt worker, otherwise a burst
+of logins drains the pool and /chat requests queue behind password hashing.
+"""
+
+import asyncio
+import time
+import uuid
+
+import bcrypt
+import httpx
+import pytest
+
+from backend import database
+from backend.config import PASSWORD_HASH_WORKERS, PASSWORD_HASH_QUEUE
+from backend.routes import auth as auth_routes
+from backend.routes import chat as chat_routes
+from backend.services import ollama
+from backend.services.backend_pool import BackendPool
+from backend.services.llm_scheduler import LLMScheduler
+from fake_db import FakePool
+from fake_ollama import FakeOllama
+
+POOL_SIZE = 10
+# Fill every bcrypt worker and queue slot without being rejected
+LOGINS = PASSWORD_HASH_WORKERS + PASSWORD_HASH_QUEUE
+PASSWORD = "rahasia-123"
+PASSWORD_HASH = bcrypt.hashpw(PASSWORD.encode(), bcrypt.gensalt(rounds=8)).decode()
+
+USER_ROW = {
+    "id": uuid.uuid4(),
+    "email": "owner@tokoabc.id",
+    "password_hash": PASSWORD_HASH,
+    "role": "client",
+    "client_id": uuid.uuid4(),
+    "client_name": "Toko ABC",
+    "plan": "pro",
+    "status": "active",
+    "key_hash": "test-key",
+}
+
+
+def respond(method, query, args):
+    if method == "fetchrow" and "FROM users u" in query:
+        return USER_ROW
+    if method == "fetch" and "chat_sessions" in query:
+        return [{"session_id": uuid.uuid4(), "role": None, "content": None}]
+    return None
+
+
+@pytest.fixture
+def pool(fake_chat_auth, monkeypatch):
+    # Sessions and usage go through the (fake) pool like in production
+    pool = FakePool(respond, size=POOL_SIZE)
+    monkeypatch.setattr(database, "db_pool", pool)
+    monkeypatch.setattr(chat_routes, "llm_scheduler", LLMScheduler(max_concurrency=4))
+    return pool
+
+
+async def login(client: httpx.AsyncClient) -> float:
+    started = time.perf_counter()
+    r = await client.post("/auth/login", json={"email": USER_ROW["email"], "password": PASSWORD})
+    assert r.status_code == 200, r.text
+    assert r.json()["api_key"] == "test-key"
+    return time.perf_counter() - started
+
+
+async def chat(client: httpx.AsyncClient) -> float:
+    started = time.perf_counter()
+    session_id = str(uuid.uuid4())
+    # A different question each time, so no chat is served from the answer cache
+    r = await client.post(
+        "/chat",
+        json={"message": f"berapa harga instal ulang? ({session_id})", "session_id": session_id},
+        headers={"x-api-key": "test-key"},
+    )
+    assert r.status_code == 200, r.text
+    return time.perf_counter() - started
+
+
+async def run_mixed_load(monkeypatch, make_app) -> dict:
+    async with FakeOllama(delay=0.01) as fake:
+        monkeypatch.setattr(ollama, "generate_pool", BackendPool("generate", [fake.url]))
+        monkeypatch.setattr(ollama, "embed_pool", BackendPool("embed", [fake.url]))
+        transport = httpx.ASGITransport(app=make_app(auth_routes.router, chat_routes.router))
+        try:
+            async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+                baseline = max([await chat(client) for _ in range(3)])
+
+                started = time.perf_counter()
+                logins = asyncio.ensure_future(asyncio.gather(*(login(client) for _ in range(LOGINS))))
+                # Steady chat traffic for as long as the login burst lasts
+                chat_latencies = []
+                while not logins.done():
+                    chat_latencies.append(await chat(client))
+                await logins
+                login_wall = time.perf_counter() - started
+        finally:
+            await ollama.close_http_client()
+    return {"baseline": baseline, "chats": chat_latencies, "login_wall": login_wall}
+
+
+def test_login_burst_does_not_starve_chat(pool, monkeypatch, make_app):
+    result = asyncio.run(run_mixed_load(monkeypatch, make_app))
+
+    # Logins only hold a connection for their one lookup
+    assert pool.max_in_use < POOL_SIZE
+    # Chat kept flowing during the burst instead of waiting for bcrypt
+    assert len(result["chats"]) >= 2
+    assert max(result["chats"]) < max(result["login_wall"] / 2, 3 * result["baseline"])
@@ -0,0 +1,137 @@
+"""
+Backend pool over several fake Ollama servers: least-outstanding selection,
+circuit breaker (trip, half-open probe, recovery), connection failover, and
+503 + Retry-After when no backend is left.
+"""
+
+import asyncio
+import json
+
+import httpx
+import pytest
+from fastapi import HTTPException
+
+from backend.services import ollama
+from backend.services.backend_pool import BackendPool
+from fake_ollama import FakeOllama
+
+COOLDOWN = 0.2
+
+
+async def generate(pool: BackendPool) -> dict:
+    return await ollama._post(pool, "/api/generate", {"prompt": "halo", "stream": False}, 5)
+
+
+def run(scenario):
+    async def wrapped():
+        try:
+            return await scenario()
+        finally:
+            await ollama.close_http_client()
+
+    return asyncio.run(wrapped())
+
+
+def test_requests_go_to_the_least_busy_backend():
+    async def scenario():
+        async with FakeOllama(delay=0.5) as slow, FakeOllama() as fast:
+            pool = BackendPool("generate", [slow.url, fast.url])
+            tasks = []
+            for _ in range(20):
+                tasks.append(asyncio.create_task(generate(pool)))
+                await asyncio.sleep(0.01)
+            await asyncio.gather(*tasks)
+            return len(slow.requests), len(fast.requests)
+
+    slow, fast = run(scenario)
+    # Round robin would send 10 to each; the slow one keeps requests outstanding
+    assert slow <= 3 and slow + fast == 20
+
+
+def test_circuit_trips_probes_and_recovers():
+    async def scenario():
+        async with FakeOllama(delay=0.05) as fake:
+            pool = BackendPool("generate", [fake.url], failure_threshold=2, cooldown=COOLDOWN)
+            backend = pool.backends[0]
+            fake.status = 500
+            for _ in range(2):
+                with pytest.raises(httpx.HTTPStatusError):
+                    await generate(pool)
+            assert backend.state == "open"
+
+            # Open: refused without reaching the server
+            with pytest.raises(HTTPException) as refused:
+                await generate(pool)
+            assert refused.value.status_code == 503
+            assert refused.value.headers["Retry-After"] == "1"
+            assert len(fake.requests) == 2
+
+            # Half-open: a failed probe opens the circuit again at once
+            await asyncio.sleep(COOLDOWN)
+            assert backend.state == "half_open"
+            with pytest.raises(httpx.HTTPStatusError):
+                await generate(pool)
+            assert backend.state == "open"
+
+            # Only one probe at a time; its success closes the circuit
+            await asyncio.sleep(COOLDOWN)
+            fake.status = 200
+            probe, concurrent = await asyncio.gather(generate(pool), generate(pool), return_exceptions=True)
+            assert probe["response"]
+            assert isinstance(concurrent, HTTPException) and concurrent.status_code == 503
+            assert backend.state == "closed"
+            await generate(pool)
+            return len(fake.requests)
+
+    assert run(scenario) == 5
+
+
+def test_refused_connections_fail_over():
+    async def scenario():
+        async with FakeOllama() as down, FakeOllama() as up:
+            pool = BackendPool("generate", [down.url, up.url], failure_threshold=2, cooldown=30)
+            await down.stop()  # Connections are refused from now on
+            for _ in range(6):
+                assert (await generate(pool))["response"]
+            down_stats = pool.backends[0].stats()
+
+            await up.stop()
+            await ollama.close_http_client()  # Drop kept-alive connections
+            with pytest.raises(HTTPException) as refused:
+                await generate(pool)
+            return len(up.requests), down_stats, refused.value
+
+    served, down_stats, refused = run(scenario)
+    assert served == 6
+    assert down_stats["state"] == "open" and down_stats["failures"] == 2
+    # Retry-After counts down to the first half-open circuit
+    assert refused.status_code == 503 and 1 <= int(refused.headers["Retry-After"]) <= 30
+
+
+def test_chat_returns_503_when_no_backend_is_healthy(fake_backend, monkeypatch, make_app):
+    async def scenario():
+        async with FakeOllama() as down, FakeOllama() as embedder:
+            # Refused connections, circuit still closed
+            pool = BackendPool("generate", [down.url], failure_threshold=1, cooldown=30)
+            await down.stop()
+            monkeypatch.setattr(ollama, "generate_pool", pool)
+            monkeypatch.setattr(ollama, "embed_pool", BackendPool("embed", [embedder.url]))
+            transport = httpx.ASGITransport(app=make_app())
+            body = {"message": "halo", "session_id": "s"}
+            headers = {"x-api-key": "test-key"}
+            async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+                # The circuit was closed when the stream started: error event
+                stream = await client.post("/chat/stream", json=body, headers=headers)
+                # Now open: refused before generation or streaming starts
+                chat = await client.post("/chat", json=body, headers=headers)
+                early = await client.post("/chat/stream", json=body, headers=headers)
+            return stream, chat, early
+
+    stream, chat, early = run(scenario)
+    assert stream.status_code == 200
+    event = next(block for block in stream.text.split("\n\n") if block.startswith("event: error"))
+    error = json.loads(event.split("data: ", 1)[1])
+    assert error["status"] == 503 and error["retry_after"] >= 1
+    for r in (chat, early):
+        assert r.status_code == 503
+        assert 1 <= int(r.headers["Retry-After"]) <= 30
@@ -0,0 +1,75 @@
+"""
+Concurrent /chat requests against a fake Ollama.
+
+The LLM and embedding calls go over real sockets to tests/fake_ollama.py;
+database-backed steps (API key, session, persistence) are replaced with
+in-memory fakes (the fake_backend fixture in conftest.py). Every fake Ollama call (embedding and generation) takes a
+fixed delay, so if any step blocked the event loop, latency would grow
+with the number of concurrent requests.
+"""
+
+import asyncio
+import time
+import uuid
+
+import httpx
+
+from backend.services import ollama
+from backend.services.backend_pool import BackendPool
+from fake_ollama import FakeOllama
+
+GENERATE_DELAY = 0.2
+CONCURRENT_REQUESTS = 20
+
+async def timed_chat(client: httpx.AsyncClient, message: str) -> float:
+    started = time.perf_counter()
+    r = await client.post(
+        "/chat",
+        json={"message": message, "session_id": str(uuid.uuid4())},
+        headers={"x-api-key": "test-key"},
+    )
+    assert r.status_code == 200, r.text
+    assert r.json()["reply"]
+    return time.perf_counter() - started
+
+
+async def run_load(monkeypatch, make_app) -> dict:
+    async with FakeOllama(delay=GENERATE_DELAY) as fake:
+        monkeypatch.setattr(ollama, "generate_pool", BackendPool("generate", [fake.url]))
+        monkeypatch.setattr(ollama, "embed_pool", BackendPool("embed", [fake.url]))
+        transport = httpx.ASGITransport(app=make_app())
+        try:
+            async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+                single = await timed_chat(client, "berapa harga instal ulang?")
+
+                started = time.perf_counter()
+                chats = asyncio.gather(
+                    *(timed_chat(client, f"pertanyaan {i}") for i in range(CONCURRENT_REQUESTS))
+                )
+                # /health must stay responsive while generations are in flight
+                await asyncio.sleep(GENERATE_DELAY / 4)
+                health_started = time.perf_counter()
+                assert (await client.get("/health")).status_code == 200
+                health_latency = time.perf_counter() - health_started
+                latencies = await chats
+                wall = time.perf_counter() - started
+        finally:
+            await ollama.close_http_client()
+        return {
+            "single": single,
+            "latencies": latencies,
+            "wall": wall,
+            "health": health_latency,
+            "max_in_flight": fake.max_in_flight,
+        }
+
+
+def test_concurrent_chat_latency_stays_flat(fake_backend, monkeypatch, make_app):
+    result = asyncio.run(run_load(monkeypatch, make_app))
+
+    # Generations overlap at the fake Ollama instead of queueing one by one
+    assert result["max_in_flight"] >= CONCURRENT_REQUESTS // 2
+    # Serial handling would take CONCURRENT_REQUESTS * 2 calls * GENERATE_DELAY (8 s)
+    assert result["wall"] < 6 * GENERATE_DELAY
+    assert max(result["latencies"]) < 3 * max(result["single"], GENERATE_DELAY)
+    assert result["health"] < GENERATE_DELAY
@@ -0,0 +1,80 @@
+"""
+Chunking strategies used by scripts/ingest.py.
+"""
+
+import pytest
+
+from chunking import Chunker, create_chunker, split_sentences, split_words
+
+SENTENCES = [
+    "Harga: Rp150.000.",
+    "Estimasi waktu pengerjaan: 30-60 menit.",
+    "Harga belum termasuk lisensi Windows jika diperlukan.",
+]
+CONTENT = " ".join(SENTENCES)
+
+
+def test_split_sentences_keeps_decimal_prices_intact():
+    assert split_sentences(CONTENT) == SENTENCES
+    assert split_sentences("Baris satu\n\nBaris dua") == ["Baris satu", "Baris dua"]
+
+
+def test_split_words_respects_word_boundaries():
+    pieces = split_words("instal ulang windows dan linux", 12)
+    assert pieces == ["instal ulang", "windows dan", "linux"]
+    # Over-long words are hard-sliced
+    assert split_words("a" * 25, 10) == ["a" * 10, "a" * 10, "a" * 5]
+
+
+def test_fixed_chunker_slices_every_size_characters():
+    chunks = create_chunker("fixed", size=20).split("t", CONTENT)
+    assert all(len(c) <= 20 for c in chunks)
+    assert "".join(chunks) == CONTENT
+
+
+def test_sentence_chunker_never_splits_a_sentence():
+    chunks = create_chunker("sentence", size=56, overlap=0).split("t", CONTENT)
+    assert chunks == SENTENCES
+
+
+def test_sentence_chunker_overlaps_by_whole_sentences():
+    chunks = create_chunker("sentence", size=100, overlap=1).split("t", CONTENT)
+    assert chunks == [
+        f"{SENTENCES[0]} {SENTENCES[1]}",
+        f"{SENTENCES[1]} {SENTENCES[2]}",
+    ]
+    assert all(len(c) <= 100 for c in chunks)
+
+
+def test_row_chunker_keeps_short_rows_whole_and_splits_long_ones():
+    assert create_chunker("row", size=500).split("t", f"  {CONTENT} ") == [CONTENT]
+    assert create_chunker("row", size=500).split("t", "   ") == []
+    assert create_chunker("row", size=56, overlap=0).split("t", CONTENT) == SENTENCES
+
+
+def test_title_prefix_applies_to_every_chunk():
+    chunker = create_chunker("title+sentence", size=56, overlap=0)
+    chunks = chunker.split("Instal Ulang Windows", CONTENT)
+    assert chunks == [f"Instal Ulang Windows\n{s}" for s in SENTENCES]
+    assert chunker.split("", CONTENT) == SENTENCES
+
+
+def test_signature_changes_with_strategy_and_parameters():
+    signatures = {
+        create_chunker("row", 500, 1).signature,
+        create_chunker("row", 400, 1).signature,
+        create_chunker("row", 500, 0).signature,
+        create_chunker("title+row", 500, 1).signature,
+        create_chunker("sentence", 500, 1).signature,
+    }
+    assert len(signatures) == 5
+
+
+def test_unknown_strategy_is_rejected():
+    with pytest.raises(ValueError):
+        create_chunker("paragraph")
+
+
+def test_chunker_base_class_requires_split():
+    with pytest.raises(TypeError):
+        Chunker()
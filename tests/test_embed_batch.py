@@ -0,0 +1,50 @@
+"""
+Batched chunk embedding in ingest.py against a fake Ollama /api/embed.
+"""
+
+import asyncio
+
+import httpx
+
+import ingest
+from fake_ollama import FakeOllama
+
+
+async def embed_through(fake: FakeOllama, monkeypatch, batches: list) -> list:
+    monkeypatch.setattr(ingest, "OLLAMA_EMBED_URL", fake.url + "/api/embed")
+    monkeypatch.setattr(ingest, "embed_semaphore", asyncio.Semaphore(2))
+    monkeypatch.setattr(ingest, "EMBED_RETRY_BACKOFF", 0.01)
+    async with httpx.AsyncClient() as client:
+        monkeypatch.setattr(ingest, "http_client", client)
+        return [await ingest.embed_batch(batch) for batch in batches]
+
+
+def test_one_request_per_batch_one_vector_per_chunk(monkeypatch):
+    async def scenario():
+        async with FakeOllama(dim=4) as fake:
+            results = await embed_through(fake, monkeypatch, [["a", "b", "c"], ["d"]])
+            return results, fake.requests
+
+    results, requests = asyncio.run(scenario())
+
+    assert [len(vectors) for vectors in results] == [3, 1]
+    assert all(len(v) == 4 for vectors in results for v in vectors)
+    assert [(path, payload["input"]) for path, payload in requests] == [
+        ("/api/embed", ["a", "b", "c"]),
+        ("/api/embed", ["d"]),
+    ]
+
+
+class FailsOnce(FakeOllama):
+    async def _respond(self, writer, path, payload):
+        self.status = 500 if not self.requests else 200
+        await super()._respond(writer, path, payload)
+
+
+def test_failed_batch_is_retried(monkeypatch):
+    async def scenario():
+        async with FailsOnce() as fake:
+            return await embed_through(fake, monkeypatch, [["a", "b"]]), len(fake.requests)
+
+    [vectors], attempts = asyncio.run(scenario())
+    assert len(vectors) == 2 and attempts == 2
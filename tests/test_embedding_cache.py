@@ -0,0 +1,96 @@
+"""
+Query embedding cache: normalized keys, memory and disk tiers, disk row cap.
+"""
+
+import asyncio
+import itertools
+import sqlite3
+import time
+from array import array
+
+import pytest
+
+from backend.services.embedding_cache import EmbeddingCache
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """Strictly increasing time.time(), so LRU order never ties"""
+    ticks = itertools.count(1)
+    monkeypatch.setattr(time, "time", lambda: float(next(ticks)))
+
+
+def make_embed():
+    calls = []
+
+    async def embed(text):
+        calls.append(text)
+        return [float(len(calls)), 0.5]
+
+    return embed, calls
+
+
+def test_normalized_text_hits_memory():
+    cache = EmbeddingCache("m", maxsize=10)
+    embed, calls = make_embed()
+
+    first = asyncio.run(cache.get_or_embed("Berapa harga  instal ulang?", embed))
+    again = asyncio.run(cache.get_or_embed("  berapa HARGA instal ulang? ", embed))
+
+    assert first == again and len(calls) == 1
+    assert cache.stats()["hit_ratio"] == 0.5
+
+
+def test_disk_tier_survives_restart(tmp_path):
+    path = str(tmp_path / "cache.sqlite3")
+    embed, calls = make_embed()
+    cache = EmbeddingCache("m", maxsize=10, path=path)
+    vector = asyncio.run(cache.get_or_embed("halo", embed))
+    cache.close()
+
+    restarted = EmbeddingCache("m", maxsize=10, path=path)
+    assert asyncio.run(restarted.get_or_embed("halo", embed)) == vector
+    assert restarted.disk_hits == 1 and len(calls) == 1
+    # A different model never reads the old vectors
+    assert asyncio.run(EmbeddingCache("other", maxsize=10, path=path).get_or_embed("halo", embed)) != vector
+
+
+def test_disk_rows_are_capped(tmp_path, clock):
+    cache = EmbeddingCache("m", maxsize=1, path=str(tmp_path / "cache.sqlite3"), max_rows=100)
+    for i in range(1000):
+        cache._disk_set(cache._key(f"q{i}"), array("f", [i]))
+
+    rows = cache._connect().execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+    assert rows <= 100
+    assert cache.stats()["disk_rows"] == rows
+    assert cache.disk_evictions == 1000 - rows
+    # The newest rows are kept
+    assert cache._disk_get(cache._key("q999")) is not None
+    assert cache._disk_get(cache._key("q0")) is None
+
+
+def test_disk_pruning_keeps_recently_used_rows(tmp_path, clock):
+    cache = EmbeddingCache("m", maxsize=1, path=str(tmp_path / "cache.sqlite3"), max_rows=10)
+    for i in range(10):
+        cache._disk_set(cache._key(f"q{i}"), array("f", [i]))
+    # q0 is the oldest insert but was read just now
+    assert cache._disk_get(cache._key("q0")) is not None
+
+    cache._disk_set(cache._key("q10"), array("f", [10]))
+
+    assert cache._disk_get(cache._key("q0")) is not None
+    assert cache._disk_get(cache._key("q1")) is None
+
+
+def test_existing_file_without_used_at_is_migrated(tmp_path):
+    path = str(tmp_path / "cache.sqlite3")
+    db = sqlite3.connect(path)
+    db.execute("CREATE TABLE embeddings (key TEXT PRIMARY KEY, model TEXT NOT NULL, vector BLOB NOT NULL)")
+    db.execute("INSERT INTO embeddings VALUES ('k', 'm', ?)", (array("f", [1.0]).tobytes(),))
+    db.commit()
+    db.close()
+
+    cache = EmbeddingCache("m", maxsize=1, path=path, max_rows=10)
+
+    assert list(cache._disk_get("k")) == [1.0]
+    assert cache.stats()["disk_rows"] == 1
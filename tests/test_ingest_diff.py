@@ -0,0 +1,103 @@
+"""
+Incremental re-ingestion: diffing a document's stored chunks against its
+new chunks, and applying moves and deletions to Postgres and ChromaDB.
+"""
+
+import asyncio
+import uuid
+
+import ingest
+from fake_db import FakePool
+
+
+def stored(*texts) -> list:
+    """document_chunks rows for texts stored at indices 0, 1, ..."""
+    return [
+        {"id": uuid.uuid4(), "chunk_index": i, "content_hash": ingest.content_hash(text)}
+        for i, text in enumerate(texts)
+    ]
+
+
+class FakeCollection:
+    def __init__(self, metadatas: dict):
+        self.metadatas = metadatas  # vector id -> metadata
+        self.calls = []
+
+    def get(self, ids, include):
+        self.calls.append("get")
+        return {"ids": ids, "metadatas": [self.metadatas[i] for i in ids]}
+
+    def update(self, ids, metadatas):
+        self.calls.append("update")
+        self.metadatas.update(zip(ids, metadatas))
+
+    def delete(self, ids):
+        self.calls.append("delete")
+        for vector_id in ids:
+            self.metadatas.pop(vector_id)
+
+
+def apply(rows: list, moved: list, deleted: list) -> tuple:
+    pool = FakePool()
+    collection = FakeCollection({str(r["id"]): {"chunk_index": r["chunk_index"]} for r in rows})
+
+    async def scenario():
+        ingest.chroma_lock = asyncio.Lock()
+        async with pool.acquire() as conn:
+            await ingest.apply_chunk_changes(conn, collection, moved, deleted)
+
+    asyncio.run(scenario())
+    return pool, collection
+
+
+def test_edited_chunk_is_re_embedded_under_its_old_id():
+    rows = stored("a", "b", "c")
+    changed, moved, deleted = ingest.diff_chunks(rows, ["a", "b2", "c"])
+    assert changed == [(rows[1]["id"], 1, "b2", ingest.content_hash("b2"))]
+    assert moved == [] and deleted == []
+
+
+def test_insertion_shifts_later_chunks_without_re_embedding():
+    rows = stored("a", "b", "c")
+    changed, moved, deleted = ingest.diff_chunks(rows, ["a", "new", "b", "c"])
+
+    [(chunk_id, index, text, _)] = changed
+    assert index == 1 and text == "new" and chunk_id not in {r["id"] for r in rows}
+    assert moved == [(rows[1]["id"], 2), (rows[2]["id"], 3)] and deleted == []
+
+    pool, collection = apply(rows, moved, deleted)
+    assert pool.calls == [
+        ("executemany", "UPDATE document_chunks SET chunk_index = $2 WHERE id = $1",
+         ([(str(rows[1]["id"]), 2), (str(rows[2]["id"]), 3)],)),
+    ]
+    assert collection.metadatas[str(rows[2]["id"])] == {"chunk_index": 3}
+    assert collection.metadatas[str(rows[0]["id"])] == {"chunk_index": 0}
+
+
+def test_duplicate_identical_chunks_keep_their_rows():
+    rows = stored("faq", "faq", "x")
+    assert ingest.diff_chunks(rows, ["faq", "faq", "x"]) == ([], [], [])
+
+    # One copy removed: the other keeps its row and index
+    changed, moved, deleted = ingest.diff_chunks(rows, ["faq", "x"])
+    assert changed == [] and moved == [(rows[2]["id"], 1)] and deleted == [rows[1]["id"]]
+
+
+def test_deleted_trailing_chunk_is_removed_everywhere():
+    rows = stored("a", "b", "c")
+    changed, moved, deleted = ingest.diff_chunks(rows, ["a", "b"])
+    assert changed == [] and moved == [] and deleted == [rows[2]["id"]]
+
+    pool, collection = apply(rows, moved, deleted)
+    assert pool.calls == [
+        ("execute", "DELETE FROM document_chunks WHERE id = ANY($1::uuid[])", ([str(rows[2]["id"])],)),
+    ]
+    assert collection.calls == ["delete"] and str(rows[2]["id"]) not in collection.metadatas
+
+
+def test_unchanged_document_writes_nothing():
+    rows = stored("a", "b")
+    assert ingest.diff_chunks(rows, ["a", "b"]) == ([], [], [])
+
+    pool, collection = apply(rows, [], [])
+    assert pool.calls == [] and collection.calls == []
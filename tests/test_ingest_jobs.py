@@ -0,0 +1,70 @@
+"""
+ingest.py job bookkeeping: command-line runs claim a job before resuming it,
+and finished jobs do not keep their per-document rows.
+"""
+
+import asyncio
+import uuid
+
+import ingest
+from fake_db import FakePool
+
+CLIENT = {"id": uuid.uuid4(), "name": "Toko ABC"}
+JOB = {"id": uuid.uuid4(), "status": "running", "started_at": "yesterday", "source_filter": None, "source_exact": False}
+
+
+def make_respond(claimed: bool):
+    def respond(method, query, args):
+        if method == "fetchrow" and "FROM ingest_jobs" in query:
+            return JOB
+        if method == "fetchval" and "RETURNING id" in query:
+            return JOB["id"] if claimed else None
+        return None
+
+    return respond
+
+
+def start(claimed: bool, job_id=None) -> tuple:
+    pool = FakePool(make_respond(claimed))
+
+    async def scenario():
+        async with pool.acquire() as conn:
+            return await ingest.start_job(conn, CLIENT, None, job_id)
+
+    return asyncio.run(scenario()), pool
+
+
+def test_resume_claims_the_job_unless_another_run_holds_it():
+    (job_id, resumed), pool = start(claimed=False)
+    assert job_id is None and not resumed
+    claim = pool.queries("fetchval")[0]
+    assert "status IN ('pending', 'failed')" in claim and "status = 'running' AND updated_at <" in claim
+    assert pool.calls[-1][2] == (JOB["id"], ingest.JOB_STALE_AFTER)
+    assert not any("ingest_job_documents" in q for q in pool.queries())
+
+    (job_id, resumed), pool = start(claimed=True)
+    assert job_id == JOB["id"] and resumed
+    assert any(q.startswith("INSERT INTO ingest_job_documents") for q in pool.queries("execute"))
+
+
+def test_job_queued_by_the_api_is_not_claimed_again():
+    # The API worker claimed it (pending -> running) before starting ingest.py
+    (job_id, _), pool = start(claimed=False, job_id=str(JOB["id"]))
+    assert job_id == JOB["id"]
+    assert not pool.queries("fetchval")
+
+
+def test_finished_job_drops_its_document_rows():
+    pool = FakePool()
+
+    async def scenario():
+        async with pool.acquire() as conn:
+            await ingest.finish_job(conn, JOB["id"])
+            await ingest.finish_job(conn, JOB["id"], error="embedding server down")
+
+    asyncio.run(scenario())
+
+    (_, query, completed), (_, _, failed) = pool.calls
+    assert "DELETE FROM ingest_job_documents" in query
+    assert "WHERE status = 'completed'" in query  # Failed jobs keep them to resume
+    assert completed[1:] == ("completed", None) and failed[1:] == ("failed", "embedding server down")
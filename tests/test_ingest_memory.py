@@ -0,0 +1,55 @@
+"""
+Ingest memory profile: peak RSS must not grow with corpus size.
+
+Each corpus size runs in its own process (tests/ingest_memory_probe.py),
+so the peaks are independent. The large corpus defaults to 512 MB; set
+INGEST_MEMORY_TEST_MB for multi-GB runs. The Postgres variant streams a
+generate_series() table through a server-side cursor and only runs when
+TEST_DATABASE_URL points at a scratch database.
+"""
+
+import os
+import subprocess
+import sys
+
+import pytest
+
+TESTS_DIR = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.dirname(TESTS_DIR)
+SMALL_MB = 16
+LARGE_MB = int(os.getenv("INGEST_MEMORY_TEST_MB", 512))
+# Queued batches and in-flight documents; independent of corpus size
+MAX_GROWTH_MB = 64
+
+
+def peak_rss_mb(corpus_mb: int, source: str) -> float:
+    env = {
+        **os.environ,
+        "PYTHONPATH": os.pathsep.join([TESTS_DIR, os.path.join(ROOT, "scripts"), ROOT]),
+    }
+    result = subprocess.run(
+        [sys.executable, os.path.join(TESTS_DIR, "ingest_memory_probe.py"), str(corpus_mb), source],
+        env=env,
+        capture_output=True,
+        text=True,
+        timeout=600,
+    )
+    assert result.returncode == 0, result.stderr[-2000:]
+    return int(result.stdout.split()[-1]) / 1024  # ru_maxrss is in KB on Linux
+
+
+@pytest.mark.parametrize(
+    "source",
+    [
+        "generated",
+        pytest.param(
+            "postgres",
+            marks=pytest.mark.skipif(not os.getenv("TEST_DATABASE_URL"), reason="TEST_DATABASE_URL not set"),
+        ),
+    ],
+)
+def test_peak_rss_is_bounded_by_pipeline_not_corpus(source):
+    small = peak_rss_mb(SMALL_MB, source)
+    large = peak_rss_mb(LARGE_MB, source)
+
+    assert large - small < MAX_GROWTH_MB, f"{SMALL_MB} MB corpus: {small:.0f} MB RSS, {LARGE_MB} MB corpus: {large:.0f} MB RSS"
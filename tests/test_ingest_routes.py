@@ -0,0 +1,170 @@
+"""
+Ingest API access control and job limits: a JWT of a member of the API
+key's client is required, a client has one active job at a time, a
+full worker queue is refused up front, and oversized or malformed uploads
+are rejected before anything is written.
+"""
+
+import asyncio
+import datetime
+import uuid
+
+import httpx
+import pytest
+
+from backend import database
+from backend.auth.utils import create_access_token
+from backend.routes import ingest as ingest_routes
+from backend.services.ingest_worker import IngestWorker
+from fake_db import FakePool
+
+CLIENT_ID = uuid.uuid4()
+MEMBER_ID = uuid.uuid4()
+OUTSIDER_ID = uuid.uuid4()
+ACTIVE_JOB = uuid.uuid4()
+NEW_JOB = uuid.uuid4()
+UPLOAD = {"source": "faq.csv", "documents": [{"title": "Jam buka", "content": "Senin-Sabtu 09.00-17.00"}]}
+
+
+def make_respond(active_job: bool = False):
+    def respond(method, query, args):
+        if "FROM users WHERE id" in query:
+            return {"id": args[0], "email": "owner@tokoabc.id", "role": "client"}
+        if "FROM user_clients" in query:
+            return 1 if args == (MEMBER_ID, CLIENT_ID) else None
+        if "status IN ('pending', 'running')" in query:
+            return {"id": ACTIVE_JOB, "status": "running"} if active_job else None
+        if query.lstrip().startswith("INSERT INTO ingest_jobs"):
+            return {"id": NEW_JOB, "status": "pending", "created_at": datetime.datetime.now()}
+        if "INSERT INTO documents" in query:
+            return [{"inserted": True}]
+        return None
+
+    return respond
+
+
+@pytest.fixture
+def worker(monkeypatch):
+    async def verify_api_key(x_api_key):
+        return {"client_id": CLIENT_ID, "rate_limit": 1000, "plan": "pro"}
+
+    async def check_rate_limit(*args):
+        return None
+
+    worker = IngestWorker(workers=1, max_queue=1)
+    monkeypatch.setattr(ingest_routes, "verify_api_key", verify_api_key)
+    monkeypatch.setattr(ingest_routes, "check_rate_limit", check_rate_limit)
+    monkeypatch.setattr(ingest_routes, "ingest_worker", worker)
+    return worker
+
+
+def use_db(monkeypatch, active_job: bool = False) -> FakePool:
+    pool = FakePool(make_respond(active_job))
+    monkeypatch.setattr(database, "db_pool", pool)
+    return pool
+
+
+def headers(user_id=None) -> dict:
+    headers = {"x-api-key": "public-widget-key"}
+    if user_id:
+        headers["Authorization"] = "Bearer " + create_access_token({"sub": str(user_id)})
+    return headers
+
+
+async def post(make_app, worker, path: str, user_id=None, json=None) -> httpx.Response:
+    worker.queue = asyncio.Queue(maxsize=worker.max_queue)
+    transport = httpx.ASGITransport(app=make_app(ingest_routes.router))
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        return await client.post(path, json=json, headers=headers(user_id))
+
+
+def test_api_key_alone_is_refused(worker, monkeypatch, make_app):
+    pool = use_db(monkeypatch)
+
+    r = asyncio.run(post(make_app, worker, "/ingest/documents", json=UPLOAD))
+
+    assert r.status_code in (401, 403)
+    assert pool.acquisitions == 0
+
+
+def test_user_of_another_client_is_forbidden(worker, monkeypatch, make_app):
+    pool = use_db(monkeypatch)
+
+    for path, body in (("/ingest/documents", UPLOAD), ("/ingest/jobs", None)):
+        r = asyncio.run(post(make_app, worker, path, OUTSIDER_ID, body))
+        assert r.status_code == 403
+    assert not any("INSERT" in q for q in pool.queries())
+    assert worker.queue.empty()
+
+
+def test_member_upload_queues_a_job(worker, monkeypatch, make_app):
+    pool = use_db(monkeypatch)
+
+    r = asyncio.run(post(make_app, worker, "/ingest/documents", MEMBER_ID, UPLOAD))
+
+    assert r.status_code == 202, r.text
+    assert r.json()["job_id"] == str(NEW_JOB)
+    assert r.json()["documents"]["inserted"] == 1
+    assert list(worker.queue._queue) == [(str(NEW_JOB), CLIENT_ID)]
+    # The per-client lock is taken before the active-job check
+    writes = pool.queries()
+    assert writes.index("SELECT pg_advisory_xact_lock(hashtext($1))") < writes.index(
+        next(q for q in writes if "status IN ('pending', 'running')" in q)
+    )
+
+
+def test_second_job_while_one_is_active_is_429(worker, monkeypatch, make_app):
+    pool = use_db(monkeypatch, active_job=True)
+
+    for path, body in (("/ingest/documents", UPLOAD), ("/ingest/jobs", None)):
+        r = asyncio.run(post(make_app, worker, path, MEMBER_ID, body))
+        assert r.status_code == 429
+        assert str(ACTIVE_JOB) in r.json()["detail"]
+        assert r.headers["Retry-After"] == str(ingest_routes.ACTIVE_JOB_RETRY_AFTER)
+    # Refused before the documents were written
+    assert not any("INSERT INTO documents" in q for q in pool.queries())
+
+
+def test_full_worker_queue_is_503(worker, monkeypatch, make_app):
+    pool = use_db(monkeypatch)
+    worker.full = lambda: True
+
+    r = asyncio.run(post(make_app, worker, "/ingest/jobs", MEMBER_ID))
+
+    assert r.status_code == 503 and "Retry-After" in r.headers
+    assert not any("ingest_jobs" in q for q in pool.queries())
+
+
+def test_too_many_documents_is_413(worker, monkeypatch, make_app):
+    pool = use_db(monkeypatch)
+    monkeypatch.setattr(ingest_routes, "INGEST_MAX_DOCUMENTS", 2)
+    documents = [{"title": f"T{i}", "content": "isi"} for i in range(3)]
+
+    r = asyncio.run(post(make_app, worker, "/ingest/documents", MEMBER_ID, {"source": "faq", "documents": documents}))
+    assert r.status_code == 413
+
+    r = asyncio.run(post(make_app, worker, "/ingest/documents", MEMBER_ID, {"source": "faq", "documents": documents[:2]}))
+    assert r.status_code == 202, r.text
+    assert r.json()["documents"]["received"] == 2
+    assert sum("INSERT INTO documents" in q for q in pool.queries()) == 1
+
+
+@pytest.mark.parametrize(
+    "body, status",
+    [
+        ({"source": "faq.csv"}, 422),  # documents missing
+        ({"source": "faq.csv", "documents": "Jam buka"}, 422),  # not a list
+        ({"source": "faq.csv", "documents": [{"title": "Jam buka"}]}, 422),  # no content
+        ({"source": "faq.csv", "documents": [{"title": ["Jam"], "content": "x"}]}, 422),  # not a string
+        ({"source": "   ", "documents": UPLOAD["documents"]}, 400),  # blank source
+        ({"source": "faq.csv", "documents": [{"title": " ", "content": "x"}]}, 400),  # nothing usable
+    ],
+)
+def test_malformed_upload_is_rejected_before_writing(worker, monkeypatch, make_app, body, status):
+    pool = use_db(monkeypatch)
+
+    r = asyncio.run(post(make_app, worker, "/ingest/documents", MEMBER_ID, body))
+
+    assert r.status_code == status, r.text
+    assert not any("INSERT" in q for q in pool.queries())
+    assert worker.queue.empty()
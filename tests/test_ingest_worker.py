@@ -0,0 +1,66 @@
+"""
+Ingest worker startup: pending jobs are queued and stale running jobs are
+reclaimed before workers pick them up; the queue holds at most max_queue jobs.
+"""
+
+import asyncio
+import uuid
+
+from backend import database
+from backend.services.ingest_worker import IngestWorker
+from fake_db import FakePool
+
+CLIENT_ID = uuid.uuid4()
+PENDING_JOB = uuid.uuid4()
+STALE_JOB = uuid.uuid4()
+
+
+def respond(method, query, args):
+    if method == "fetch" and "status = 'running'" in query:
+        return [{"id": STALE_JOB}]
+    if method == "fetch" and "status = 'pending'" in query:
+        return [{"id": PENDING_JOB, "client_id": CLIENT_ID}, {"id": STALE_JOB, "client_id": CLIENT_ID}]
+    return None  # Claims fail, so no ingest.py subprocess is started
+
+
+async def start_and_stop(worker: IngestWorker) -> list:
+    await worker.start()
+    queued = list(worker.queue._queue)
+    await worker.stop()
+    return queued
+
+
+def test_start_reclaims_stale_running_jobs_then_queues_pending(monkeypatch):
+    pool = FakePool(respond)
+    monkeypatch.setattr(database, "db_pool", pool)
+    worker = IngestWorker(workers=1, stale_after=600)
+
+    queued = asyncio.run(start_and_stop(worker))
+
+    reclaim, pending = pool.calls[:2]
+    assert reclaim[0] == "fetch" and reclaim[1].startswith("UPDATE ingest_jobs SET status = 'pending'")
+    assert reclaim[2] == (600,)
+    assert pending[1].startswith("SELECT id, client_id FROM ingest_jobs WHERE status = 'pending'")
+    assert queued == [(PENDING_JOB, CLIENT_ID), (STALE_JOB, CLIENT_ID)]
+    assert worker.stats()["jobs_reclaimed"] == 1
+
+
+def test_queue_is_bounded_and_overflow_stays_pending(monkeypatch):
+    def respond(method, query, args):
+        return [{"id": PENDING_JOB, "client_id": CLIENT_ID}] if method == "fetch" else None
+
+    pool = FakePool(respond)
+    monkeypatch.setattr(database, "db_pool", pool)
+    worker = IngestWorker(workers=1, max_queue=1)
+
+    async def scenario():
+        worker.workers = 0  # Nothing takes jobs off the queue
+        await worker.start()
+        worker.submit(uuid.uuid4(), CLIENT_ID)  # Full: logged, not raised
+        return list(worker.queue._queue), worker.full()
+
+    queued, full = asyncio.run(scenario())
+
+    pending = [c for c in pool.calls if "status = 'pending' ORDER BY" in c[1]]
+    assert pending[0][2] == (1,)  # Only as many pending jobs as fit
+    assert queued == [(PENDING_JOB, CLIENT_ID)] and full
@@ -0,0 +1,47 @@
+"""
+Full-text query building and reciprocal rank fusion.
+"""
+
+import asyncio
+
+from backend import database
+from backend.services import lexical_search
+from backend.services.lexical_search import MAX_QUERY_TERMS, build_tsquery, reciprocal_rank_fusion
+from fake_db import FakePool
+
+
+def test_build_tsquery_ors_distinct_lowercased_terms():
+    assert build_tsquery("Harga upgrade RAM, harga SSD?") == "harga | upgrade | ram | ssd"
+
+
+def test_build_tsquery_drops_operators():
+    assert build_tsquery("ram & !ssd | (windows):* <-> 'x'") == "ram | ssd | windows | x"
+    assert build_tsquery("?!") == ""
+
+
+def test_build_tsquery_caps_terms():
+    query = " ".join(f"kata{i}" for i in range(50))
+    assert len(build_tsquery(query).split(" | ")) == MAX_QUERY_TERMS
+
+
+def test_rrf_rewards_items_ranked_by_both_lists():
+    fused = reciprocal_rank_fusion([["a", "b", "c"], ["c", "d"]], k=60)
+    ids = [item_id for item_id, _ in fused]
+    assert ids[0] == "c"
+    assert set(ids) == {"a", "b", "c", "d"}
+    assert dict(fused)["c"] == 1 / 63 + 1 / 61
+
+
+def test_rrf_ties_keep_first_seen_order():
+    assert [i for i, _ in reciprocal_rank_fusion([["a", "b"], ["b", "a"]])] == ["a", "b"]
+    assert reciprocal_rank_fusion([]) == []
+
+
+def test_search_degrades_to_empty_on_database_error(monkeypatch):
+    pool = FakePool(lambda method, query, args: RuntimeError("column search_vector does not exist"))
+    monkeypatch.setattr(database, "db_pool", pool)
+
+    assert asyncio.run(lexical_search.search("client", "harga ram", 10)) == []
+    # Queries with no terms never reach the database
+    assert asyncio.run(lexical_search.search("client", "??", 10)) == []
+    assert pool.acquisitions == 1
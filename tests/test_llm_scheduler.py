@@ -0,0 +1,195 @@
+"""
+LLM scheduler: concurrency cap, weighted fair queuing, fast rejection,
+per-plan and per-client wait metrics, and /metrics output without tenant
+ids or backend URLs.
+"""
+
+import asyncio
+import json
+import uuid
+
+import httpx
+import pytest
+from fastapi import FastAPI, HTTPException
+
+from backend import dependencies
+from backend.routes import health as health_routes
+from backend.metrics import client_label
+from backend.services import llm_scheduler as llm_scheduler_module
+from backend.services.backend_pool import BackendPool
+from backend.services.llm_scheduler import LLMScheduler
+
+WEIGHTS = {"free": 1, "basic": 2, "pro": 4}
+
+
+def make_scheduler(**kwargs) -> LLMScheduler:
+    options = {
+        "max_concurrency": 1,
+        "queue_timeout": 5,
+        "max_queue": 64,
+        "max_queued_per_client": 64,
+        "weights": WEIGHTS,
+    }
+    return LLMScheduler(**{**options, **kwargs})
+
+
+async def run_contended(scheduler: LLMScheduler, requests: list) -> list:
+    """Queue all `requests` (client, plan) behind a held slot; return grant order"""
+    order = []
+
+    async def one(client, plan):
+        async with scheduler.slot(client, plan):
+            order.append(client)
+            await asyncio.sleep(0)
+
+    await scheduler.acquire("holder", "free")
+    tasks = [asyncio.create_task(one(c, p)) for c, p in requests]
+    await asyncio.sleep(0)  # Everyone is queued
+    scheduler.release("holder")
+    await asyncio.gather(*tasks)
+    return order
+
+
+def test_concurrency_is_capped():
+    async def scenario():
+        scheduler = make_scheduler(max_concurrency=2)
+        running = peak = 0
+
+        async def one(i):
+            nonlocal running, peak
+            async with scheduler.slot(f"c{i}", "free"):
+                running += 1
+                peak = max(peak, running)
+                await asyncio.sleep(0.01)
+                running -= 1
+
+        await asyncio.gather(*(one(i) for i in range(6)))
+        return peak, scheduler.active
+
+    assert asyncio.run(scenario()) == (2, 0)
+
+
+def test_pro_client_gets_four_times_the_slots_of_free():
+    requests = [("free", "free")] * 10 + [("pro", "pro")] * 10
+    order = asyncio.run(run_contended(make_scheduler(), requests))
+    first_ten = order[:10]
+    assert first_ten.count("pro") == 8 and first_ten.count("free") == 2
+
+
+def test_busy_client_cannot_starve_others():
+    requests = [("busy", "free")] * 10 + [("quiet", "free")]
+    order = asyncio.run(run_contended(make_scheduler(), requests))
+    assert order.index("quiet") <= 1
+
+
+def test_per_client_queue_limit_is_429():
+    async def scenario():
+        scheduler = make_scheduler(max_queued_per_client=2)
+        await scheduler.acquire("holder", "free")
+        waiting = [asyncio.create_task(scheduler.acquire("c", "free")) for _ in range(2)]
+        await asyncio.sleep(0)
+        with pytest.raises(HTTPException) as rejected:
+            scheduler.admit("c", "free")
+        scheduler.admit("other", "free")  # Other clients are unaffected
+        for task in waiting:
+            task.cancel()
+        await asyncio.gather(*waiting, return_exceptions=True)
+        return rejected.value
+
+    error = asyncio.run(scenario())
+    assert error.status_code == 429 and error.headers["Retry-After"] == "1"
+
+
+def test_full_queue_is_503():
+    async def scenario():
+        scheduler = make_scheduler(max_queue=1)
+        await scheduler.acquire("holder", "free")
+        waiting = asyncio.create_task(scheduler.acquire("a", "free"))
+        await asyncio.sleep(0)
+        with pytest.raises(HTTPException) as rejected:
+            await scheduler.acquire("b", "free")
+        waiting.cancel()
+        await asyncio.gather(waiting, return_exceptions=True)
+        return rejected.value.status_code, scheduler.queued
+
+    assert asyncio.run(scenario()) == (503, 0)
+
+
+def test_queue_timeout_is_503_and_frees_the_queue():
+    async def scenario():
+        scheduler = make_scheduler(queue_timeout=0.05)
+        await scheduler.acquire("holder", "free")
+        with pytest.raises(HTTPException) as rejected:
+            await scheduler.acquire("late", "free")
+        scheduler.release("holder")
+        # The timed-out waiter never takes the slot
+        await scheduler.acquire("next", "free")
+        return rejected.value.status_code, scheduler.timed_out, scheduler.active
+
+    assert asyncio.run(scenario()) == (503, 1, 1)
+
+
+def test_stats_per_plan_and_per_client_label():
+    clients = [uuid.uuid4() for _ in range(3)]
+    requests = [(clients[0], "pro"), (clients[1], "free"), (clients[2], "free"), (clients[2], "free")]
+    scheduler = make_scheduler()
+    asyncio.run(run_contended(scheduler, requests))
+
+    stats = scheduler.stats()
+    assert len(stats["clients"]) == 4  # Including the slot holder
+    assert stats["plans"]["free"]["clients"] == 3
+    assert stats["plans"]["free"]["requests"] == 4
+    assert stats["plans"]["pro"]["requests"] == 1
+    busy = stats["clients"][client_label(clients[2])]
+    assert busy["plan"] == "free" and busy["requests"] == 2
+    assert 0 < busy["wait_p50_ms"] <= busy["wait_p95_ms"] <= busy["wait_max_ms"]
+    assert not any(str(c) in json.dumps(stats) for c in clients)
+
+
+def test_idle_clients_are_pruned(monkeypatch):
+    monkeypatch.setattr(llm_scheduler_module, "MAX_CLIENTS", 4)
+
+    async def scenario():
+        scheduler = make_scheduler()
+        await scheduler.acquire("holder", "free")  # Active: never pruned
+        for i in range(10):
+            scheduler.admit(f"idle{i}", "free")
+        return scheduler
+
+    scheduler = asyncio.run(scenario())
+    assert len(scheduler._clients) <= 4
+    assert "holder" in scheduler._clients and "idle9" in scheduler._clients
+
+
+# ---------------- /metrics
+
+async def get_metrics(headers: dict = None) -> httpx.Response:
+    app = FastAPI()
+    app.include_router(health_routes.router)
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+        return await client.get("/metrics", headers=headers or {})
+
+
+def test_metrics_hide_client_ids_and_backend_urls(monkeypatch):
+    client_id = uuid.uuid4()
+    scheduler = make_scheduler()
+    asyncio.run(run_contended(scheduler, [(client_id, "pro")]))
+    monkeypatch.setattr(health_routes, "llm_scheduler", scheduler)
+    monkeypatch.setattr(health_routes, "generate_pool", BackendPool("generate", ["http://gpu1.internal:11434"]))
+    monkeypatch.setattr(dependencies, "METRICS_TOKEN", "")
+
+    r = asyncio.run(get_metrics())
+
+    assert r.status_code == 200
+    assert str(client_id) not in r.text
+    assert "gpu1.internal" not in r.text
+    assert r.json()["llm_scheduler"]["clients"][client_label(client_id)]["plan"] == "pro"
+    assert r.json()["ollama_backends"]["generate"]["0"]["state"] == "closed"
+
+
+def test_metrics_token_is_required_when_set(monkeypatch):
+    monkeypatch.setattr(dependencies, "METRICS_TOKEN", "s3cret")
+
+    assert asyncio.run(get_metrics()).status_code == 401
+    assert asyncio.run(get_metrics({"Authorization": "Bearer wrong"})).status_code == 401
+    assert asyncio.run(get_metrics({"Authorization": "Bearer s3cret"})).status_code == 200
@@ -0,0 +1,88 @@
+"""
+Prompt building within the per-plan token budget.
+"""
+
+import pytest
+
+from backend.services import prompt
+from backend.services.prompt import build_prompt, estimate_tokens, format_exchange, render
+
+SYSTEM = "Kamu adalah asisten Toko ABC."
+QUESTION = "berapa harga instal ulang windows?"
+CHUNKS = [
+    "Instal Ulang Windows\nHarga: Rp150.000. Estimasi waktu pengerjaan: 30-60 menit.",
+    "Instal Ulang Linux\nHarga: Rp100.000. Estimasi waktu pengerjaan: 30-45 menit.",
+    "Upgrade RAM\nHarga jasa: Rp50.000 (belum termasuk harga RAM).",
+]
+HISTORY = [
+    {"role": "user", "content": "halo"},
+    {"role": "assistant", "content": "Halo! Ada yang bisa dibantu?"},
+    {"role": "user", "content": "toko buka hari minggu?"},
+    {"role": "assistant", "content": "Tidak, toko buka Senin sampai Sabtu."},
+]
+BASE = estimate_tokens(render(SYSTEM, "", "", QUESTION))
+
+
+def chunk_cost(i: int) -> int:
+    return estimate_tokens(CHUNKS[i]) + 1
+
+
+def exchange_cost(i: int) -> int:
+    return estimate_tokens(format_exchange(HISTORY[2 * i : 2 * i + 2]))
+
+
+def build_with_budget(monkeypatch, budget: int) -> dict:
+    monkeypatch.setattr(prompt, "PROMPT_TOKEN_BUDGET", {"free": budget})
+    return build_prompt(SYSTEM, HISTORY, CHUNKS, QUESTION, "free")
+
+
+def test_estimate_tokens():
+    assert estimate_tokens("") == 0
+    assert estimate_tokens("halo") == 1
+    # Numbers split into 1-3 digit groups, punctuation counts separately
+    assert estimate_tokens("Rp150.000") == estimate_tokens("Rp") + 3
+    # Long words are charged as several sub-words
+    assert estimate_tokens("pengerjaannya") == 3
+
+
+def test_everything_fits_in_a_large_budget(monkeypatch):
+    result = build_with_budget(monkeypatch, 100_000)
+    assert result["chunks"] == CHUNKS
+    assert result["history"] == HISTORY
+    assert result["tokens"] == estimate_tokens(result["prompt"])
+    assert all(chunk in result["prompt"] for chunk in CHUNKS)
+
+
+def test_top_chunk_then_latest_exchange_are_kept_first(monkeypatch):
+    result = build_with_budget(monkeypatch, BASE + chunk_cost(0) + exchange_cost(1))
+    assert result["chunks"] == CHUNKS[:1]
+    assert result["history"] == HISTORY[2:]
+
+
+def test_remaining_chunks_come_before_older_history(monkeypatch):
+    budget = BASE + chunk_cost(0) + exchange_cost(1) + chunk_cost(1) + chunk_cost(2)
+    result = build_with_budget(monkeypatch, budget)
+    assert result["chunks"] == CHUNKS
+    assert result["history"] == HISTORY[2:]
+
+
+def test_system_prompt_and_question_are_always_kept(monkeypatch):
+    result = build_with_budget(monkeypatch, 1)
+    assert result["chunks"] == [] and result["history"] == []
+    assert SYSTEM in result["prompt"] and QUESTION in result["prompt"]
+
+
+def test_unknown_plan_uses_free_budget(monkeypatch):
+    monkeypatch.setattr(prompt, "PROMPT_TOKEN_BUDGET", {"free": 1, "pro": 100_000})
+    assert build_prompt(SYSTEM, HISTORY, CHUNKS, QUESTION, "enterprise")["budget"] == 1
+
+
+@pytest.mark.parametrize("budget", [1, 100_000])
+def test_chat_messages_keep_a_stable_prefix(monkeypatch, budget):
+    result = build_with_budget(monkeypatch, budget)
+    messages = result["messages"]
+    assert messages[0] == {"role": "system", "content": SYSTEM}
+    assert messages[1:-1] == result["history"]
+    assert messages[-1]["role"] == "user"
+    assert messages[-1]["content"] == result["turn_prompt"].strip()
+    assert QUESTION in result["turn_prompt"]
@@ -0,0 +1,205 @@
+"""
+In-memory rate limiters: token bucket refill and burst, sliding window,
+idle-key eviction and bounded memory. The Postgres backend's conditional
+upsert is replayed against an in-memory counter table.
+"""
+
+import asyncio
+import tracemalloc
+
+import pytest
+
+from backend import database, rate_limit
+from backend.rate_limit import (
+    KeyedLimiter,
+    PostgresRateLimitBackend,
+    RateLimitBackend,
+    SlidingWindowLimiter,
+    TokenBucketLimiter,
+    create_limiter,
+)
+from fake_db import FakePool
+
+
+def allowed(limiter, key: str, count: int, limit: int, burst: int = 0, now: float = 0.0) -> int:
+    return sum(limiter.allow(key, limit, burst, now) for _ in range(count))
+
+
+# ---------------- Token bucket
+
+def test_token_bucket_starts_full_with_burst():
+    limiter = TokenBucketLimiter()
+    assert allowed(limiter, "k", 100, limit=10, burst=5) == 15
+
+
+def test_token_bucket_refills_at_limit_per_minute():
+    limiter = TokenBucketLimiter()
+    assert allowed(limiter, "k", 10, limit=10) == 10
+    assert not limiter.allow("k", 10, 0, now=5.9)  # One token takes 6 s
+    assert limiter.allow("k", 10, 0, now=6.0)
+    assert not limiter.allow("k", 10, 0, now=6.0)
+    # 30 s later: 5 more tokens
+    assert allowed(limiter, "k", 10, limit=10, now=36.0) == 5
+
+
+def test_token_bucket_refill_is_capped_at_limit_plus_burst():
+    limiter = TokenBucketLimiter(idle_ttl=3600)
+    assert allowed(limiter, "k", 20, limit=10, burst=2) == 12
+    # Idle for ten minutes: the bucket holds at most limit + burst
+    assert allowed(limiter, "k", 50, limit=10, burst=2, now=600.0) == 12
+
+
+def test_token_bucket_keys_are_independent():
+    limiter = TokenBucketLimiter()
+    assert allowed(limiter, "a", 5, limit=3) == 3
+    assert allowed(limiter, "b", 5, limit=3) == 3
+
+
+# ---------------- Sliding window
+
+def test_sliding_window_limit_and_burst():
+    limiter = SlidingWindowLimiter()
+    assert allowed(limiter, "k", 20, limit=10, burst=2) == 12
+
+
+def test_sliding_window_weights_previous_window():
+    limiter = SlidingWindowLimiter()
+    assert allowed(limiter, "k", 10, limit=10) == 10
+    # Halfway into the next window half of the previous count still applies
+    assert allowed(limiter, "k", 10, limit=10, now=90.0) == 5
+    # Two windows later everything has expired
+    assert allowed(limiter, "k", 20, limit=10, now=200.0) == 10
+
+
+# ---------------- Memory bounds
+
+@pytest.mark.parametrize("mode", ["token_bucket", "sliding_window"])
+def test_idle_keys_are_evicted(mode):
+    limiter = create_limiter(mode, idle_ttl=120)
+    for i in range(100):
+        limiter.allow(f"old-{i}", 10, 0, now=0.0)
+    limiter.allow("new", 10, 0, now=500.0)
+    assert len(limiter) == 1
+    assert limiter.evictions == 100
+
+
+@pytest.mark.parametrize("mode", ["token_bucket", "sliding_window"])
+def test_memory_stays_constant_past_max_keys(mode):
+    limiter = create_limiter(mode, max_keys=1000)
+    tracemalloc.start()
+    try:
+        for i in range(5_000):
+            limiter.allow(f"key-{i}", 60, 0, now=i * 0.001)
+        at_5k = tracemalloc.get_traced_memory()[0]
+        for i in range(5_000, 100_000):
+            limiter.allow(f"key-{i}", 60, 0, now=i * 0.001)
+        at_100k = tracemalloc.get_traced_memory()[0]
+    finally:
+        tracemalloc.stop()
+
+    assert len(limiter) == 1000
+    # 20x the keys, same footprint (allow a little allocator noise)
+    assert at_100k - at_5k < 64 * 1024
+
+
+@pytest.mark.parametrize("mode", ["token_bucket", "sliding_window"])
+def test_state_per_key_does_not_grow_with_requests(mode):
+    limiter = create_limiter(mode)
+    limiter.allow("k", 1000, 0, now=0.0)
+    size = len(limiter._state["k"])
+    for i in range(5000):
+        limiter.allow("k", 1000, 0, now=i * 0.01)
+    assert len(limiter._state["k"]) == size
+
+
+def test_base_classes_require_allow():
+    class NoAllow(RateLimitBackend):
+        name = "none"
+
+    for base in (KeyedLimiter, RateLimitBackend, NoAllow):
+        with pytest.raises(TypeError):
+            base()
+
+
+# ---------------- Postgres backend
+
+class CounterTable:
+    """rate_limit_counters in memory, answering the backend's upsert and cleanup"""
+
+    def __init__(self):
+        self.rows = {}  # (key, window_start) -> count
+        self.fail = False
+
+    def respond(self, method, query, args):
+        if self.fail:
+            return ConnectionError("database unreachable")
+        if "INSERT INTO rate_limit_counters" in query:
+            key, window_start, overlap, limit, window = args
+            weighted = self.rows.get((key, window_start - window), 0) * overlap
+            count = self.rows.get((key, window_start), 0)
+            if count + weighted >= limit:
+                return None  # Conditional upsert matched nothing
+            self.rows[(key, window_start)] = count + 1
+            return count + 1
+        if query.startswith("DELETE FROM rate_limit_counters"):
+            (cutoff,) = args
+            self.rows = {k: v for k, v in self.rows.items() if k[1] >= cutoff}
+            return "DELETE"
+        raise AssertionError(f"unexpected query: {query}")
+
+
+@pytest.fixture
+def postgres(monkeypatch):
+    table = CounterTable()
+    pool = FakePool(table.respond)
+    clock = [6000.0]  # Start of a window
+    monkeypatch.setattr(database, "db_pool", pool)
+    monkeypatch.setattr(rate_limit.time, "time", lambda: clock[0])
+    return PostgresRateLimitBackend(), table, pool, clock
+
+
+def allowed_pg(backend, key: str, count: int, limit: int, burst: int = 0) -> int:
+    return sum(asyncio.run(backend.allow(key, limit, burst)) for _ in range(count))
+
+
+def test_postgres_counts_in_the_current_window(postgres):
+    backend, table, pool, _ = postgres
+
+    assert allowed_pg(backend, "k", 20, limit=10, burst=2) == 12
+    assert allowed_pg(backend, "other", 3, limit=10) == 3
+    assert table.rows == {("k", 6000): 12, ("other", 6000): 3}
+    # Rejected requests consume no quota
+    assert backend.stats() == {"backend": "postgres", "allowed": 15, "rejected": 8, "errors": 0}
+    _, query, args = pool.calls[0]
+    assert query.startswith("WITH prev AS") and args == ("k", 6000, 1.0, 12, 60)
+
+
+def test_postgres_weights_previous_window(postgres):
+    backend, table, _, clock = postgres
+    assert allowed_pg(backend, "k", 10, limit=10) == 10
+
+    clock[0] += 90  # Half of the previous window still overlaps: 5 weighted
+    assert allowed_pg(backend, "k", 10, limit=10) == 5
+    assert table.rows[("k", 6060)] == 5
+
+
+def test_postgres_cleans_up_old_windows_once_per_interval(postgres):
+    backend, table, pool, clock = postgres
+    allowed_pg(backend, "k", 1, limit=10)
+    clock[0] += 30
+    allowed_pg(backend, "k", 1, limit=10)
+    assert len(pool.queries("execute")) == 1
+
+    clock[0] += 150  # Window 6180: rows older than 6060 are dropped
+    allowed_pg(backend, "k", 1, limit=10)
+    assert pool.queries("execute")[-1] == "DELETE FROM rate_limit_counters WHERE window_start < $1"
+    assert pool.calls[-1][2] == (6060,)
+    assert table.rows == {("k", 6180): 1}
+
+
+def test_postgres_fails_open_when_unreachable(postgres):
+    backend, table, _, _ = postgres
+    table.fail = True
+
+    assert allowed_pg(backend, "k", 3, limit=1) == 3
+    assert backend.stats()["errors"] == 3
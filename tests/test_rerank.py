@@ -0,0 +1,38 @@
+"""
+MMR selection of retrieved chunks under a token budget.
+"""
+
+from backend.services.rerank import mmr_select
+
+# Two near-duplicates (0, 1), a distinct, slightly less relevant chunk (2)
+# and a weak duplicate (3). Relevance is min-max normalized, so 3 scores 0.
+RELEVANCE = [0.9, 0.89, 0.85, 0.5]
+VECTORS = [[1.0, 0.0], [0.99, 0.01], [0.0, 1.0], [1.0, 0.0]]
+COSTS = [10, 10, 10, 10]
+
+
+def test_near_duplicates_are_skipped_for_diverse_chunks():
+    assert mmr_select(RELEVANCE, VECTORS, COSTS, k=2, budget=100) == [0, 2]
+
+
+def test_lambda_one_is_pure_relevance_order():
+    assert mmr_select(RELEVANCE, VECTORS, COSTS, k=4, budget=100, lambda_=1.0) == [0, 1, 2, 3]
+
+
+def test_missing_vectors_get_no_redundancy_penalty():
+    assert mmr_select(RELEVANCE, [None, [], None, None], COSTS, k=4, budget=100) == [0, 1, 2, 3]
+
+
+def test_budget_skips_chunks_that_do_not_fit():
+    # Chunk 2 would be picked second but is too expensive; the cheap duplicate fits
+    assert mmr_select(RELEVANCE, VECTORS, [10, 10, 50, 10], k=4, budget=25) == [0, 1]
+
+
+def test_first_pick_is_kept_even_over_budget():
+    assert mmr_select(RELEVANCE, VECTORS, [500, 10, 10, 10], k=1, budget=100) == [0]
+    assert mmr_select(RELEVANCE, VECTORS, [500, 10, 10, 10], k=4, budget=100) == [0]
+
+
+def test_equal_relevance_and_empty_input():
+    assert mmr_select([0.5, 0.5], [None, None], [1, 1], k=2, budget=10) == [0, 1]
+    assert mmr_select([], [], [], k=4, budget=100) == []
@@ -0,0 +1,58 @@
+"""
+Chat-path data access: one connection and one statement per step.
+"""
+
+import asyncio
+import uuid
+
+import pytest
+
+from backend import database
+from backend.services.session import load_chat_turn, save_chat_turn
+from fake_db import FakePool
+
+SESSION_ID = uuid.uuid4()
+CLIENT_ID = uuid.uuid4()
+
+
+@pytest.fixture
+def pool(monkeypatch):
+    def respond(method, query, args):
+        if method == "fetch" and "chat_sessions" in query:
+            return [
+                {"session_id": SESSION_ID, "role": "user", "content": "halo"},
+                {"session_id": SESSION_ID, "role": "assistant", "content": "Halo! Ada yang bisa dibantu?"},
+            ]
+        return None
+
+    pool = FakePool(respond)
+    monkeypatch.setattr(database, "db_pool", pool)
+    return pool
+
+
+def test_load_chat_turn_is_one_round_trip(pool):
+    session_id, history = asyncio.run(load_chat_turn("visitor-1", CLIENT_ID))
+
+    assert session_id == SESSION_ID
+    assert history == [
+        {"role": "user", "content": "halo"},
+        {"role": "assistant", "content": "Halo! Ada yang bisa dibantu?"},
+    ]
+    assert pool.acquisitions == 1
+    assert len(pool.calls) == 1
+
+
+def test_load_chat_turn_new_session_has_empty_history(monkeypatch):
+    pool = FakePool(lambda method, query, args: [{"session_id": SESSION_ID, "role": None, "content": None}])
+    monkeypatch.setattr(database, "db_pool", pool)
+
+    assert asyncio.run(load_chat_turn("visitor-2", CLIENT_ID)) == (SESSION_ID, [])
+
+
+def test_save_chat_turn_writes_both_messages_in_one_statement(pool):
+    asyncio.run(save_chat_turn(SESSION_ID, [("user", "halo", 3), ("assistant", "hai", 2)]))
+
+    assert pool.acquisitions == 1
+    [(method, query, (rows,))] = pool.calls
+    assert method == "executemany"
+    assert rows == [(SESSION_ID, "user", "halo", 3), (SESSION_ID, "assistant", "hai", 2)]
@@ -0,0 +1,44 @@
+"""
+CSV upload script: files without title/content columns are skipped,
+incomplete rows are dropped, and rows are copied in UPLOAD_BATCH_SIZE
+batches inside one transaction.
+"""
+
+import asyncio
+
+import upload_documents
+from fake_db import FakePool
+
+
+def upload(tmp_path, text: str):
+    path = tmp_path / "faq.csv"
+    path.write_text(text, encoding="utf-8")
+    pool = FakePool(lambda method, query, args: [{"inserted": True}] if method == "fetch" else None)
+
+    async def scenario():
+        async with pool.acquire() as conn:
+            return await upload_documents.upload_csv_document(conn, "client-1", "Toko ABC", str(path))
+
+    return asyncio.run(scenario()), pool
+
+
+def test_file_without_required_columns_is_skipped(tmp_path):
+    stats, pool = upload(tmp_path, "question,answer\nJam buka?,09.00\n")
+
+    assert stats is None
+    assert pool.calls == []
+
+
+def test_rows_are_copied_in_batches(tmp_path, monkeypatch):
+    monkeypatch.setattr(upload_documents, "UPLOAD_BATCH_SIZE", 2)
+    rows = "".join(f"Judul {i},Isi {i}\n" for i in range(5))
+    stats, pool = upload(tmp_path, "title,content\n" + rows + ",tanpa judul\nTanpa isi,\n")
+
+    copies = [args[0] for method, _, args in pool.calls if method == "copy_records_to_table"]
+    assert [len(records) for records in copies] == [2, 2, 1]
+    assert copies[0][0] == (0, "Judul 0", "Isi 0")
+    assert stats["rows"] == 5
+    # Staging, copies and merge share one transaction
+    assert pool.calls[0][0] == "transaction"
+    _, merge, args = pool.calls[-1]
+    assert merge.startswith("INSERT INTO documents") and args == ("client-1", "Toko ABC_faq")
@@ -0,0 +1,101 @@
+"""
+Write-behind usage logger: batching, retries and row-by-row fallback.
+"""
+
+import asyncio
+import uuid
+
+import asyncpg
+
+from backend import database
+from backend.services.usage import UsageLogger
+from fake_db import FakePool
+
+CLIENT_ID = uuid.uuid4()
+GOOD_KEY = uuid.uuid4()
+DELETED_KEY = uuid.uuid4()
+
+
+def record(api_key_id, tokens_in=10):
+    return (CLIENT_ID, api_key_id, "/chat", tokens_in, 5)
+
+
+def make_logger(**kwargs) -> UsageLogger:
+    options = {"batch_size": 100, "flush_interval_ms": 20, "flush_retries": 2, "retry_backoff_ms": 1}
+    return UsageLogger(**{**options, **kwargs})
+
+
+async def log_all(logger: UsageLogger, records: list):
+    await logger.start()
+    for r in records:
+        await logger.log(r)
+    await logger.stop()
+
+
+def test_batches_are_written_with_one_copy(monkeypatch):
+    pool = FakePool()
+    monkeypatch.setattr(database, "db_pool", pool)
+    logger = make_logger()
+
+    asyncio.run(log_all(logger, [record(GOOD_KEY, i) for i in range(50)]))
+
+    [(method, table, (records, columns))] = pool.calls
+    assert (method, table) == ("copy_records_to_table", "usage_logs")
+    assert len(records) == 50
+    assert logger.events_logged == 50 and logger.events_failed == 0
+
+
+def test_transient_copy_failure_is_retried(monkeypatch):
+    failures = [ConnectionResetError("connection lost")]
+
+    def respond(method, query, args):
+        if method == "copy_records_to_table" and failures:
+            return failures.pop()
+
+    pool = FakePool(respond)
+    monkeypatch.setattr(database, "db_pool", pool)
+    logger = make_logger()
+
+    asyncio.run(log_all(logger, [record(GOOD_KEY) for _ in range(10)]))
+
+    assert pool.queries("copy_records_to_table") == ["usage_logs", "usage_logs"]
+    assert logger.flush_retries_total == 1
+    assert logger.events_logged == 10
+    assert logger.events_row_by_row == 0 and logger.events_failed == 0
+
+
+def test_bad_record_only_loses_itself(monkeypatch):
+    def respond(method, query, args):
+        if method == "copy_records_to_table":
+            return asyncpg.ForeignKeyViolationError("usage_logs_api_key_id_fkey")
+        if method == "execute" and DELETED_KEY in args:
+            return asyncpg.ForeignKeyViolationError("usage_logs_api_key_id_fkey")
+
+    pool = FakePool(respond)
+    monkeypatch.setattr(database, "db_pool", pool)
+    logger = make_logger()
+    records = [record(GOOD_KEY)] * 4 + [record(DELETED_KEY)] + [record(GOOD_KEY)] * 5
+
+    asyncio.run(log_all(logger, records))
+
+    # Record errors are not retried as a batch
+    assert len(pool.queries("copy_records_to_table")) == 1
+    assert len(pool.queries("execute")) == 10
+    assert logger.events_logged == 9
+    assert logger.events_row_by_row == 9
+    assert logger.events_failed == 1
+
+
+def test_database_down_counts_whole_batch_failed(monkeypatch):
+    class DownPool(FakePool):
+        def acquire(self):
+            raise OSError("connection refused")
+
+    monkeypatch.setattr(database, "db_pool", DownPool())
+    logger = make_logger()
+
+    asyncio.run(log_all(logger, [record(GOOD_KEY) for _ in range(3)]))
+
+    assert logger.flush_retries_total == 2
+    assert logger.events_logged == 0
+    assert logger.events_failed == 3
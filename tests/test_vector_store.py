@@ -0,0 +1,81 @@
+"""
+Collection registry: cached handles per client, reopened when the client's
+collection_version changes, and warmed up for active clients on startup.
+"""
+
+import asyncio
+import uuid
+
+import pytest
+
+from backend import database
+from backend.services import vector_store
+from backend.services.vector_store import CollectionRegistry, collection_name_for
+from fake_db import FakePool
+
+CLIENT_ID = uuid.uuid4()
+
+
+class FakeChroma:
+    """get_collection returns a fresh handle per call; unknown names raise"""
+
+    def __init__(self, names):
+        self.names = set(names)
+        self.opened = []
+
+    def get_collection(self, name):
+        if name not in self.names:
+            raise ValueError(f"Collection {name} does not exist")
+        self.opened.append(name)
+        return object()
+
+
+@pytest.fixture
+def chroma(monkeypatch):
+    fake = FakeChroma([collection_name_for(CLIENT_ID)])
+    monkeypatch.setattr(vector_store, "chroma_client", fake)
+    return fake
+
+
+def test_same_version_reuses_the_handle(chroma):
+    registry = CollectionRegistry()
+
+    first = asyncio.run(registry.get(CLIENT_ID, 1))
+    assert asyncio.run(registry.get(str(CLIENT_ID), 1)) is first
+    assert len(chroma.opened) == 1
+    assert registry.stats() == {"handles": 1, "hits": 1, "misses": 1}
+
+
+def test_version_bump_reopens_the_collection(chroma):
+    registry = CollectionRegistry()
+    stale = asyncio.run(registry.get(CLIENT_ID, 1))
+
+    # scripts/ingest.py rewrote the collection and bumped collection_version
+    fresh = asyncio.run(registry.get(CLIENT_ID, 2))
+
+    assert fresh is not stale
+    assert asyncio.run(registry.get(CLIENT_ID, 2)) is fresh
+    assert chroma.opened == [collection_name_for(CLIENT_ID)] * 2
+
+
+def test_invalidate_drops_the_handle(chroma):
+    registry = CollectionRegistry()
+    asyncio.run(registry.get(CLIENT_ID, 1))
+
+    registry.invalidate(CLIENT_ID)
+    asyncio.run(registry.get(CLIENT_ID, 1))
+
+    assert len(chroma.opened) == 2
+
+
+def test_warm_up_skips_clients_without_a_collection(chroma, monkeypatch):
+    clients = [
+        {"id": CLIENT_ID, "collection_version": 3},
+        {"id": uuid.uuid4(), "collection_version": 0},
+    ]
+    monkeypatch.setattr(database, "db_pool", FakePool(lambda method, query, args: clients))
+    registry = CollectionRegistry()
+
+    assert asyncio.run(registry.warm_up()) == 1
+    asyncio.run(registry.get(CLIENT_ID, 3))
+    assert registry.stats() == {"handles": 1, "hits": 1, "misses": 2}